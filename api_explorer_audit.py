@@ -0,0 +1,282 @@
+"""
+API Explorer Audit - Static response payload estimates
+Estimates the size and shape of every operation's success response from
+the spec alone (--audit) and flags unpaginated lists and unbounded arrays.
+"""
+
+import argparse
+from typing import Dict, Any, List, Optional
+
+from api_explorer_core import APIExplorer, _format_table, _write_csv
+
+
+# Static payload estimates: JSON bytes of a scalar by type and
+# format, and the length assumed for arrays without maxItems.
+AUDIT_SCALAR_BYTES = {"integer": 6, "number": 10, "boolean": 5, "string": 20}
+AUDIT_FORMAT_BYTES = {
+    "uuid": 38, "date-time": 29, "date": 12, "time": 10, "uri": 60, "email": 26,
+    "decimal": 10, "double": 12, "float": 10, "int64": 10, "int32": 6,
+}
+AUDIT_ARRAY_LENGTH = 20
+# Query parameters that page through a list response.
+PAGINATION_PARAMS = frozenset(("limit", "offset", "cursor", "page", "page_size", "per_page", "page_token"))
+# Array properties that carry the items of a paginated envelope.
+LIST_ENVELOPE_KEYS = ("results", "items", "data", "records", "entries")
+
+
+class PayloadCost:
+    """
+    Static size estimate of a JSON payload schema.
+    
+    bytes assumes AUDIT_ARRAY_LENGTH items for unbounded arrays; fields
+    counts properties, each array's item properties once; depth counts
+    nested objects and arrays; embedded_objects and referenced_objects
+    count nested inline object schemas and $refs; recursive is set when
+    the schema reaches back into its own ref cycle.
+    """
+    
+    __slots__ = ("bytes", "fields", "depth", "unbounded_arrays", "embedded_objects",
+                 "referenced_objects", "recursive")
+    
+    def __init__(self, bytes: int = 0):
+        self.bytes = bytes
+        self.fields = 0
+        self.depth = 0
+        self.unbounded_arrays = 0
+        self.embedded_objects = 0
+        self.referenced_objects = 0
+        self.recursive = False
+    
+    def add(self, other: "PayloadCost", times: int = 1) -> None:
+        """Add a nested payload (times copies of it, for bytes)."""
+        self.bytes += other.bytes * times
+        self.fields += other.fields
+        self.depth = max(self.depth, other.depth)
+        self.unbounded_arrays += other.unbounded_arrays
+        self.embedded_objects += other.embedded_objects
+        self.referenced_objects += other.referenced_objects
+        self.recursive = self.recursive or other.recursive
+
+
+def _scalar_payload_bytes(schema: Dict[str, Any]) -> int:
+    """Estimate the JSON bytes of a scalar schema."""
+    enum = schema.get("enum")
+    if isinstance(enum, list) and enum:
+        return sum(len(str(value)) + 2 for value in enum) // len(enum)
+    format_bytes = AUDIT_FORMAT_BYTES.get(schema.get("format"))
+    if format_bytes is not None:
+        return format_bytes
+    max_length = schema.get("maxLength")
+    if schema.get("type") == "string" and isinstance(max_length, int):
+        return min(max_length, 256) // 2 + 2
+    return AUDIT_SCALAR_BYTES.get(schema.get("type"), 8)
+
+def _component_payload_cost(explorer: APIExplorer, name: str) -> PayloadCost:
+    """Return the payload estimate of a component, computing it on first use."""
+    cost = explorer._payload_costs.get(name)
+    if cost is None:
+        sccs = explorer._get_index("ref_sccs")
+        scc_id = sccs["component_of"].get(name)
+        if scc_id is not None and not sccs["cyclic"][scc_id]:
+            scc_id = None
+        cost = explorer._payload_costs[name] = _payload_cost(
+            explorer, explorer.schemas.get(name), scc_id, root=True)
+    return cost
+
+def _payload_cost(explorer: APIExplorer, schema: Any, scc_id: Optional[int] = None,
+                  root: bool = False) -> PayloadCost:
+    """
+    Estimate the payload of a schema.
+    
+    Referenced components come from the per-component estimates, so
+    every component is walked once however often it is used; a ref back
+    into scc_id, the ref cycle being walked, is marked recursive instead
+    of expanded.
+    
+    Args:
+        schema: Schema to estimate
+        scc_id: Ref cycle (ref_sccs id) the schema belongs to, if any
+        root: The schema is a whole component or payload, not an object
+            embedded in one
+        
+    Returns:
+        Payload estimate
+    """
+    if not isinstance(schema, dict):
+        return PayloadCost(4)
+    ref = schema.get("$ref")
+    if isinstance(ref, str):
+        name = ref.split("/")[-1]
+        cost = PayloadCost()
+        if scc_id is not None and explorer._get_index("ref_sccs")["component_of"].get(name) == scc_id:
+            cost.recursive = True
+        else:
+            cost.add(_component_payload_cost(explorer, name))
+        target = explorer.schemas.get(name)
+        if isinstance(target, dict) and (target.get("type") == "object" or "properties" in target):
+            cost.referenced_objects += 1
+        return cost
+    
+    cost = PayloadCost()
+    for part in schema.get("allOf") or ():
+        cost.add(_payload_cost(explorer, part, scc_id, root))
+    alternatives = [
+        _payload_cost(explorer, part, scc_id, root)
+        for keyword in ("oneOf", "anyOf") for part in schema.get(keyword) or ()
+    ]
+    if alternatives:
+        cost.add(max(alternatives, key=lambda alternative: alternative.bytes))
+    
+    schema_type = schema.get("type")
+    properties = schema.get("properties")
+    if schema_type == "object" or isinstance(properties, dict):
+        nested = PayloadCost(2)
+        for key, prop in (properties or {}).items():
+            nested.add(_payload_cost(explorer, prop, scc_id))
+            nested.bytes += len(key) + 4
+            nested.fields += 1
+        additional = schema.get("additionalProperties")
+        if isinstance(additional, dict) and additional:
+            nested.add(_payload_cost(explorer, additional, scc_id), AUDIT_ARRAY_LENGTH)
+            nested.bytes += 16 * AUDIT_ARRAY_LENGTH
+        nested.depth += 1
+        if properties and not root:
+            nested.embedded_objects += 1
+        cost.add(nested)
+    elif schema_type == "array":
+        max_items = schema.get("maxItems")
+        length = max_items if isinstance(max_items, int) else AUDIT_ARRAY_LENGTH
+        nested = PayloadCost(2 + length)
+        nested.add(_payload_cost(explorer, schema.get("items"), scc_id), length)
+        nested.depth += 1
+        if not isinstance(max_items, int):
+            nested.unbounded_arrays += 1
+        cost.add(nested)
+    elif schema_type is not None or "enum" in schema:
+        cost.bytes += _scalar_payload_bytes(schema)
+    return cost
+
+def _list_shape(explorer: APIExplorer, schema: Any) -> Optional[str]:
+    """Return "array" or "envelope" when a response schema is a list, else None."""
+    schema = explorer._resolve_schema_ref(schema["$ref"]) if isinstance(schema, dict) and "$ref" in schema else schema
+    if not isinstance(schema, dict):
+        return None
+    if schema.get("type") == "array":
+        return "array"
+    properties = schema.get("properties") or {}
+    for key in LIST_ENVELOPE_KEYS:
+        prop = properties.get(key)
+        if isinstance(prop, dict) and "$ref" in prop:
+            prop = explorer._resolve_schema_ref(prop["$ref"])
+        if isinstance(prop, dict) and prop.get("type") == "array":
+            return "envelope"
+    return None
+
+def audit_operations(explorer: APIExplorer, prefix: str = "") -> List[Dict[str, Any]]:
+    """
+    Statically audit the response payload of every operation.
+    
+    Component estimates are computed once, dependencies first in the
+    order of the ref graph's strongly connected components; each
+    operation then only walks its own response schema. The success
+    response is the first 2xx response with JSON content.
+    
+    Args:
+        prefix: Only audit paths starting with this prefix
+        
+    Returns:
+        One row per operation, most expensive estimated payload first,
+        with the estimate's counts, whether the response is a list
+        ("array" or paginated "envelope"), the pagination query
+        parameters it accepts and flags: "unpaginated-list",
+        "unbounded-nested-arrays" and "recursive"
+    """
+    with explorer._phase("audit.components"):
+        for scc in explorer._get_index("ref_sccs")["members"]:
+            for name in scc:
+                _component_payload_cost(explorer, name)
+    
+    rows = []
+    for endpoint in explorer.list_endpoints_with_prefix(prefix):
+        path_item = explorer.model.path(endpoint)
+        for operation in path_item.operations if path_item is not None else ():
+            status = schema = None
+            for response in operation.responses:
+                if not response.status.startswith("2"):
+                    continue
+                schema = next((s for content_type, s in response.content if "json" in content_type), None)
+                if schema is not None:
+                    status = response.status
+                    break
+            cost = _payload_cost(explorer, schema, root=True) if schema is not None else PayloadCost()
+            list_shape = _list_shape(explorer, schema) if schema is not None else None
+            pagination = sorted(
+                param.name for param in operation.parameters
+                if param.location == "query" and param.name in PAGINATION_PARAMS
+            )
+            flags = []
+            if list_shape and operation.method == "get" and not pagination:
+                flags.append("unpaginated-list")
+            # The list of a paginated response is bounded by its page size.
+            paged_arrays = 1 if list_shape and pagination else 0
+            if cost.unbounded_arrays > paged_arrays:
+                flags.append("unbounded-nested-arrays")
+            if cost.recursive:
+                flags.append("recursive")
+            rows.append({
+                "endpoint": endpoint,
+                "method": operation.method.upper(),
+                "operation_id": operation.operation_id,
+                "status": status,
+                "estimated_bytes": cost.bytes,
+                "fields": cost.fields,
+                "depth": cost.depth,
+                "unbounded_arrays": cost.unbounded_arrays,
+                "embedded_objects": cost.embedded_objects,
+                "referenced_objects": cost.referenced_objects,
+                "recursive": cost.recursive,
+                "list": list_shape,
+                "pagination_params": pagination,
+                "flags": flags,
+            })
+    rows.sort(key=lambda row: -row["estimated_bytes"])
+    return rows
+
+
+def run_audit(explorer: APIExplorer, args: argparse.Namespace, out) -> List[Dict[str, Any]]:
+    """
+    Run --audit and print the ranked operations as a table, CSV or JSONL.
+    
+    Args:
+        explorer: Loaded API explorer
+        args: Parsed arguments (audit prefix, limit, csv, ndjson)
+        out: Text stream the report is written to
+        
+    Returns:
+        The audit rows, before --limit
+    """
+    with explorer._phase("audit"):
+        rows = explorer.audit_operations(args.audit)
+    shown = rows[:args.limit] if args.limit else rows
+    if args.csv:
+        _write_csv(shown, out)
+        return rows
+    if args.ndjson:
+        explorer.write_ndjson(shown, out)
+        return rows
+    
+    table = [("#", "OPERATION", "EST BYTES", "FIELDS", "DEPTH", "UNBOUNDED", "EMBEDDED", "REFS", "LIST", "FLAGS")]
+    for rank, row in enumerate(shown, 1):
+        table.append((
+            str(rank), f"{row['method']} {row['endpoint']}", str(row["estimated_bytes"]),
+            str(row["fields"]), str(row["depth"]), str(row["unbounded_arrays"]),
+            str(row["embedded_objects"]), str(row["referenced_objects"]),
+            row["list"] or "-", ",".join(row["flags"]) or "-",
+        ))
+    out.write(f"\n=== Response payload audit ({args.audit or 'all paths'}, by estimated size) ===\n")
+    for line in _format_table(table, left=(1, 8, 9)):
+        out.write(line + "\n")
+    unpaginated = sum("unpaginated-list" in row["flags"] for row in rows)
+    out.write(f"\n{len(rows)} operations; {unpaginated} list responses without "
+              f"{'/'.join(sorted(PAGINATION_PARAMS))} parameters\n")
+    return rows
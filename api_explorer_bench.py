@@ -0,0 +1,494 @@
+#!/usr/bin/env python3
+"""
+API Explorer Benchmarks - Synthetic-spec performance suite
+Generates OpenAPI documents shaped like api_schema.json at any size and
+records how long the main APIExplorer operations take and how much memory
+they need, so runs can be compared to catch regressions.
+"""
+
+import json
+import sys
+import argparse
+import io
+import platform
+import random
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+from pathlib import Path
+
+from api_explorer import APIExplorer, CACHE_SUFFIX, HTTP_METHODS, LAZY_CACHE_SUFFIX
+
+RESULTS_VERSION = 1
+
+# Benchmarks in the order they run, with a short description for the report.
+BENCHMARKS = {
+    "load_json": "Plain json.load of the spec, the reference for the loads",
+    "load_cold": "Parse the spec without the cache (indexes are built on first use)",
+    "load_warm": "Load the spec from the cache",
+    "prefix": "get_complete_endpoints_by_prefix over about a tenth of the paths",
+    "analysis": "get_endpoint_analysis for a sample of endpoints",
+    "resolve_refs": "_resolve_all_refs for a sample of components, memo cleared",
+    "search": "search_endpoints for a set of queries",
+    "serialize": "print_formatted_output of the resolved sample endpoints",
+}
+
+
+def template_shape(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extract the shape a synthetic spec should imitate.
+
+    Args:
+        spec: A real OpenAPI document
+
+    Returns:
+        Dictionary with path prefixes, method combinations, property schemas,
+        query parameters, property counts and the share of enum components
+    """
+    paths = spec.get("paths", {})
+    schemas = spec.get("components", {}).get("schemas", {})
+
+    prefixes = Counter()
+    methods = Counter()
+    parameters: List[Dict[str, Any]] = []
+    for endpoint, path_item in paths.items():
+        segments = [s for s in endpoint.strip("/").split("/") if s]
+        prefixes["/" + "/".join(segments[:3]) + "/"] += 1
+        methods[tuple(m for m in HTTP_METHODS if m in path_item)] += 1
+        for method in HTTP_METHODS:
+            for param in path_item.get(method, {}).get("parameters", []):
+                if isinstance(param, dict) and param.get("in") == "query" and "$ref" not in json.dumps(param):
+                    parameters.append(param)
+
+    properties: List[Dict[str, Any]] = []
+    property_counts: List[int] = []
+    enums = 0
+    for schema_def in schemas.values():
+        if "enum" in schema_def:
+            enums += 1
+            continue
+        props = schema_def.get("properties", {})
+        property_counts.append(len(props))
+        for prop in props.values():
+            if "$ref" not in json.dumps(prop):
+                properties.append(prop)
+
+    return {
+        "paths": len(paths),
+        "components": len(schemas),
+        "prefixes": sorted(prefixes.items()),
+        "methods": sorted(methods.items()),
+        "parameters": parameters or [{"in": "query", "name": "q", "schema": {"type": "string"}}],
+        "properties": properties or [{"type": "string"}],
+        "property_counts": property_counts or [5],
+        "enum_ratio": enums / max(1, len(schemas)),
+    }
+
+
+def generate_spec(shape: Dict[str, Any], paths: int, components: int, fanout: int = 2,
+                  depth: int = 4, cycles: float = 0.02, seed: int = 0) -> Dict[str, Any]:
+    """
+    Generate a synthetic OpenAPI document.
+
+    Components are spread over depth + 1 levels; each non-leaf component
+    references `fanout` components of the next level, as a plain $ref, an
+    array of refs or a nullable allOf wrapper. A `cycles` share of the
+    components also gets a back-reference to one of their ancestors (or
+    themselves), which closes a reference cycle. Paths reuse the template's
+    prefixes and method combinations, and their bodies reference top-level
+    components.
+
+    Args:
+        shape: Output of template_shape()
+        paths: Number of paths
+        components: Number of components
+        fanout: $ref properties per non-leaf component
+        depth: Number of $ref levels below the top-level components
+        cycles: Share of components with a back-reference
+        seed: Random seed; the same arguments always give the same document
+
+    Returns:
+        OpenAPI 3.0 document
+    """
+    rng = random.Random(seed)
+    components = max(components, depth + 1)
+    levels: List[List[str]] = [[] for _ in range(depth + 1)]
+    names = []
+    for index in range(components):
+        level = index * (depth + 1) // components
+        name = f"Model{index}L{level}"
+        levels[level].append(name)
+        names.append((name, level))
+
+    def ref(target: str) -> Dict[str, Any]:
+        return {"$ref": f"#/components/schemas/{target}"}
+
+    schemas: Dict[str, Any] = {}
+    parents: Dict[str, List[str]] = {}
+    for name, level in names:
+        if level == depth and rng.random() < shape["enum_ratio"]:
+            values = [f"value_{i}" for i in range(rng.randint(2, 6))]
+            schemas[name] = {
+                "enum": values,
+                "type": "string",
+                "description": "\n".join(f"* `{v}` - {v.title()}" for v in values),
+            }
+            continue
+        properties: Dict[str, Any] = {}
+        for i in range(rng.choice(shape["property_counts"])):
+            properties[f"field_{i}"] = rng.choice(shape["properties"])
+        if level < depth:
+            for i in range(fanout):
+                target = rng.choice(levels[level + 1])
+                parents.setdefault(target, []).append(name)
+                style = rng.random()
+                if style < 0.5:
+                    properties[f"ref_{i}"] = ref(target)
+                elif style < 0.8:
+                    properties[f"refs_{i}"] = {"type": "array", "items": ref(target)}
+                else:
+                    properties[f"ref_{i}"] = {"allOf": [ref(target)], "nullable": True}
+        if rng.random() < cycles:
+            ancestor = name
+            for _ in range(rng.randint(0, level)):
+                if ancestor not in parents:
+                    break
+                ancestor = rng.choice(parents[ancestor])
+            properties["parent"] = {"allOf": [ref(ancestor)], "nullable": True}
+        schemas[name] = {
+            "type": "object",
+            "description": f"Synthetic model {name}.",
+            "properties": properties,
+            "required": sorted(properties)[: len(properties) // 2],
+        }
+
+    top = [name for name in levels[0] if "enum" not in schemas[name]] or list(schemas)
+    prefix_weights = [count for _, count in shape["prefixes"]]
+    method_sets = [methods for methods, _ in shape["methods"]]
+    method_weights = [count for _, count in shape["methods"]]
+    path_items: Dict[str, Any] = {}
+    resource = 0
+    while len(path_items) < paths:
+        prefix = rng.choices([p for p, _ in shape["prefixes"]], prefix_weights)[0]
+        base = f"{prefix}resource{resource}/"
+        resource += 1
+        for endpoint in (base, base + "{id}/", base + "{id}/action/"):
+            if len(path_items) >= paths:
+                break
+            model = rng.choice(top)
+            tag = prefix.strip("/").split("/")[-1] or "root"
+            path_item = {}
+            for method in rng.choices(method_sets, method_weights)[0] or ("get",):
+                operation: Dict[str, Any] = {
+                    "operationId": f"{tag}_resource{resource}_{method}_{len(path_items)}",
+                    "description": f"Synthetic {method.upper()} endpoint for {model}.",
+                    "tags": [tag],
+                    "responses": {"200": {"description": "", "content": {
+                        "application/json": {"schema": ref(model)}}}},
+                }
+                parameters = []
+                if "{id}" in endpoint:
+                    parameters.append({"in": "path", "name": "id", "required": True,
+                                       "schema": {"type": "string", "format": "uuid"}})
+                if method == "get":
+                    parameters.extend(rng.sample(shape["parameters"],
+                                                 min(len(shape["parameters"]), rng.randint(0, 6))))
+                if parameters:
+                    operation["parameters"] = parameters
+                if method in ("post", "put", "patch"):
+                    operation["requestBody"] = {"content": {
+                        "application/json": {"schema": ref(model)}}, "required": True}
+                path_item[method] = operation
+            path_items[endpoint] = path_item
+
+    return {
+        "openapi": "3.0.3",
+        "info": {"title": "Synthetic API", "version": "1.0.0",
+                 "description": f"Generated with seed {seed}"},
+        "paths": path_items,
+        "components": {"schemas": schemas},
+    }
+
+
+def _measure(func, repeat: int) -> Dict[str, Any]:
+    """
+    Time a function and record its peak traced memory.
+
+    The timed runs happen without tracemalloc (it slows allocation-heavy
+    code several times over); one extra run under tracemalloc gives the
+    peak.
+
+    Returns:
+        Dictionary with min/median seconds, the number of runs and the peak
+        memory in KiB
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "min_s": round(min(timings), 6),
+        "median_s": round(statistics.median(timings), 6),
+        "runs": repeat,
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def run_suite(spec_file: Path, repeat: int = 5, sample: int = 20, seed: int = 0,
+              only: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Run the benchmarks against one spec file.
+
+    Args:
+        spec_file: OpenAPI document to load
+        repeat: Timed runs per benchmark (load_cold uses at most 3)
+        sample: Endpoints/components/queries sampled per benchmark
+        seed: Seed for the samples
+        only: Names of the benchmarks to run (default: all)
+
+    Returns:
+        Mapping of benchmark name to its measurements
+    """
+    rng = random.Random(seed)
+    cache_files = [spec_file.with_name(spec_file.name + suffix) for suffix in (CACHE_SUFFIX, LAZY_CACHE_SUFFIX)]
+    for cache_file in cache_files:
+        cache_file.unlink(missing_ok=True)
+
+    explorer = APIExplorer(str(spec_file))
+    endpoints = sorted(explorer.schema.get("paths", {}))
+    schema_names = sorted(explorer.schemas)
+    sampled_endpoints = rng.sample(endpoints, min(sample, len(endpoints)))
+    sampled_components = rng.sample(schema_names, min(sample, len(schema_names)))
+    prefixes = Counter(e.rstrip("/").rsplit("/", 2)[0] + "/" for e in endpoints)
+    target = max(1, len(endpoints) // 10)
+    prefix = min(prefixes, key=lambda p: (abs(prefixes[p] - target), p))
+    words = sorted({w for e in sampled_endpoints for w in e.strip("/").split("/") if "{" not in w})
+    queries = rng.sample(words, min(sample, len(words)))
+
+    def load_json():
+        with open(spec_file, encoding="utf-8") as f:
+            json.load(f)
+
+    def load_cold():
+        APIExplorer(str(spec_file), use_cache=False)
+
+    def load_warm():
+        APIExplorer(str(spec_file))
+
+    def prefix_query():
+        explorer.get_complete_endpoints_by_prefix(prefix)
+
+    def analysis():
+        for endpoint in sampled_endpoints:
+            explorer.get_endpoint_analysis(endpoint)
+
+    def resolve_refs():
+        explorer.clear_memos()
+        for name in sampled_components:
+            explorer._resolve_all_refs({"$ref": f"#/components/schemas/{name}"})
+
+    def search():
+        for query in queries:
+            explorer.search_endpoints(query)
+
+    resolved = {endpoint: explorer.get_endpoint_with_full_schemas(endpoint) for endpoint in sampled_endpoints}
+
+    def serialize():
+        explorer.print_formatted_output(resolved, "Resolved endpoints", out=io.StringIO())
+
+    funcs = {
+        "load_json": load_json,
+        "load_cold": load_cold,
+        "load_warm": load_warm,
+        "prefix": prefix_query,
+        "analysis": analysis,
+        "resolve_refs": resolve_refs,
+        "search": search,
+        "serialize": serialize,
+    }
+    results = {}
+    try:
+        for name, func in funcs.items():
+            if only and name not in only:
+                continue
+            results[name] = _measure(func, min(repeat, 3) if name == "load_cold" else repeat)
+    finally:
+        for cache_file in cache_files:
+            cache_file.unlink(missing_ok=True)
+    return results
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any],
+                    threshold: float = 0.25) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """
+    Compare two result files.
+
+    A measurement regresses when the current median time or peak memory is
+    more than `threshold` (a fraction) above the baseline.
+
+    Args:
+        baseline: Earlier results
+        current: New results
+        threshold: Allowed relative increase
+
+    Returns:
+        (report lines, list of regressions)
+    """
+    lines = [f"{'scenario':<14} {'benchmark':<14} {'base s':>10} {'new s':>10} {'ratio':>7}"
+             f" {'base KiB':>10} {'new KiB':>10} {'ratio':>7}"]
+    regressions = []
+    for scenario, benchmarks in current.get("scenarios", {}).items():
+        base_benchmarks = baseline.get("scenarios", {}).get(scenario, {}).get("results", {})
+        for name, result in benchmarks.get("results", {}).items():
+            base = base_benchmarks.get(name)
+            if not base:
+                continue
+            time_ratio = result["median_s"] / base["median_s"] if base["median_s"] else 1.0
+            memory_ratio = result["peak_kib"] / base["peak_kib"] if base["peak_kib"] else 1.0
+            flag = ""
+            if time_ratio > 1 + threshold or memory_ratio > 1 + threshold:
+                flag = "  REGRESSION"
+                regressions.append({"scenario": scenario, "benchmark": name,
+                                    "time_ratio": round(time_ratio, 3),
+                                    "memory_ratio": round(memory_ratio, 3)})
+            lines.append(f"{scenario:<14} {name:<14} {base['median_s']:>10.4f} {result['median_s']:>10.4f}"
+                         f" {time_ratio:>7.2f} {base['peak_kib']:>10.0f} {result['peak_kib']:>10.0f}"
+                         f" {memory_ratio:>7.2f}{flag}")
+    return lines, regressions
+
+
+def main():
+    """Main CLI interface."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark API Explorer on synthetic specs shaped like a real one",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Benchmark specs 1x and 10x the size of api_schema.json
+  python3 api_explorer_bench.py --scales 1 10 --output bench.json
+
+  # Deeper, denser and more cyclic components
+  python3 api_explorer_bench.py --scales 5 --fanout 4 --depth 6 --cycles 0.1
+
+  # Run again and compare with an earlier run (exit status 1 on regression)
+  python3 api_explorer_bench.py --scales 1 10 --output new.json --baseline bench.json
+
+  # Only compare two result files
+  python3 api_explorer_bench.py --compare bench.json new.json
+        """
+    )
+    parser.add_argument("--template", default="api_schema.json",
+                        help="Real spec whose shape the synthetic specs imitate")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1.0, 10.0],
+                        help="Sizes to benchmark, as multiples of the template's paths and components")
+    parser.add_argument("--paths", type=int, help="Exact number of paths (overrides --scales)")
+    parser.add_argument("--components", type=int, help="Exact number of components (with --paths)")
+    parser.add_argument("--fanout", type=int, default=2, help="$ref properties per non-leaf component")
+    parser.add_argument("--depth", type=int, default=4, help="$ref levels below top-level components")
+    parser.add_argument("--cycles", type=float, default=0.02,
+                        help="Share of components with a back-reference creating a cycle")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for generation and sampling")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark")
+    parser.add_argument("--sample", type=int, default=20,
+                        help="Endpoints, components and queries sampled per benchmark")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="Benchmarks to run")
+    parser.add_argument("--keep-specs", metavar="DIR", help="Also save the generated specs to DIR")
+    parser.add_argument("--output", "-o", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare the results with this earlier results file")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="Compare two results files and exit")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Relative slowdown or memory growth counted as a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        try:
+            baseline, current = (json.loads(Path(f).read_text(encoding="utf-8")) for f in args.compare)
+        except (OSError, ValueError) as e:
+            print(f"Error: Cannot read results: {e}")
+            sys.exit(1)
+        lines, regressions = compare_results(baseline, current, args.threshold)
+        print("\n".join(lines))
+        sys.exit(1 if regressions else 0)
+
+    try:
+        shape = template_shape(json.loads(Path(args.template).read_text(encoding="utf-8")))
+    except FileNotFoundError:
+        print(f"Error: Template file '{args.template}' not found.")
+        sys.exit(1)
+    except json.JSONDecodeError as e:
+        print(f"Error: Invalid JSON in template file: {e}")
+        sys.exit(1)
+
+    if args.paths:
+        sizes = [(f"{args.paths}p", args.paths, args.components or args.paths)]
+    else:
+        sizes = [(f"x{scale:g}", max(1, round(shape["paths"] * scale)),
+                  max(1, round(shape["components"] * scale))) for scale in args.scales]
+
+    results: Dict[str, Any] = {
+        "version": RESULTS_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "template": args.template,
+        "parameters": {"fanout": args.fanout, "depth": args.depth, "cycles": args.cycles,
+                       "seed": args.seed, "repeat": args.repeat, "sample": args.sample},
+        "scenarios": {},
+    }
+    work_dir = Path(tempfile.mkdtemp(prefix="api_explorer_bench."))
+    try:
+        for scenario, paths, components in sizes:
+            spec = generate_spec(shape, paths, components, fanout=args.fanout, depth=args.depth,
+                                 cycles=args.cycles, seed=args.seed)
+            spec_file = work_dir / f"synthetic_{scenario}.json"
+            spec_file.write_text(json.dumps(spec, indent=2), encoding="utf-8")
+            if args.keep_specs:
+                Path(args.keep_specs).mkdir(parents=True, exist_ok=True)
+                shutil.copy(spec_file, Path(args.keep_specs) / spec_file.name)
+            print(f"{scenario}: {paths} paths, {components} components, "
+                  f"{spec_file.stat().st_size / 1e6:.1f} MB", file=sys.stderr)
+            scenario_results = run_suite(spec_file, repeat=args.repeat, sample=args.sample,
+                                         seed=args.seed, only=args.only)
+            results["scenarios"][scenario] = {
+                "paths": paths,
+                "components": components,
+                "bytes": spec_file.stat().st_size,
+                "results": scenario_results,
+            }
+            for name, result in scenario_results.items():
+                print(f"  {name:<14} {result['median_s'] * 1000:>10.2f} ms  "
+                      f"{result['peak_kib']:>10.0f} KiB peak", file=sys.stderr)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    text = json.dumps(results, indent=2) + "\n"
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+    else:
+        print(text, end="")
+
+    if args.baseline:
+        try:
+            baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            print(f"Error: Cannot read baseline: {e}")
+            sys.exit(1)
+        lines, regressions = compare_results(baseline, results, args.threshold)
+        print("\n".join(lines), file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
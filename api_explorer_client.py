@@ -0,0 +1,81 @@
+"""
+API Explorer Client - Thin client for a running daemon
+Forwards a command line to the daemon started with --serve and prints its
+answer. api_explorer.py imports it before anything else for --client, so it
+only uses sys, os, json and socket: no argparse, no typing and nothing from
+the explorer, which keeps a forwarded query within a few milliseconds of
+the interpreter's own startup.
+"""
+
+import json
+import os
+import socket
+import sys
+
+
+def default_socket_path(schema_file: str) -> str:
+    """Daemon socket path for a schema file, stable across invocations."""
+    # FNV-1a of the resolved path: hashlib alone would double the cost of
+    # a client call, and the digest only has to tell schema files apart.
+    digest = 0xcbf29ce484222325
+    for byte in os.path.realpath(schema_file).encode("utf-8"):
+        digest = ((digest ^ byte) * 0x100000001b3) & 0xFFFFFFFFFFFFFFFF
+    temp_dir = next((os.environ[name] for name in ("TMPDIR", "TEMP", "TMP") if os.environ.get(name)), "/tmp")
+    return os.path.join(temp_dir, f"api_explorer-{os.getuid()}-{digest:016x}.sock")
+
+
+def _option(argv: list, name: str, default=None):
+    """Return the last value of an option given as "--name value" or "--name=value"."""
+    value = default
+    for position, arg in enumerate(argv):
+        if arg == name and position + 1 < len(argv):
+            value = argv[position + 1]
+        elif arg.startswith(name + "="):
+            value = arg[len(name) + 1:]
+    return value
+
+
+def forward_to_daemon(argv: list):
+    """
+    Forward CLI arguments to a running daemon and print its answer.
+
+    Only --schema-file, --socket and --port are read here; the daemon
+    parses the whole command line itself.
+
+    Args:
+        argv: Raw arguments to forward
+
+    Returns:
+        Exit status, or None if no daemon answered and the command should
+        run locally instead
+    """
+    schema_file = _option(argv, "--schema-file", "api_schema.json")
+    port = _option(argv, "--port")
+    request = {"argv": argv, "schema_file": os.path.realpath(schema_file)}
+    payload = json.dumps(request, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    try:
+        if port is not None:
+            port = int(port)
+            with socket.create_connection(("127.0.0.1", port), timeout=30) as conn:
+                conn.sendall(
+                    f"POST /cli HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+                    f"Connection: close\r\n\r\n".encode("latin-1") + payload
+                )
+                raw = b"".join(iter(lambda: conn.recv(1 << 16), b""))
+            response = json.loads(raw.partition(b"\r\n\r\n")[2])
+        else:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+                conn.settimeout(30)
+                conn.connect(_option(argv, "--socket") or default_socket_path(schema_file))
+                conn.sendall(payload + b"\n")
+                with conn.makefile("rb") as reader:
+                    response = json.loads(reader.readline())
+    except (OSError, ValueError):
+        return None
+
+    if "error" in response:
+        print(f"Error: {response['error']}", file=sys.stderr)
+        return 1
+    sys.stdout.write(response["output"])
+    return response.get("status", 0)
@@ -0,0 +1,4321 @@
+"""
+API Explorer Core - Schema loading, indexes, queries and the command line
+The APIExplorer class and everything a query needs. Validation, the payload
+audit, Dart generation, log analysis, the daemon and the mock server live in
+their own api_explorer_* modules, imported only by the features using them.
+"""
+
+import json
+import sys
+import os
+import argparse
+import bisect
+import fnmatch
+import hashlib
+import io
+import math
+import re
+import time
+from collections import OrderedDict, deque
+from collections.abc import Mapping
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, Any, List, Optional, Set, Tuple
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+
+# Bump whenever the layout of the cached document or of any derived index
+# changes, so stale caches written by older versions are ignored.
+CACHE_VERSION = 10
+CACHE_SUFFIX = ".cache"
+LAZY_CACHE_SUFFIX = ".lazy.cache"
+
+# Containers whose entries get byte offsets in lazy mode, as key paths from
+# the document root. Entries of "paths" and "components/schemas" are parsed
+# one at a time; the others are small and parsed on first access.
+LAZY_SECTIONS = {(), ("components",), ("paths",), ("components", "schemas")}
+
+# Keys of an OpenAPI path item that describe operations.
+HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch", "trace")
+
+# Searchable fields with their ranking weight, and the aliases accepted in
+# "field:term" query filters.
+SEARCH_FIELDS = ("path", "operation", "tag", "param", "description", "property")
+SEARCH_FIELD_WEIGHTS = (3.0, 2.5, 2.0, 1.5, 1.0, 0.5)
+SEARCH_FIELD_ALIASES = {
+    "path": "path",
+    "op": "operation",
+    "operation": "operation",
+    "operationid": "operation",
+    "tag": "tag",
+    "param": "param",
+    "parameter": "param",
+    "desc": "description",
+    "description": "description",
+    "prop": "property",
+    "property": "property",
+}
+# Upper bound on vocabulary tokens a prefix or fuzzy term may expand to,
+# which keeps query cost independent of the spec size.
+SEARCH_MAX_EXPANSIONS = 64
+
+# Columns --rank-by can order the --analyze-log report by.
+LOG_RANK_KEYS = ("count", "total-time", "p50", "p95", "p99", "bytes", "errors")
+
+# Patterns for typed path parameters, tried from most to least specific.
+PATH_PARAM_PATTERNS = {
+    "integer": r"-?\d+",
+    "uuid": r"[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}",
+    "number": r"-?\d+(?:\.\d+)?",
+    "boolean": r"true|false",
+    "date": r"\d{4}-\d{2}-\d{2}",
+    "string": r"[^/]+",
+}
+_PATH_PARAM_CONVERTERS = {
+    "integer": int,
+    "number": float,
+    "boolean": lambda value: value == "true",
+}
+_PATH_PARAM_RE = re.compile(r"\{([^{}/]+)\}")
+
+_TOKEN_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+_IDENTIFIER_RE = re.compile(r"[A-Za-z0-9_\-.]+")
+
+
+def _tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens, breaking camelCase and snake_case."""
+    return [token.lower() for token in _TOKEN_RE.findall(text)]
+
+
+def _tokenize_identifier(name: str) -> List[str]:
+    """Tokenize an identifier, keeping the whole lowercased name as a token too."""
+    tokens = _tokenize(name)
+    whole = name.lower()
+    if _IDENTIFIER_RE.fullmatch(name) and whole not in tokens:
+        tokens.append(whole)
+    return tokens
+
+
+def _deletes(token: str) -> Set[str]:
+    """Return the token and every variant with one character deleted."""
+    return {token} | {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Damerau-Levenshtein distance between two strings, capped at limit + 1.
+    
+    Args:
+        a: First string
+        b: Second string
+        limit: Largest distance the caller cares about
+        
+    Returns:
+        Edit distance, or limit + 1 if it exceeds the limit
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous_row = None
+    row = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(row[j] + 1, current[j - 1] + 1, row[j - 1] + cost)
+            if (previous_row is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                current[j] = min(current[j], previous_row[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous_row, row = row, current
+    return min(row[-1], limit + 1)
+
+
+_JSON_STRING_RE = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"')
+_JSON_SCALAR_RE = re.compile(rb'[^,}\]\s]+')
+_JSON_SPACE_RE = re.compile(rb'[ \t\r\n]*')
+# Everything up to the next bracket that is not inside a string.
+_JSON_SKIP_RE = re.compile(rb'(?:[^"{}\[\]]+|"[^"\\]*(?:\\.[^"\\]*)*")*')
+
+
+def _scan_json_offsets(buffer) -> Dict[Tuple[str, ...], Dict[str, Tuple[int, int]]]:
+    """
+    Record the byte range of every entry in the LAZY_SECTIONS objects.
+    
+    Makes a single pass over the raw document without building any values.
+    Inside the recorded sections keys are read one by one; every other value
+    is skipped bracket to bracket with a regex that steps over strings, so
+    the Python loop runs once per nested container, not per token.
+    
+    Args:
+        buffer: Bytes-like view of the JSON document (e.g. an mmap)
+        
+    Returns:
+        Mapping of section key path to {entry key: (start, end)}
+    """
+    sections: Dict[Tuple[str, ...], Dict[str, Tuple[int, int]]] = {}
+    size = len(buffer)
+    
+    def fail(message: str, position: int):
+        raise json.JSONDecodeError(f"{message} at byte {position}", "", 0)
+    
+    def skip_space(position: int) -> int:
+        return _JSON_SPACE_RE.match(buffer, position).end()
+    
+    def skip_value(position: int) -> int:
+        first = buffer[position:position + 1]
+        if first == b'"':
+            match = _JSON_STRING_RE.match(buffer, position)
+            if match is None:
+                fail("Unterminated string", position)
+            return match.end()
+        if first not in (b"{", b"["):
+            match = _JSON_SCALAR_RE.match(buffer, position)
+            if match is None:
+                fail("Expecting value", position)
+            return match.end()
+        depth = 0
+        while True:
+            position = _JSON_SKIP_RE.match(buffer, position).end()
+            if position >= size:
+                fail("Unterminated container", position)
+            char = buffer[position]
+            if char in (0x7B, 0x5B):  # '{' or '['
+                depth += 1
+            elif char in (0x7D, 0x5D):  # '}' or ']'
+                depth -= 1
+                if depth == 0:
+                    return position + 1
+            else:
+                fail("Unterminated string", position)
+            position += 1
+    
+    def scan_object(position: int, key_path: Tuple[str, ...]) -> int:
+        offsets = sections.setdefault(key_path, {})
+        position = skip_space(position + 1)
+        if buffer[position:position + 1] == b"}":
+            return position + 1
+        while True:
+            match = _JSON_STRING_RE.match(buffer, position)
+            if match is None:
+                fail("Expecting property name", position)
+            key = json.loads(match.group())
+            position = skip_space(match.end())
+            if buffer[position:position + 1] != b":":
+                fail("Expecting ':' delimiter", position)
+            start = skip_space(position + 1)
+            child_path = key_path + (key,)
+            if child_path in LAZY_SECTIONS and buffer[start:start + 1] == b"{":
+                end = scan_object(start, child_path)
+            else:
+                end = skip_value(start)
+            offsets[key] = (start, end)
+            position = skip_space(end)
+            delimiter = buffer[position:position + 1]
+            if delimiter == b"}":
+                return position + 1
+            if delimiter != b",":
+                fail("Expecting ',' delimiter", position)
+            position = skip_space(position + 1)
+    
+    position = skip_space(0)
+    if buffer[position:position + 1] != b"{":
+        fail("Expecting object", position)
+    scan_object(position, ())
+    return sections
+
+
+# Marks an absent entry where None is a legitimate (JSON null) value.
+_MISSING = object()
+
+
+class _LazyMapping(Mapping):
+    """
+    Read-only mapping over one object of a memory-mapped JSON document.
+    
+    Entries are parsed from their recorded byte range on access and kept in
+    a bounded LRU, so memory follows the set of entries a query touches.
+    Entries that are themselves recorded sections are returned as nested
+    lazy mappings. Lookups are safe from several threads (the daemon
+    answers queries in a thread pool); only the LRU bookkeeping is
+    locked, not the parsing.
+    """
+    
+    def __init__(self, buffer, sections: Dict[Tuple[str, ...], Dict[str, Tuple[int, int]]],
+                 key_path: Tuple[str, ...] = (), cache_size: int = 256):
+        self._buffer = buffer
+        self._sections = sections
+        self._key_path = key_path
+        self._offsets = sections.get(key_path, {})
+        self._cache_size = cache_size
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._children: Dict[str, "_LazyMapping"] = {}
+        self._parsed = 0
+        import threading
+        self._lock = threading.Lock()
+    
+    def __getitem__(self, key: str) -> Any:
+        child = self._children.get(key)
+        if child is not None:
+            return child
+        child_path = self._key_path + (key,)
+        if child_path in self._sections:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._children[key] = _LazyMapping(
+                        self._buffer, self._sections, child_path, self._cache_size
+                    )
+            return child
+        
+        with self._lock:
+            # A sentinel, not None: JSON null entries are cached too.
+            value = self._cache.get(key, _MISSING)
+            if value is not _MISSING:
+                self._cache.move_to_end(key)
+                return value
+        start, end = self._offsets[key]
+        value = json.loads(self._buffer[start:end])
+        with self._lock:
+            self._parsed += 1
+            self._cache[key] = value
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return value
+    
+    def __contains__(self, key: object) -> bool:
+        return key in self._offsets
+    
+    def parsed_count(self) -> int:
+        """Number of entries parsed so far, including nested sections."""
+        return self._parsed + sum(child.parsed_count() for child in list(self._children.values()))
+    
+    def __iter__(self):
+        return iter(self._offsets)
+    
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+
+class _StreamedObject:
+    """JSON object whose (key, value) pairs are produced while encoding."""
+    
+    def __init__(self, pairs):
+        self.pairs = pairs
+
+
+class _Deferred:
+    """JSON value computed only when the encoder reaches it."""
+    
+    def __init__(self, compute):
+        self.compute = compute
+
+
+_END = object()
+
+
+def _encode_scalar(value: Any) -> str:
+    """Encode a JSON scalar the way json.dumps(ensure_ascii=False) does."""
+    if isinstance(value, str):
+        return _encode_json_string(value)
+    if value is None:
+        return "null"
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if isinstance(value, int):
+        return int.__repr__(value)
+    return json.dumps(value)
+
+
+_encode_json_string = json.encoder.encode_basestring
+
+
+def _iter_json(obj: Any, indent: int = 2):
+    """
+    Iteratively encode obj as indented JSON, yielding text chunks.
+    
+    The output matches json.dumps(obj, indent=indent, ensure_ascii=False),
+    but values are consumed as they are written: _StreamedObject pairs and
+    _Deferred values are only produced when the encoder reaches them, and an
+    explicit stack replaces recursion.
+    
+    Args:
+        obj: Value to encode
+        indent: Spaces per nesting level
+        
+    Yields:
+        Chunks of JSON text
+    """
+    # Each frame is (items iterator, is_object).
+    stack: List[Tuple[Any, bool]] = []
+    pending = obj
+    while True:
+        while isinstance(pending, _Deferred):
+            pending = pending.compute()
+        
+        if isinstance(pending, (dict, _StreamedObject)):
+            items = iter(pending.items() if isinstance(pending, dict) else pending.pairs)
+            first = next(items, _END)
+            if first is _END:
+                yield "{}"
+            else:
+                stack.append((items, True))
+                key, pending = first
+                yield "{\n" + " " * (indent * len(stack)) + _encode_json_string(str(key)) + ": "
+                continue
+        elif isinstance(pending, (list, tuple)):
+            items = iter(pending)
+            first = next(items, _END)
+            if first is _END:
+                yield "[]"
+            else:
+                stack.append((items, False))
+                pending = first
+                yield "[\n" + " " * (indent * len(stack))
+                continue
+        else:
+            yield _encode_scalar(pending)
+        
+        # The value is complete; move on to the next sibling or close parents.
+        while stack:
+            items, is_object = stack[-1]
+            item = next(items, _END)
+            if item is _END:
+                stack.pop()
+                yield "\n" + " " * (indent * len(stack)) + ("}" if is_object else "]")
+                continue
+            if is_object:
+                key, pending = item
+                yield ",\n" + " " * (indent * len(stack)) + _encode_json_string(str(key)) + ": "
+            else:
+                pending = item
+                yield ",\n" + " " * (indent * len(stack))
+            break
+        else:
+            return
+
+
+# Bump when the layout of exported endpoint files changes, so --export-all
+# rewrites files produced by an older version.
+EXPORT_FORMAT_VERSION = 1
+EXPORT_MANIFEST = "manifest.json"
+_EXPORT_NAME_RE = re.compile(r"[^A-Za-z0-9_.{}-]+")
+
+
+def _content_hash(obj: Any) -> str:
+    """SHA-256 of the canonical (sorted, compact) JSON form of obj."""
+    canonical = json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _merkle_tree(obj: Any) -> Tuple[str, Any]:
+    """
+    Hash a JSON value bottom-up, keeping the hash of every subtree.
+    
+    A container's digest is derived from its keys and its children's
+    digests rather than their text, so the whole tree is hashed in one
+    linear pass.
+    
+    Returns:
+        (digest, children) where children is a dict (for objects) or list
+        (for arrays) of the members' own (digest, children) pairs, and None
+        for scalars
+    """
+    if isinstance(obj, dict):
+        children = {key: _merkle_tree(value) for key, value in obj.items()}
+        text = "{" + ",".join(
+            json.dumps(key, ensure_ascii=False) + ":" + children[key][0] for key in sorted(children)
+        ) + "}"
+    elif isinstance(obj, list):
+        children = [_merkle_tree(value) for value in obj]
+        text = "[" + ",".join(child[0] for child in children) + "]"
+    else:
+        return hashlib.sha256(json.dumps(obj).encode("utf-8")).hexdigest(), None
+    return hashlib.sha256(text.encode("utf-8")).hexdigest(), children
+
+
+def _diff_pointers(old: Any, new: Any, limit: int = 200) -> List[Dict[str, str]]:
+    """
+    List the JSON pointers at which two values differ.
+    
+    Both values are Merkle-hashed once; subtrees with equal digests are
+    skipped without being descended into.
+    
+    Args:
+        old: Previous value
+        new: Current value
+        limit: Maximum number of changes to report
+        
+    Returns:
+        List of {"pointer", "change"} entries, change being added, removed
+        or modified
+    """
+    changes: List[Dict[str, str]] = []
+    stack = [("", _merkle_tree(old), _merkle_tree(new))]
+    while stack and len(changes) < limit:
+        pointer, (old_digest, old_children), (new_digest, new_children) = stack.pop()
+        if old_digest == new_digest:
+            continue
+        if old_children is None or type(old_children) is not type(new_children):
+            changes.append({"pointer": pointer, "change": "modified"})
+            continue
+        if isinstance(old_children, dict):
+            keys = list(old_children) + [key for key in new_children if key not in old_children]
+        else:
+            keys = range(max(len(old_children), len(new_children)))
+        nested = []
+        for key in keys:
+            child = f"{pointer}/{str(key).replace('~', '~0').replace('/', '~1')}"
+            in_old = key in old_children if isinstance(old_children, dict) else key < len(old_children)
+            in_new = key in new_children if isinstance(new_children, dict) else key < len(new_children)
+            if not in_new:
+                changes.append({"pointer": child, "change": "removed"})
+            elif not in_old:
+                changes.append({"pointer": child, "change": "added"})
+            else:
+                nested.append((child, old_children[key], new_children[key]))
+        stack.extend(reversed(nested))
+    return changes[:limit]
+
+
+def _write_if_changed(path: Path, text: str) -> Tuple[bool, str]:
+    """
+    Atomically write text to path unless the file already holds it.
+    
+    Returns:
+        (whether the file was written, SHA-256 of the content)
+    """
+    data = text.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()
+    try:
+        if path.stat().st_size == len(data) and hashlib.sha256(path.read_bytes()).hexdigest() == digest:
+            return False, digest
+    except OSError:
+        pass
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+    return True, digest
+
+
+def _sync_output_dir(out_dir: str, manifest_name: str, section: str,
+                     entries: Dict[str, Dict[str, Any]],
+                     write: Callable[[Path, List[str]], Any],
+                     header: Dict[str, Any],
+                     keep: Optional[Callable[[str, Dict[str, Any]], bool]] = None) -> Dict[str, Any]:
+    """
+    Bring a directory of generated files in line with a set of entries.
+    
+    The manifest in the directory records, per key, the file name, the
+    inputs it was generated from and the SHA-256 of its content. A key
+    whose entry equals the recorded one and whose file still has the
+    recorded content is left alone; the others are handed to write.
+    Files of recorded keys that are no longer wanted are removed.
+    
+    Args:
+        out_dir: Output directory (created if missing)
+        manifest_name: File name of the manifest inside out_dir
+        section: Manifest key holding the entries
+        entries: Wanted {"file": name, ...inputs} per key
+        write: Called with the directory and the keys to (re)generate;
+            returns (key, whether the file was written, SHA-256) triples
+        header: Other manifest fields (schema file, format, options)
+        keep: Decides whether a recorded key missing from entries stays
+            (partial runs); kept entries are merged in key order
+            
+    Returns:
+        Dictionary with the output directory, the number of entries, and
+        the counts of generated, written, unchanged and removed files
+    """
+    out_path = Path(out_dir)
+    out_path.mkdir(parents=True, exist_ok=True)
+    manifest_path = out_path / manifest_name
+    try:
+        previous = json.loads(manifest_path.read_text(encoding="utf-8")).get(section, {})
+        if not isinstance(previous, dict):
+            previous = {}
+    except (OSError, ValueError, AttributeError):
+        previous = {}
+    
+    stale = []
+    for key, entry in entries.items():
+        old = previous.get(key)
+        if isinstance(old, dict) and all(old.get(name) == value for name, value in entry.items()):
+            try:
+                data = (out_path / entry["file"]).read_bytes()
+                if hashlib.sha256(data).hexdigest() == old.get("sha256"):
+                    entry["sha256"] = old["sha256"]
+                    continue
+            except OSError:
+                pass
+        stale.append(key)
+    
+    written = 0
+    if stale:
+        for key, changed, digest in write(out_path, stale):
+            entries[key]["sha256"] = digest
+            written += changed
+    
+    kept = {
+        key: old for key, old in previous.items()
+        if key not in entries and keep is not None and isinstance(old, dict) and keep(key, old)
+    }
+    current_files = {entry["file"] for entry in entries.values()}
+    current_files.update(entry.get("file") for entry in kept.values())
+    removed = 0
+    for key, old in previous.items():
+        old_file = old.get("file") if isinstance(old, dict) else None
+        # Only ever delete plain file names that a previous run produced.
+        if (key not in entries and key not in kept and isinstance(old_file, str)
+                and old_file not in current_files and Path(old_file).name == old_file):
+            try:
+                (out_path / old_file).unlink()
+                removed += 1
+            except OSError:
+                pass
+    
+    recorded = dict(sorted({**kept, **entries}.items())) if kept else entries
+    _write_if_changed(manifest_path, json.dumps(
+        {**header, section: recorded}, indent=2, ensure_ascii=False
+    ) + "\n")
+    return {
+        "out_dir": str(out_path),
+        "total": len(entries),
+        "generated": len(stale),
+        "written": written,
+        "unchanged": len(entries) - written,
+        "removed": removed,
+    }
+
+
+# Characters of JSON text buffered before each write to the output stream.
+STREAM_CHUNK_SIZE = 1 << 16
+
+# Shared no-op context used for phases when profiling is off.
+_NO_PHASE = nullcontext()
+
+
+class ExplorerProfile:
+    """
+    Phase timings and counters collected while an explorer works.
+    
+    Pass one to APIExplorer(profile=...) to record where a run spends its
+    time; explorers without one skip all bookkeeping. Phases nest (a query
+    includes the resolution it triggers), so their times are inclusive.
+    """
+    
+    def __init__(self, trace_memory: bool = True):
+        """
+        Start collecting.
+        
+        Args:
+            trace_memory: Trace allocations with tracemalloc to report the
+                peak (slows allocation-heavy work down noticeably)
+        """
+        self.phases: Dict[str, List[float]] = {}
+        self.counters: Dict[str, int] = {}
+        self._started = time.perf_counter()
+        self._tracemalloc = None
+        if trace_memory:
+            # Imported here so normal runs do not pay for it.
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._tracemalloc = tracemalloc
+    
+    @contextmanager
+    def phase(self, name: str):
+        """Add the wall time spent inside the block to a phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = self.phases.get(name)
+            if entry is None:
+                entry = self.phases[name] = [0.0, 0]
+            entry[0] += time.perf_counter() - start
+            entry[1] += 1
+    
+    def count(self, name: str, amount: int = 1):
+        """Add to a counter."""
+        self.counters[name] = self.counters.get(name, 0) + amount
+    
+    def report(self) -> Dict[str, Any]:
+        """
+        Summarize what was collected so far.
+        
+        Returns:
+            Dictionary with the total wall time, every phase's seconds and
+            calls, the counters and the tracemalloc peak (None when memory
+            was not traced)
+        """
+        peak = None
+        if self._tracemalloc is not None and self._tracemalloc.is_tracing():
+            peak = round(self._tracemalloc.get_traced_memory()[1] / 1024, 1)
+        return {
+            "total_s": round(time.perf_counter() - self._started, 6),
+            "phases": {
+                name: {"seconds": round(seconds, 6), "calls": calls}
+                for name, (seconds, calls) in sorted(self.phases.items())
+            },
+            "counters": dict(sorted(self.counters.items())),
+            "tracemalloc_peak_kib": peak,
+        }
+    
+    def stop(self):
+        """Stop the allocation tracing this profile started."""
+        if self._tracemalloc is not None and self._tracemalloc.is_tracing():
+            self._tracemalloc.stop()
+
+
+def _compact_json(obj: Any) -> Any:
+    """
+    Intern the strings of a parsed JSON document and share equal subtrees.
+    
+    Specs repeat the same keys, type names, formats, refs and small schemas
+    thousands of times; afterwards every distinct string and every distinct
+    subtree exists once. The result must be treated as read-only, which
+    everything in this module already does. Pickle preserves the sharing,
+    so the cache shrinks (and loads faster) as well.
+    
+    Args:
+        obj: Value returned by json.loads
+        
+    Returns:
+        An equal value with shared strings and subtrees
+    """
+    strings: Dict[str, str] = {}
+    nodes: Dict[tuple, Any] = {}
+    # Children are compacted first, so equal children are the same object
+    # and a container's signature can use their ids.
+    shared_types = (str, dict, list)
+    
+    def compact(node: Any) -> Any:
+        cls = node.__class__
+        if cls is str:
+            return strings.setdefault(node, node)
+        if cls is dict:
+            result = {}
+            signature: List[Any] = [0]
+            for key, value in node.items():
+                key = strings.setdefault(key, key)
+                value = result[key] = compact(value)
+                signature.append(key)
+                signature.append(id(value) if value.__class__ in shared_types else (value.__class__, value))
+            return nodes.setdefault(tuple(signature), result)
+        if cls is list:
+            result = [compact(item) for item in node]
+            signature = tuple(
+                id(item) if item.__class__ in shared_types else (item.__class__, item)
+                for item in result
+            )
+            return nodes.setdefault((1,) + signature, result)
+        return node
+    
+    return compact(obj)
+
+
+class Component:
+    """A components/schemas entry; refs holds the ids of the components it references."""
+    
+    __slots__ = ("id", "name", "definition", "refs")
+    
+    def __init__(self, id: int, name: str, definition: Optional[Dict[str, Any]], refs: Tuple[int, ...]):
+        self.id = id
+        self.name = name
+        self.definition = definition
+        self.refs = refs
+
+
+class Parameter:
+    """An operation parameter."""
+    
+    __slots__ = ("name", "location", "required", "description", "schema", "refs")
+    
+    def __init__(self, name: str, location: str, required: bool, description: str,
+                 schema: Dict[str, Any], refs: Tuple[int, ...]):
+        self.name = name
+        self.location = location
+        self.required = required
+        self.description = description
+        self.schema = schema
+        self.refs = refs
+
+
+class Response:
+    """A response of an operation; content holds (media type, schema) pairs."""
+    
+    __slots__ = ("status", "description", "content", "refs")
+    
+    def __init__(self, status: str, description: str,
+                 content: Tuple[Tuple[str, Dict[str, Any]], ...], refs: Tuple[int, ...]):
+        self.status = status
+        self.description = description
+        self.content = content
+        self.refs = refs
+
+
+class Operation:
+    """
+    One method of a path.
+    
+    request_content holds (media type, schema) pairs and is None when the
+    operation has no request body; request_refs holds the ids of the
+    components the request body references directly, and refs those of
+    every component the parameters, request body and responses do.
+    """
+    
+    __slots__ = ("path", "method", "operation_id", "description", "tags", "security",
+                 "parameters", "request_required", "request_content", "request_refs", "responses",
+                 "refs", "definition")
+    
+    def __init__(self, path: str, method: str, definition: Dict[str, Any]):
+        self.path = path
+        self.method = method
+        self.definition = definition
+        self.operation_id = definition.get("operationId", "")
+        self.description = definition.get("description", "")
+        self.tags = definition.get("tags", [])
+        self.security = definition.get("security", [])
+        self.parameters: Tuple[Parameter, ...] = ()
+        self.request_required = False
+        self.request_content: Optional[Tuple[Tuple[str, Dict[str, Any]], ...]] = None
+        self.request_refs: Tuple[int, ...] = ()
+        self.responses: Tuple[Response, ...] = ()
+        self.refs: Tuple[int, ...] = ()
+
+
+class PathItem:
+    """A path and its operations, in document order."""
+    
+    __slots__ = ("path", "operations", "definition")
+    
+    def __init__(self, path: str, operations: Tuple[Operation, ...], definition: Dict[str, Any]):
+        self.path = path
+        self.operations = operations
+        self.definition = definition
+
+
+class SchemaModel:
+    """
+    Compiled, slot-based view of a spec.
+    
+    Components get integer ids (refs to undefined components get ids past
+    the defined ones, with no definition) and every ref is stored as such
+    an id. Paths and components are compiled the first time they are asked
+    for, so a lazily loaded spec is still only parsed where it is used.
+    """
+    
+    __slots__ = ("names", "ids", "_explorer", "_components", "_paths")
+    
+    def __init__(self, explorer: "APIExplorer"):
+        self._explorer = explorer
+        self.names: List[str] = list(explorer.schemas)
+        self.ids: Dict[str, int] = {name: index for index, name in enumerate(self.names)}
+        self._components: Dict[int, Component] = {}
+        self._paths: Dict[str, Optional[PathItem]] = {}
+    
+    def component_id(self, name: str) -> int:
+        """Return the id of a component name, assigning one to undefined names."""
+        component_id = self.ids.get(name)
+        if component_id is None:
+            component_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return component_id
+    
+    def ref_ids(self, obj: Any) -> Tuple[int, ...]:
+        """Return the sorted ids of the components obj references directly."""
+        return tuple(sorted(self.component_id(name) for name in self._explorer._collect_direct_refs(obj)))
+    
+    def component(self, key: Any) -> Component:
+        """Return a component by id or name."""
+        component_id = key if isinstance(key, int) else self.component_id(key)
+        component = self._components.get(component_id)
+        if component is None:
+            name = self.names[component_id]
+            definition = self._explorer.schemas.get(name)
+            component = self._components[component_id] = Component(
+                component_id, name, definition, self.ref_ids(definition) if definition else ()
+            )
+        return component
+    
+    def path(self, endpoint: str) -> Optional[PathItem]:
+        """Return a compiled path, or None when the spec has no such path."""
+        if endpoint in self._paths:
+            return self._paths[endpoint]
+        path_item = self._explorer.schema.get("paths", {}).get(endpoint)
+        compiled = None
+        if isinstance(path_item, dict):
+            compiled = PathItem(endpoint, tuple(
+                self._compile_operation(endpoint, method, method_data)
+                for method, method_data in path_item.items()
+                if method in HTTP_METHODS and isinstance(method_data, dict)
+            ), path_item)
+        self._paths[endpoint] = compiled
+        return compiled
+    
+    def _compile_operation(self, endpoint: str, method: str, method_data: Dict[str, Any]) -> Operation:
+        """Compile one operation of a path."""
+        operation = Operation(endpoint, method, method_data)
+        refs: Set[int] = set()
+        parameters = []
+        for param in method_data.get("parameters", ()):
+            param_refs = self.ref_ids(param)
+            refs.update(param_refs)
+            parameters.append(Parameter(
+                param.get("name", ""), param.get("in", ""), param.get("required", False),
+                param.get("description", ""), param.get("schema", {}), param_refs,
+            ))
+        operation.parameters = tuple(parameters)
+        
+        request_body = method_data.get("requestBody")
+        if request_body is not None:
+            operation.request_required = request_body.get("required", False)
+            content = tuple(
+                (content_type, content_data.get("schema", {}))
+                for content_type, content_data in request_body.get("content", {}).items()
+            )
+            operation.request_content = content
+            operation.request_refs = tuple(sorted({ref for _, schema in content for ref in self.ref_ids(schema)}))
+            refs.update(operation.request_refs)
+        
+        responses = []
+        for status, response_data in method_data.get("responses", {}).items():
+            content = tuple(
+                (content_type, content_data.get("schema", {}))
+                for content_type, content_data in response_data.get("content", {}).items()
+            )
+            response_refs = tuple(sorted({ref for _, schema in content for ref in self.ref_ids(schema)}))
+            refs.update(response_refs)
+            responses.append(Response(status, response_data.get("description", ""), content, response_refs))
+        operation.responses = tuple(responses)
+        operation.refs = tuple(sorted(refs))
+        return operation
+
+
+class SchemaLoadError(Exception):
+    """The schema file is missing, unreadable or not valid JSON."""
+
+
+class APIExplorer:
+    # Derived indexes, keyed by name, mapped to the method that builds them
+    # from the loaded schema. Each is built on first use and persisted in
+    # the schema cache as its own pickle, restored only when used again.
+    _INDEX_BUILDERS: Dict[str, str] = {
+        "ref_graph": "_build_ref_graph",
+        "ref_sccs": "_build_ref_sccs",
+        "ref_closures": "_build_ref_closures",
+        "path_refs": "_build_path_refs",
+        "operations": "_build_operations",
+        "schema_usage": "_build_schema_usage",
+        "search_index": "_build_search_index",
+        "path_trie": "_build_path_trie",
+        "component_hashes": "_build_component_hashes",
+        "merkle_hashes": "_build_merkle_hashes",
+    }
+
+    def __init__(self, schema_file: str = "api_schema.json",
+                 use_cache: bool = True, rebuild_cache: bool = False,
+                 lazy: bool = False, lazy_cache_size: int = 256,
+                 profile: Optional[ExplorerProfile] = None,
+                 previous: Optional["APIExplorer"] = None):
+        """
+        Initialize the API Explorer with the schema file.
+        
+        Args:
+            schema_file: Path to the OpenAPI schema JSON file
+            use_cache: Read and write the pre-parsed cache next to the schema
+            rebuild_cache: Ignore any existing cache and write a fresh one
+            lazy: Memory-map the schema and parse paths and components only
+                when a query needs them, instead of loading the whole document
+            lazy_cache_size: Parsed entries kept per section in lazy mode
+            profile: Record phase timings and counters into this profile
+            previous: Explorer over an earlier version of the same file;
+                when the cache misses, indexes are updated from its indexes
+                instead of being built from scratch. A reload raises
+                SchemaLoadError instead of exiting, so the caller can keep
+                the previous version
+        """
+        self.profile = profile
+        self.schema_file = Path(schema_file)
+        self.lazy = lazy
+        self.lazy_cache_size = lazy_cache_size
+        suffix = LAZY_CACHE_SUFFIX if lazy else CACHE_SUFFIX
+        self.cache_file = self.schema_file.with_name(self.schema_file.name + suffix)
+        self.use_cache = use_cache
+        self.rebuild_cache = rebuild_cache
+        self._indexes: Dict[str, Any] = {}
+        self._index_blobs: Dict[str, bytes] = {}
+        self._cache_batches = 0
+        self._cache_stale = False
+        self._cache_key: Optional[Dict[str, Any]] = None
+        self._cache_hit = False
+        self._buffer: Optional["mmap.mmap"] = None
+        self._lazy_refs: Dict[str, frozenset] = {}
+        self._segment_matchers: Dict[str, Any] = {}
+        self._resolved_refs: Dict[Tuple[str, frozenset, Optional[int]], Tuple[Any, int]] = {}
+        self._model: Optional[SchemaModel] = None
+        self._validators: Dict[str, "ValidatorCompiler"] = {}
+        self._operation_validators: Dict[Tuple[str, str], Any] = {}
+        self._payload_costs: Dict[str, "PayloadCost"] = {}
+        self._index_updates: Dict[str, Dict[str, int]] = {}
+        with self._phase("load"), self._cache_batch():
+            try:
+                self.schema = self._load_schema()
+            except SchemaLoadError as e:
+                if previous is not None:
+                    raise
+                print(f"Error: {e}")
+                sys.exit(1)
+            self.components = self.schema.get("components", {})
+            self.schemas = self.components.get("schemas", {})
+            if previous is not None and not self.lazy and not previous.lazy and not self._index_blobs:
+                with self._phase("load.update_indexes"):
+                    self._index_updates = self._update_indexes(previous)
+            # Other indexes are built when a query first asks for them.
+            self._cache_stale = self.use_cache and (bool(self._index_updates) or not self._cache_hit)
+        if profile is not None:
+            profile.count("cache.hit" if self._cache_hit else "cache.miss")
+    
+    @property
+    def model(self) -> SchemaModel:
+        """The compiled, slot-based view of the spec (built on first use)."""
+        if self._model is None:
+            self._model = SchemaModel(self)
+        return self._model
+    
+    def _phase(self, name: str):
+        """Time a phase into the profile, or do nothing when not profiling."""
+        return self.profile.phase(name) if self.profile is not None else _NO_PHASE
+    
+    @contextmanager
+    def _cache_batch(self):
+        """
+        Write the cache once when the outermost batch ends, if it is stale.
+        
+        Loading and building an index (with the indexes it depends on)
+        are batches, so a cold query writes the cache once, with the
+        document and every index it built.
+        """
+        self._cache_batches += 1
+        try:
+            yield
+        finally:
+            self._cache_batches -= 1
+            if not self._cache_batches and self._cache_stale:
+                self._cache_stale = False
+                with self._phase("write_cache"):
+                    self._write_cache()
+    
+    def profile_report(self) -> Optional[Dict[str, Any]]:
+        """
+        Return the profile report with the explorer's own statistics added.
+        
+        Returns:
+            ExplorerProfile.report() plus memo, index and lazy-parsing
+            statistics, or None when the explorer is not profiling
+        """
+        if self.profile is None:
+            return None
+        report = self.profile.report()
+        report["schema_file"] = str(self.schema_file)
+        report["stats"] = {
+            "indexes_built": sorted(self._indexes),
+            "resolved_memo_entries": len(self._resolved_refs),
+        }
+        if self.lazy:
+            report["stats"]["lazy_entries_parsed"] = self.schema.parsed_count()
+        return report
+    
+    def clear_memos(self):
+        """
+        Forget everything memoized by queries, keeping the schema and indexes.
+        
+        Resolved $refs, compiled validators, payload costs and the other
+        per-query memos are rebuilt on next use, e.g. to time queries from
+        a cold memo in benchmarks.
+        """
+        self._resolved_refs.clear()
+        self._lazy_refs.clear()
+        self._segment_matchers.clear()
+        self._validators.clear()
+        self._operation_validators.clear()
+        self._payload_costs.clear()
+        self._model = None
+    
+    def _load_schema(self) -> Dict[str, Any]:
+        """
+        Load the OpenAPI schema from the cache or the JSON file.
+        
+        Raises:
+            SchemaLoadError: If the file is missing or not valid JSON
+        """
+        try:
+            stat = self.schema_file.stat()
+            self._cache_key = {
+                "version": CACHE_VERSION,
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": None,
+            }
+            check_cache = self.use_cache and not self.rebuild_cache
+            if check_cache:
+                with self._phase("load.read_cache"):
+                    cached = self._read_cache()
+                if cached is not None:
+                    return self._restore_cache(cached)
+            with self._phase("load.read_file"):
+                if self.lazy:
+                    raw = self._open_buffer()
+                else:
+                    raw = self.schema_file.read_bytes()
+                self._cache_key["sha256"] = hashlib.sha256(raw).hexdigest()
+            if check_cache:
+                # The file may only have been touched; fall back to the hash.
+                with self._phase("load.read_cache"):
+                    cached = self._read_cache()
+                if cached is not None:
+                    self._cache_hit = False
+                    return self._restore_cache(cached)
+            with self._phase("load.parse"):
+                if self.lazy:
+                    return _LazyMapping(raw, _scan_json_offsets(raw), cache_size=self.lazy_cache_size)
+                schema = json.loads(raw)
+            if not self.use_cache:
+                # Interning pays for itself in the cache, which every later
+                # load restores already compacted; an uncached load skips it.
+                return schema
+            with self._phase("load.compact"):
+                return _compact_json(schema)
+        except FileNotFoundError:
+            raise SchemaLoadError(f"Schema file '{self.schema_file}' not found.")
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise SchemaLoadError(f"Invalid JSON in schema file: {e}")
+        except ValueError as e:
+            # mmap refuses empty files
+            raise SchemaLoadError(f"Cannot map schema file '{self.schema_file}': {e}")
+    
+    def _open_buffer(self) -> "mmap.mmap":
+        """Memory-map the schema file for lazy reads."""
+        if self._buffer is None:
+            import mmap
+            with open(self.schema_file, "rb") as f:
+                self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._buffer
+    
+    def _restore_cache(self, payload: Dict[str, Any]) -> Any:
+        """Keep the pickled indexes of a cache payload and return the schema."""
+        self._index_blobs = payload.get("indexes", {})
+        if self.lazy:
+            return _LazyMapping(self._open_buffer(), payload["offsets"],
+                                cache_size=self.lazy_cache_size)
+        return payload["schema"]
+    
+    def _cache_payload(self) -> Dict[str, Any]:
+        """Return what the cache stores for the current loading mode."""
+        if self.lazy:
+            return {"offsets": self.schema._sections, "indexes": {}}
+        import pickle
+        for name, index in self._indexes.items():
+            if name not in self._index_blobs:
+                self._index_blobs[name] = pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL)
+        return {"schema": self.schema, "indexes": self._index_blobs}
+    
+    def _read_cache(self) -> Optional[Dict[str, Any]]:
+        """
+        Read the cache payload if it matches the current schema file.
+        
+        The cache holds two pickles: a small key checked first, then the
+        payload. A key matches when size and mtime agree, or, once the
+        schema has been hashed, when size and content hash agree.
+        
+        Returns:
+            Cached payload or None
+        """
+        import pickle
+        key = self._cache_key
+        try:
+            with open(self.cache_file, "rb") as f:
+                cached_key = pickle.load(f)
+                if (not isinstance(cached_key, dict)
+                        or cached_key.get("version") != key["version"]
+                        or cached_key.get("size") != key["size"]):
+                    return None
+                if key["sha256"] is None:
+                    if cached_key.get("mtime_ns") != key["mtime_ns"]:
+                        return None
+                elif cached_key.get("sha256") != key["sha256"]:
+                    return None
+                payload = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError,
+                ImportError, IndexError, TypeError, ValueError):
+            return None
+        
+        if key["sha256"] is None:
+            key["sha256"] = cached_key.get("sha256")
+        self._cache_hit = True
+        return payload
+    
+    def _write_cache(self):
+        """Atomically write the parsed schema and its indexes to the cache."""
+        key = self._cache_key
+        if key is None or key["sha256"] is None:
+            return
+        import pickle
+        import threading
+        tmp_file = self.cache_file.with_name(
+            f"{self.cache_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_file, "wb") as f:
+                pickle.dump(key, f, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(self._cache_payload(), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, self.cache_file)
+        except OSError:
+            # A read-only checkout just means we run without a cache.
+            try:
+                tmp_file.unlink()
+            except OSError:
+                pass
+    
+    def _build_indexes(self):
+        """Restore or build every registered index, writing the cache once."""
+        with self._cache_batch():
+            for name in self._INDEX_BUILDERS:
+                self._get_index(name)
+    
+    def _update_indexes(self, previous: "APIExplorer") -> Dict[str, Dict[str, int]]:
+        """
+        Derive the indexes of this version of the spec from a previous one's.
+        
+        Components and path items are compared with the previous version
+        by value. Entries of the ones that differ are recomputed, as are
+        the ref closures of everything that reaches a changed component
+        and the search documents of operations whose Merkle hash changed;
+        everything else is carried over. The path trie is kept when the
+        paths and their parameter types are unchanged, and extended when
+        paths were only appended. The previous explorer is not modified.
+        
+        Args:
+            previous: Explorer over the previous version; indexes it has not
+                used yet are restored or built first
+            
+        Returns:
+            Number of rebuilt and reused entries per index
+        """
+        previous._build_indexes()
+        old = previous._indexes
+        old_schemas = previous.schemas
+        old_paths = previous.schema.get("paths", {})
+        paths = self.schema.get("paths", {})
+        changed = {name for name, definition in self.schemas.items() if old_schemas.get(name) != definition}
+        removed = {name for name in old_schemas if name not in self.schemas}
+        changed_paths = {endpoint for endpoint, item in paths.items() if old_paths.get(endpoint) != item}
+        updates: Dict[str, Dict[str, int]] = {}
+        
+        def record(name: str, rebuilt: int, total: int):
+            updates[name] = {"rebuilt": rebuilt, "reused": total - rebuilt}
+        
+        with self._phase("index.component_hashes"):
+            own = old["component_hashes"]
+            self._indexes["component_hashes"] = {
+                name: _content_hash(definition) if name in changed else own[name]
+                for name, definition in self.schemas.items()
+            }
+        record("component_hashes", len(changed), len(self.schemas))
+        
+        with self._phase("index.ref_graph"):
+            old_graph = old["ref_graph"]
+            graph = self._indexes["ref_graph"] = {
+                name: sorted(self._collect_direct_refs(definition)) if name in changed else old_graph[name]
+                for name, definition in self.schemas.items()
+            }
+        record("ref_graph", len(changed), len(self.schemas))
+        
+        sccs = self._get_index("ref_sccs")
+        record("ref_sccs", len(sccs["members"]), len(sccs["members"]))
+        
+        # A closure can only change if the schema reaches an edited or
+        # removed one, through the edges of either version.
+        stale = self._ref_ancestors(changed | removed, (old_graph, graph))
+        with self._phase("index.ref_closures"):
+            self._indexes["ref_closures"] = self._build_ref_closures(old["ref_closures"], stale)
+        record("ref_closures", len(stale & self.schemas.keys()), len(self.schemas))
+        
+        with self._phase("index.path_refs"):
+            old_refs = old["path_refs"]
+            self._indexes["path_refs"] = {
+                endpoint: sorted(self._collect_direct_refs(item)) if endpoint in changed_paths else old_refs[endpoint]
+                for endpoint, item in paths.items()
+            }
+        record("path_refs", len(changed_paths), len(paths))
+        
+        operations = self._get_index("operations")
+        record("operations", len(operations), len(operations))
+        
+        with self._phase("index.path_trie"):
+            old_order = list(old_paths)
+            order = list(paths)
+            inserted = len(paths)
+            if (order[:len(old_order)] == old_order and all(
+                    self._path_param_kinds(paths[endpoint]) == self._path_param_kinds(old_paths[endpoint])
+                    for endpoint in changed_paths if endpoint in old_paths)):
+                # Only appended paths: add them to a copy-on-write trie.
+                old_root = old["path_trie"]["root"]
+                root = [dict(old_root[0]), list(old_root[1]), old_root[2], old_root[3]]
+                segments = dict(old["path_trie"]["segments"])
+                copied = {id(root)}
+                for ordinal in range(len(old_order), len(order)):
+                    endpoint = order[ordinal]
+                    self._insert_trie_path(root, segments, endpoint, ordinal,
+                                           self._path_param_kinds(paths[endpoint]), copied)
+                self._indexes["path_trie"] = {"root": root, "segments": segments}
+                inserted = len(order) - len(old_order)
+            else:
+                self._indexes["path_trie"] = self._build_path_trie()
+        record("path_trie", inserted, len(paths))
+        
+        with self._phase("index.merkle_hashes"):
+            old_operations = old["merkle_hashes"]["operations"]
+            self._indexes["merkle_hashes"] = self._build_merkle_hashes({
+                "components": old["merkle_hashes"]["components"],
+                "operations": {
+                    key: entry for key, entry in old_operations.items()
+                    if key.split(" ", 1)[1] not in changed_paths
+                },
+            }, stale)
+        new_operations = self._indexes["merkle_hashes"]["operations"]
+        unchanged = {
+            key for key, (_, deep_hash, _) in new_operations.items()
+            if key in old_operations and old_operations[key][1] == deep_hash
+        }
+        record("merkle_hashes", len(new_operations) - len(unchanged), len(new_operations))
+        
+        with self._phase("index.search_index"):
+            documents = self._search_documents(old["search_index"], old["operations"], unchanged)
+            self._indexes["search_index"] = self._build_search_index(documents)
+        record("search_index", len(operations) - len(unchanged), len(operations))
+        
+        usage = self._get_index("schema_usage")
+        record("schema_usage", len(usage), len(usage))
+        return updates
+    
+    @staticmethod
+    def _ref_ancestors(names: Set[str], graphs) -> Set[str]:
+        """Return the names plus every schema that reaches one of them in any of the graphs."""
+        parents: Dict[str, Set[str]] = {}
+        for graph in graphs:
+            for name, deps in graph.items():
+                for dep in deps:
+                    parents.setdefault(dep, set()).add(name)
+        found = set(names)
+        stack = list(names)
+        while stack:
+            for parent in parents.get(stack.pop(), ()):
+                if parent not in found:
+                    found.add(parent)
+                    stack.append(parent)
+        return found
+    
+    def _resolve_schema_ref(self, ref: str) -> Optional[Dict[str, Any]]:
+        """
+        Resolve a schema reference like '#/components/schemas/Client'.
+        
+        Args:
+            ref: Reference string
+            
+        Returns:
+            Resolved schema or None if not found
+        """
+        if not ref.startswith("#/components/schemas/"):
+            return None
+        
+        schema_name = ref.split("/")[-1]
+        return self.schemas.get(schema_name)
+    
+    def _collect_direct_refs(self, obj: Any) -> Set[str]:
+        """
+        Collect the schema names referenced directly by an object.
+        
+        Referenced components are not followed; use the ref graph for that.
+        
+        Args:
+            obj: Object to search for references
+            
+        Returns:
+            Set of directly referenced schema names
+        """
+        refs = set()
+        stack = [obj]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, dict):
+                ref = node.get("$ref")
+                if isinstance(ref, str):
+                    refs.add(ref.split("/")[-1])
+                else:
+                    stack.extend(node.values())
+            elif isinstance(node, list):
+                stack.extend(node)
+        return refs
+    
+    def _build_ref_graph(self) -> Dict[str, List[str]]:
+        """Build the direct $ref edges between components/schemas."""
+        return {
+            name: sorted(self._collect_direct_refs(schema_def))
+            for name, schema_def in self.schemas.items()
+        }
+    
+    def _build_ref_sccs(self) -> Dict[str, Any]:
+        """
+        Collapse the ref graph into strongly connected components.
+        
+        Uses an iterative Tarjan traversal, which emits components in
+        reverse topological order (dependencies before dependents).
+        
+        Returns:
+            Dictionary with the SCC member lists, the SCC id of every schema
+            and whether each SCC contains a cycle
+        """
+        graph = self._get_index("ref_graph")
+        index_of: Dict[str, int] = {}
+        lowlink: Dict[str, int] = {}
+        on_stack: Set[str] = set()
+        stack: List[str] = []
+        members: List[List[str]] = []
+        component_of: Dict[str, int] = {}
+        counter = 0
+        
+        for root in graph:
+            if root in index_of:
+                continue
+            index_of[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(graph[root]))]
+            while work:
+                node, successors = work[-1]
+                advanced = False
+                for succ in successors:
+                    if succ not in graph:
+                        continue
+                    if succ not in index_of:
+                        index_of[succ] = lowlink[succ] = counter
+                        counter += 1
+                        stack.append(succ)
+                        on_stack.add(succ)
+                        work.append((succ, iter(graph[succ])))
+                        advanced = True
+                        break
+                    if succ in on_stack:
+                        lowlink[node] = min(lowlink[node], index_of[succ])
+                if advanced:
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index_of[node]:
+                    scc = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component_of[member] = len(members)
+                        scc.append(member)
+                        if member == node:
+                            break
+                    members.append(sorted(scc))
+        
+        cyclic = [
+            len(scc) > 1 or scc[0] in graph[scc[0]]
+            for scc in members
+        ]
+        return {"members": members, "component_of": component_of, "cyclic": cyclic}
+    
+    def _build_ref_closures(self, reuse: Optional[Dict[str, frozenset]] = None,
+                            stale: Set[str] = frozenset()) -> Dict[str, frozenset]:
+        """
+        Compute the transitive dependency set of every schema.
+        
+        Closures are computed once per SCC, in the order Tarjan emitted
+        them, so every dependency's closure is already known. Members of
+        one SCC share the same frozenset.
+        
+        Args:
+            reuse: Closures of a previous version of the spec
+            stale: Schemas whose closure may differ from the one in reuse;
+                SCCs without a stale member take their closure from reuse
+            
+        Returns:
+            Mapping of schema name to the names it reaches through $ref
+        """
+        graph = self._get_index("ref_graph")
+        sccs = self._get_index("ref_sccs")
+        component_of = sccs["component_of"]
+        scc_closures: List[frozenset] = []
+        
+        for scc_id, scc in enumerate(sccs["members"]):
+            if reuse is not None and scc[0] in reuse and not stale.intersection(scc):
+                scc_closures.append(reuse[scc[0]])
+                continue
+            reach = set(scc) if sccs["cyclic"][scc_id] else set()
+            for member in scc:
+                for dep in graph[member]:
+                    reach.add(dep)
+                    dep_scc = component_of.get(dep)
+                    if dep_scc is not None and dep_scc != scc_id:
+                        reach.update(scc_closures[dep_scc])
+            scc_closures.append(frozenset(reach))
+        
+        return {name: scc_closures[scc_id] for name, scc_id in component_of.items()}
+    
+    def _build_path_refs(self) -> Dict[str, List[str]]:
+        """Build the schema names referenced directly by every path."""
+        return {
+            endpoint: sorted(self._collect_direct_refs(methods))
+            for endpoint, methods in self.schema.get("paths", {}).items()
+        }
+    
+    def _iter_operations(self):
+        """
+        Iterate over every operation in the spec.
+        
+        Yields:
+            Tuples of (path, method, operation definition, path item)
+        """
+        for endpoint, path_item in self.schema.get("paths", {}).items():
+            for method in HTTP_METHODS:
+                method_data = path_item.get(method)
+                if isinstance(method_data, dict):
+                    yield endpoint, method, method_data, path_item
+    
+    def _build_operations(self) -> List[Tuple[str, str, str]]:
+        """Build the ordered (path, method, operationId) table of operations."""
+        return [
+            (endpoint, method, method_data.get("operationId", ""))
+            for endpoint, method, method_data, _ in self._iter_operations()
+        ]
+    
+    def _build_schema_usage(self) -> Dict[str, Dict[str, List[Tuple[int, bool]]]]:
+        """
+        Build the reverse index from schema name to consuming operations.
+        
+        Every operation's direct references are split by where they occur
+        (parameters, request body, responses) and expanded through the ref
+        closures, then inverted. Operations are stored by their position in
+        the operations index, together with whether the use is direct.
+        
+        Returns:
+            Mapping of schema name to {role: [(operation id, direct), ...]}
+        """
+        usage: Dict[str, Dict[str, List[Tuple[int, bool]]]] = {}
+        closures = self._get_index("ref_closures")
+        
+        for op_id, (_, _, method_data, path_item) in enumerate(self._iter_operations()):
+            roles = {
+                "parameter": self._collect_direct_refs(
+                    [path_item.get("parameters", []), method_data.get("parameters", [])]
+                ),
+                "request": self._collect_direct_refs(method_data.get("requestBody", {})),
+                "response": self._collect_direct_refs(method_data.get("responses", {})),
+            }
+            for role, direct in roles.items():
+                reached = set()
+                for name in direct:
+                    reached.update(closures.get(name, ()))
+                for name in direct | reached:
+                    entry = usage.setdefault(name, {"request": [], "response": [], "parameter": []})
+                    entry[role].append((op_id, name in direct))
+        
+        return usage
+    
+    def get_schema_usage(self, schema_name: str) -> Dict[str, Any]:
+        """
+        Get the operations that use a schema, directly or transitively.
+        
+        Args:
+            schema_name: Name of the schema
+            
+        Returns:
+            Operations split into request, response and parameter usage
+        """
+        usage = self._get_index("schema_usage").get(schema_name)
+        if usage is None:
+            return {}
+        
+        operations = self._get_index("operations")
+        result = {"schema_name": schema_name}
+        used_by = set()
+        for role in ("request", "response", "parameter"):
+            entries = []
+            for op_id, direct in usage[role]:
+                endpoint, method, operation_id = operations[op_id]
+                entries.append({
+                    "endpoint": endpoint,
+                    "method": method.upper(),
+                    "operation_id": operation_id,
+                    "direct": direct,
+                })
+                used_by.add(op_id)
+            result[role] = entries
+        result["operation_count"] = len(used_by)
+        return result
+    
+    def _get_index(self, name: str) -> Any:
+        """Return a derived index, restoring or building it on first use."""
+        index = self._indexes.get(name)
+        if index is None:
+            blob = self._index_blobs.get(name)
+            if blob is not None:
+                import pickle
+                with self._phase(f"index.{name}.restore"):
+                    index = self._indexes[name] = pickle.loads(blob)
+            else:
+                with self._cache_batch(), self._phase(f"index.{name}"):
+                    index = self._indexes[name] = getattr(self, self._INDEX_BUILDERS[name])()
+                    self._cache_stale = self.use_cache and not self.lazy
+        return index
+    
+    def _schema_closure(self, schema_name: str) -> frozenset:
+        """Return the memoized transitive dependencies of a schema."""
+        if self.lazy:
+            return frozenset(self._walk_lazy_refs(self._lazy_component_refs(schema_name)))
+        return self._get_index("ref_closures").get(schema_name, frozenset())
+    
+    def _expand_refs(self, names: Set[str]) -> Set[str]:
+        """Add the transitive dependencies of every name in a set."""
+        with self._phase("refs.walk"):
+            if self.lazy:
+                refs = self._walk_lazy_refs(names)
+            else:
+                refs = set(names)
+                closures = self._get_index("ref_closures")
+                for name in names:
+                    refs.update(closures.get(name, ()))
+        if self.profile is not None:
+            self.profile.count("refs.walked", len(refs))
+        return refs
+    
+    def _lazy_component_refs(self, schema_name: str) -> frozenset:
+        """Return a component's direct refs, parsing only that component."""
+        refs = self._lazy_refs.get(schema_name)
+        if refs is None:
+            schema_def = self.schemas.get(schema_name)
+            refs = frozenset(self._collect_direct_refs(schema_def) if schema_def else ())
+            self._lazy_refs[schema_name] = refs
+        return refs
+    
+    def _walk_lazy_refs(self, names: Set[str]) -> Set[str]:
+        """
+        Collect the names reachable from a set of refs in lazy mode.
+        
+        Only the components on the way are parsed; their direct refs are
+        remembered so later walks do not parse them again.
+        """
+        reached = set(names)
+        pending = list(names)
+        while pending:
+            for dep in self._lazy_component_refs(pending.pop()):
+                if dep not in reached:
+                    reached.add(dep)
+                    pending.append(dep)
+        return reached
+    
+    def _path_direct_refs(self, endpoint: str) -> Set[str]:
+        """Return the schema names an endpoint references directly."""
+        if self.lazy:
+            return self._collect_direct_refs(self.schema.get("paths", {}).get(endpoint, {}))
+        return set(self._get_index("path_refs").get(endpoint, ()))
+    
+    def _extract_schema_refs(self, obj: Any, visited: Set[str] = None) -> Set[str]:
+        """
+        Extract all schema references from an object, including the ones
+        reached transitively through referenced components.
+        
+        Args:
+            obj: Object to search for references
+            visited: Optional set of names the caller already collected;
+                they are left out of the result and the set is updated
+            
+        Returns:
+            Set of schema reference names
+        """
+        refs = self._expand_refs(self._collect_direct_refs(obj))
+        if visited is not None:
+            refs -= visited
+            visited.update(refs)
+        return refs
+    
+    def _get_related_schemas(self, schema_names: Set[str]) -> Dict[str, Any]:
+        """
+        Get the complete definitions for a set of schema names.
+        
+        Args:
+            schema_names: Set of schema names to resolve
+            
+        Returns:
+            Dictionary of schema definitions
+        """
+        related_schemas = {}
+        
+        for schema_name in sorted(schema_names):
+            schema_def = self.schemas.get(schema_name)
+            if schema_def:
+                related_schemas[schema_name] = schema_def
+        
+        return related_schemas
+    
+    def _build_path_trie(self) -> Dict[str, Any]:
+        """
+        Build a segment trie over the path templates.
+        
+        A node is [children, templated segments, template, ordinal].
+        Children are keyed by the segment text as written in the template
+        ("buses", "{id}"), so prefixes can be walked literally. Templated
+        segments are also listed, in specificity order, as (segment, matcher
+        key) pairs for URL matching; the matcher pattern is built from the
+        typed path parameters of the operations.
+        
+        Returns:
+            Dictionary with the root node and the templated segment patterns
+        """
+        root = [{}, [], None, None]
+        segments: Dict[str, Tuple[str, List[Tuple[str, str, str]]]] = {}
+        for ordinal, (endpoint, path_item) in enumerate(self.schema.get("paths", {}).items()):
+            self._insert_trie_path(root, segments, endpoint, ordinal, self._path_param_kinds(path_item))
+        return {"root": root, "segments": segments}
+    
+    @staticmethod
+    def _path_param_kinds(path_item: Dict[str, Any]) -> Dict[str, str]:
+        """Map the path parameters of a path item to their matcher type."""
+        param_kinds = {}
+        for method_data in [path_item] + [path_item.get(m) or {} for m in HTTP_METHODS]:
+            for param in method_data.get("parameters", []):
+                if param.get("in") == "path" and param.get("name") not in param_kinds:
+                    schema = param.get("schema", {})
+                    kind = "uuid" if schema.get("format") == "uuid" else schema.get("type", "string")
+                    param_kinds[param.get("name")] = kind if kind in PATH_PARAM_PATTERNS else "string"
+        return param_kinds
+    
+    def _insert_trie_path(self, root: List[Any], segments: Dict[str, Any], endpoint: str,
+                          ordinal: int, param_kinds: Dict[str, str],
+                          copied: Optional[Set[int]] = None):
+        """
+        Add a path template to the segment trie.
+        
+        Args:
+            root: Root node of the trie
+            segments: Templated segment patterns, by matcher key
+            endpoint: Path template
+            ordinal: Position of the path in the spec
+            param_kinds: Path parameter types, from _path_param_kinds()
+            copied: When given, existing nodes on the way are copied before
+                they are changed (their ids are recorded here), so a trie
+                shared with a previous version is left intact
+        """
+        node = root
+        for segment in endpoint.split("/"):
+            child = node[0].get(segment)
+            if child is None:
+                child = node[0][segment] = [{}, [], None, None]
+                if copied is not None:
+                    copied.add(id(child))
+                if "{" in segment:
+                    compiled = self._compile_segment(segment, param_kinds)
+                    matcher_key = f"{segment}:{','.join(kind for _, _, kind in compiled[1])}"
+                    segments.setdefault(matcher_key, compiled)
+                    node[1].append((segment, matcher_key))
+                    node[1].sort(key=lambda item: (segments[item[1]][2], item[0]))
+            elif copied is not None and id(child) not in copied:
+                child = node[0][segment] = [dict(child[0]), list(child[1]), child[2], child[3]]
+                copied.add(id(child))
+            node = child
+        node[2] = endpoint
+        node[3] = ordinal
+    
+    @staticmethod
+    def _compile_segment(segment: str, param_kinds: Dict[str, str]) -> Tuple[str, List[Tuple[str, str, str]], int]:
+        """
+        Build the regex for a templated path segment such as "{id}".
+        
+        Args:
+            segment: Segment text from the path template
+            param_kinds: Parameter name to type, from the path parameters
+            
+        Returns:
+            Tuple of (pattern, [(group, parameter name, type)], specificity)
+        """
+        pattern = []
+        groups = []
+        position = 0
+        specificity = 0
+        kinds = list(PATH_PARAM_PATTERNS)
+        for match in _PATH_PARAM_RE.finditer(segment):
+            name = match.group(1)
+            kind = param_kinds.get(name, "string")
+            group = f"p{len(groups)}"
+            pattern.append(re.escape(segment[position:match.start()]))
+            pattern.append(f"(?P<{group}>{PATH_PARAM_PATTERNS[kind]})")
+            groups.append((group, name, kind))
+            specificity = max(specificity, kinds.index(kind))
+            position = match.end()
+        pattern.append(re.escape(segment[position:]))
+        # Segments with literal text around the parameter are tried first.
+        if position != len(segment) or (groups and segment.index("{") > 0):
+            specificity -= len(kinds)
+        return "".join(pattern), groups, specificity
+    
+    def _segment_matcher(self, matcher_key: str):
+        """Return the compiled regex and groups for a templated segment."""
+        matcher = self._segment_matchers.get(matcher_key)
+        if matcher is None:
+            pattern, groups, _ = self._get_index("path_trie")["segments"][matcher_key]
+            matcher = self._segment_matchers[matcher_key] = (re.compile(pattern), groups)
+        return matcher
+    
+    def list_endpoints_with_prefix(self, prefix: str) -> List[str]:
+        """
+        List the path templates starting with a prefix, in schema order.
+        
+        Whole prefix segments are walked in the trie; only the children of
+        the last node are compared against the trailing partial segment.
+        
+        Args:
+            prefix: String prefix of the path template
+            
+        Returns:
+            Matching path templates
+        """
+        if self.lazy:
+            # Path keys are known from the offsets alone; avoid parsing
+            # every path item just to build the trie.
+            return [p for p in self.schema.get("paths", {}) if p.startswith(prefix)]
+        
+        *full_segments, partial = prefix.split("/")
+        node = self._get_index("path_trie")["root"]
+        for segment in full_segments:
+            node = node[0].get(segment)
+            if node is None:
+                return []
+        
+        found = []
+        stack = [child for key, child in node[0].items() if key.startswith(partial)]
+        while stack:
+            node = stack.pop()
+            if node[2] is not None:
+                found.append((node[3], node[2]))
+            stack.extend(node[0].values())
+        return [endpoint for _, endpoint in sorted(found)]
+    
+    def match_url(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Map a concrete request URL to its path template.
+        
+        Literal segments win over templated ones, and templated segments are
+        tried from the most specific parameter type to plain strings, with
+        backtracking. Scheme, host, query string and fragment are ignored.
+        
+        Args:
+            url: Request URL or path, e.g. "/api/v1/buses/buses/8f3c.../"
+            
+        Returns:
+            Template, typed path parameters and methods, or None
+        """
+        if "://" in url:
+            url = urlsplit(url).path
+        else:
+            url = url.split("?", 1)[0].split("#", 1)[0]
+        segments = url.split("/")
+        params: Dict[str, Any] = {}
+        node = self._match_segments(self._get_index("path_trie")["root"], segments, 0, params)
+        if node is None:
+            return None
+        endpoint = node[2]
+        path_item = self.schema.get("paths", {}).get(endpoint, {})
+        return {
+            "endpoint": endpoint,
+            "params": params,
+            "methods": [method.upper() for method in HTTP_METHODS if method in path_item],
+        }
+    
+    def _match_segments(self, node: list, segments: List[str], position: int,
+                        params: Dict[str, Any]) -> Optional[list]:
+        """Match URL segments from a trie node, filling params on success."""
+        if position == len(segments):
+            return node if node[2] is not None else None
+        
+        segment = segments[position]
+        child = node[0].get(segment)
+        if child is not None:
+            found = self._match_segments(child, segments, position + 1, params)
+            if found is not None:
+                return found
+        
+        for key, matcher_key in node[1]:
+            regex, groups = self._segment_matcher(matcher_key)
+            match = regex.fullmatch(segment)
+            if match is None:
+                continue
+            found = self._match_segments(node[0][key], segments, position + 1, params)
+            if found is not None:
+                for group, name, kind in groups:
+                    value = unquote(match.group(group))
+                    converter = _PATH_PARAM_CONVERTERS.get(kind)
+                    params[name] = converter(value) if converter else value
+                return found
+        return None
+    
+    def get_complete_endpoint(self, endpoint: str) -> Optional[Dict[str, Any]]:
+        """
+        Get complete endpoint information with all related schemas resolved.
+        
+        Args:
+            endpoint: Endpoint path
+            
+        Returns:
+            Complete endpoint information with resolved schemas
+        """
+        paths = self.schema.get("paths", {})
+        endpoint_data = paths.get(endpoint)
+        
+        if not endpoint_data:
+            return None
+        
+        # Expand the endpoint's direct references through the ref graph
+        all_refs = self._expand_refs(self._path_direct_refs(endpoint))
+        
+        # Get all related schema definitions
+        related_schemas = self._get_related_schemas(all_refs)
+        
+        return {
+            "endpoint": endpoint,
+            "definition": endpoint_data,
+            "related_schemas": related_schemas,
+            "schema_count": len(related_schemas)
+        }
+    
+    def get_complete_endpoints_by_prefix(self, prefix: str) -> Dict[str, Any]:
+        """
+        Get all endpoints with prefix including complete schema information.
+        
+        Args:
+            prefix: URL prefix to filter by
+            
+        Returns:
+            Dictionary of complete endpoint information
+        """
+        matching_endpoints = {}
+        all_related_schemas = {}
+        
+        for record in self.iter_complete_endpoints_by_prefix(prefix):
+            matching_endpoints[record["endpoint"]] = {
+                "definition": record["definition"],
+                "related_schemas": record["related_schemas"],
+                "schema_count": record["schema_count"]
+            }
+            
+            # Collect all schemas
+            all_related_schemas.update(self._get_related_schemas(record["related_schemas"]))
+        
+        return {
+            "endpoints": matching_endpoints,
+            "all_related_schemas": all_related_schemas,
+            "total_endpoints": len(matching_endpoints),
+            "total_schemas": len(all_related_schemas)
+        }
+    
+    def iter_complete_endpoints_by_prefix(self, prefix: str):
+        """
+        Iterate over the endpoints with a prefix, one record at a time.
+        
+        Args:
+            prefix: URL prefix to filter by
+            
+        Yields:
+            Endpoint records with definition and related schema names
+        """
+        paths = self.schema.get("paths", {})
+        for endpoint in self.list_endpoints_with_prefix(prefix):
+            # Expand the endpoint's direct references through the ref graph
+            endpoint_refs = self._expand_refs(self._path_direct_refs(endpoint))
+            yield {
+                "endpoint": endpoint,
+                "definition": paths[endpoint],
+                "related_schemas": sorted(endpoint_refs),
+                "schema_count": len(endpoint_refs)
+            }
+    
+    def _stream_complete_endpoints_by_prefix(self, prefix: str) -> _StreamedObject:
+        """
+        Same output as get_complete_endpoints_by_prefix(), produced while it
+        is being written by print_formatted_output().
+        """
+        all_related_schemas = {}
+        total_endpoints = [0]
+        
+        def endpoints():
+            for record in self.iter_complete_endpoints_by_prefix(prefix):
+                total_endpoints[0] += 1
+                all_related_schemas.update(self._get_related_schemas(record["related_schemas"]))
+                yield record["endpoint"], {
+                    "definition": record["definition"],
+                    "related_schemas": record["related_schemas"],
+                    "schema_count": record["schema_count"]
+                }
+        
+        return _StreamedObject([
+            ("endpoints", _StreamedObject(endpoints())),
+            ("all_related_schemas", _Deferred(lambda: all_related_schemas)),
+            ("total_endpoints", _Deferred(lambda: total_endpoints[0])),
+            ("total_schemas", _Deferred(lambda: len(all_related_schemas))),
+        ])
+    
+    def get_endpoint_with_full_schemas(self, endpoint: str, max_depth: Optional[int] = None,
+                                       max_nodes: Optional[int] = None,
+                                       shared_defs: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Get endpoint with fully resolved schemas (no $ref, actual definitions).
+        
+        Resolved components are shared between the places that use them, so
+        treat the result as read-only. With shared_defs, every component is
+        emitted once under "$defs" and referenced as "#/$defs/Name" instead,
+        which keeps the serialized output linear in the number of schemas.
+        
+        Args:
+            endpoint: Endpoint path
+            max_depth: Maximum number of nested $ref expansions
+            max_nodes: Maximum number of objects in the expanded definition
+            shared_defs: Emit a "$defs" section instead of inlining schemas
+            
+        Returns:
+            Endpoint with fully resolved schemas
+        """
+        complete_info = self.get_complete_endpoint(endpoint)
+        if not complete_info:
+            return None
+        
+        if shared_defs:
+            related_schemas = complete_info["related_schemas"]
+            return {
+                "endpoint": endpoint,
+                "definition": self._rewrite_refs_to_defs(complete_info["definition"]),
+                "$defs": {
+                    name: self._rewrite_refs_to_defs(schema_def)
+                    for name, schema_def in related_schemas.items()
+                },
+                "schema_count": complete_info["schema_count"]
+            }
+        
+        # Resolve every $ref, reusing the memoized component expansions
+        resolved_definition = self._resolve_all_refs(
+            complete_info["definition"], max_depth=max_depth, max_nodes=max_nodes
+        )
+        
+        return {
+            "endpoint": endpoint,
+            "definition": resolved_definition,
+            "related_schemas": complete_info["related_schemas"],
+            "schema_count": complete_info["schema_count"]
+        }
+    
+    def _rewrite_refs_to_defs(self, obj: Any) -> Any:
+        """Point component refs at "#/$defs/", sharing untouched subtrees."""
+        if isinstance(obj, dict):
+            ref = obj.get("$ref")
+            if isinstance(ref, str) and ref.startswith("#/components/schemas/"):
+                return {**obj, "$ref": "#/$defs/" + ref[len("#/components/schemas/"):]}
+            rewritten = {key: self._rewrite_refs_to_defs(value) for key, value in obj.items()}
+            changed = any(rewritten[key] is not value for key, value in obj.items())
+            return rewritten if changed else obj
+        if isinstance(obj, list):
+            rewritten = [self._rewrite_refs_to_defs(item) for item in obj]
+            changed = any(new is not old for new, old in zip(rewritten, obj))
+            return rewritten if changed else obj
+        return obj
+    
+    def _resolve_all_refs(self, obj: Any, visited: Set[str] = None,
+                          max_depth: Optional[int] = None,
+                          max_nodes: Optional[int] = None) -> Any:
+        """
+        Recursively resolve all $ref in an object.
+        
+        Each component is expanded once and the result is shared by every
+        occurrence. The expansion of a component only depends on which of
+        the refs currently being expanded it can reach again, so the memo is
+        keyed on the name plus that subset of visited names (always empty
+        for acyclic components). Subtrees without refs are returned as-is.
+        
+        Args:
+            obj: Object to resolve references in
+            visited: Set of visited references to avoid cycles
+            max_depth: Maximum number of nested $ref expansions; deeper refs
+                are left as {"$ref": ..., "_resolved": "max_depth"}
+            max_nodes: Maximum number of objects in the expanded output; refs
+                that would exceed it are left as
+                {"$ref": ..., "_resolved": "max_nodes"}
+            
+        Returns:
+            Object with resolved references
+        """
+        if visited is None:
+            visited = set()
+        
+        limited = max_depth is not None or max_nodes is not None
+        # Truncated expansions must not leak into the shared memo.
+        memo = {} if limited else self._resolved_refs
+        closures: Dict[str, frozenset] = {}
+        # Objects in the expanded output so far; a shared component counts
+        # once per occurrence, since that is what gets serialized.
+        emitted = [0]
+        # Components expanded and memo hits, for profiling.
+        stats = [0, 0]
+        
+        def resolve(node: Any, depth: int) -> Tuple[Any, int]:
+            if isinstance(node, dict):
+                ref = node.get("$ref")
+                if isinstance(ref, str):
+                    ref_name = ref.split("/")[-1]
+                    if ref_name in visited:
+                        return {"$ref": ref, "_resolved": "circular_reference"}, 1
+                    if max_depth is not None and depth >= max_depth:
+                        return {"$ref": ref, "_resolved": "max_depth"}, 1
+                    if max_nodes is not None and emitted[0] >= max_nodes:
+                        return {"$ref": ref, "_resolved": "max_nodes"}, 1
+                    
+                    resolved_schema = self._resolve_schema_ref(ref)
+                    if not resolved_schema:
+                        emitted[0] += 1
+                        return node, 1
+                    
+                    closure = closures.get(ref_name)
+                    if closure is None:
+                        closure = closures[ref_name] = self._schema_closure(ref_name)
+                    key = (ref_name, frozenset(name for name in visited if name in closure),
+                           depth if max_depth is not None else None)
+                    cached = memo.get(key)
+                    if cached is None:
+                        stats[0] += 1
+                        visited.add(ref_name)
+                        cached = memo[key] = resolve(resolved_schema, depth + 1)
+                        visited.discard(ref_name)
+                        return cached
+                    if max_nodes is not None and emitted[0] + cached[1] > max_nodes:
+                        return {"$ref": ref, "_resolved": "max_nodes"}, 1
+                    stats[1] += 1
+                    emitted[0] += cached[1]
+                    return cached
+                
+                emitted[0] += 1
+                resolved_dict = {}
+                size = 1
+                changed = False
+                for key, value in node.items():
+                    resolved_value, value_size = resolve(value, depth)
+                    resolved_dict[key] = resolved_value
+                    size += value_size
+                    changed = changed or resolved_value is not value
+                return (resolved_dict if changed else node), size
+            elif isinstance(node, list):
+                emitted[0] += 1
+                resolved_list = []
+                size = 1
+                changed = False
+                for item in node:
+                    resolved_item, item_size = resolve(item, depth)
+                    resolved_list.append(resolved_item)
+                    size += item_size
+                    changed = changed or resolved_item is not item
+                return (resolved_list if changed else node), size
+            else:
+                return node, 0
+        
+        if self.profile is None:
+            return resolve(obj, 0)[0]
+        with self.profile.phase("resolve"):
+            result, size = resolve(obj, 0)
+        self.profile.count("resolve.calls")
+        self.profile.count("resolve.refs_expanded", stats[0])
+        self.profile.count("resolve.memo_hits", stats[1])
+        self.profile.count("resolve.output_nodes", size)
+        return result
+    
+    def get_schema_with_dependencies(self, schema_name: str) -> Dict[str, Any]:
+        """
+        Get a schema with all its dependencies resolved.
+        
+        Args:
+            schema_name: Name of the schema
+            
+        Returns:
+            Schema with all dependencies
+        """
+        schema_def = self.schemas.get(schema_name)
+        if not schema_def:
+            return {}
+        
+        # Dependencies come straight from the memoized closure
+        deps = self._schema_closure(schema_name)
+        related_schemas = self._get_related_schemas(deps)
+        
+        return {
+            "schema_name": schema_name,
+            "definition": schema_def,
+            "dependencies": sorted(deps),
+            "related_schemas": related_schemas,
+            "dependency_count": len(deps)
+        }
+    
+    def get_endpoint_analysis(self, endpoint: str) -> Dict[str, Any]:
+        """
+        Get comprehensive analysis of an endpoint.
+        
+        Args:
+            endpoint: Endpoint path
+            
+        Returns:
+            Detailed analysis including methods, schemas, security, etc.
+        """
+        path_item = self.model.path(endpoint)
+        if path_item is None or not path_item.definition:
+            return {}
+        names = self.model.names
+        
+        analysis = {
+            "endpoint": endpoint,
+            "methods": {},
+            "all_schemas_used": set(),
+            "security_schemes": set(),
+            "parameters": {},
+            "request_schemas": {},
+            "response_schemas": {}
+        }
+        
+        for operation in path_item.operations:
+            method_analysis = {
+                "operation_id": operation.operation_id,
+                "description": operation.description,
+                "tags": operation.tags,
+                "parameters": [
+                    {
+                        "name": param.name,
+                        "in": param.location,
+                        "required": param.required,
+                        "description": param.description,
+                        "schema": param.schema
+                    }
+                    for param in operation.parameters
+                ],
+                "request_body": None,
+                "responses": {
+                    response.status: {
+                        "description": response.description,
+                        "content": dict(response.content)
+                    }
+                    for response in operation.responses
+                },
+                "security": operation.security,
+                # Components used by parameters, request body and responses,
+                # including the ones they reach
+                "schemas_used": self._expand_refs({names[ref] for ref in operation.refs})
+            }
+            if operation.request_content is not None:
+                method_analysis["request_body"] = {
+                    "required": operation.request_required,
+                    "content": dict(operation.request_content)
+                }
+            
+            # Collect security schemes
+            for security_item in method_analysis["security"]:
+                analysis["security_schemes"].update(security_item.keys())
+            
+            analysis["methods"][operation.method.upper()] = method_analysis
+            analysis["all_schemas_used"].update(method_analysis["schemas_used"])
+        
+        # Convert sets to lists for JSON serialization
+        analysis["all_schemas_used"] = sorted(analysis["all_schemas_used"])
+        analysis["security_schemes"] = sorted(analysis["security_schemes"])
+        
+        for method_data in analysis["methods"].values():
+            method_data["schemas_used"] = sorted(method_data["schemas_used"])
+        
+        # Get all related schema definitions
+        all_related_schemas = self._get_related_schemas(set(analysis["all_schemas_used"]))
+        analysis["related_schemas"] = all_related_schemas
+        analysis["schema_count"] = len(all_related_schemas)
+        
+        return analysis
+
+    def iter_operation_analysis(self, prefix: str = ""):
+        """
+        Analyze every operation in one pass over the spec.
+        
+        The columnar counterpart of get_endpoint_analysis(): one flat row
+        per operation, built from the compiled model and the ref closure
+        index, without resolving or copying any schema. Operations with the
+        same direct refs share one transitive count.
+        
+        Args:
+            prefix: Only analyze paths starting with this prefix
+            
+        Yields:
+            Rows with method, path, operation_id, tags, security schemes
+            (the spec-wide requirement unless the operation sets its own),
+            parameter counts per location and required, the components
+            the request body and responses reference directly, and the
+            number of components the operation reaches transitively
+        """
+        names = self.model.names
+        default_security = sorted({
+            scheme for requirement in self.schema.get("security", ()) for scheme in requirement
+        })
+        transitive_counts: Dict[Tuple[int, ...], int] = {}
+        for endpoint in self.list_endpoints_with_prefix(prefix):
+            for operation in self.model.path(endpoint).operations:
+                counts = {"path": 0, "query": 0, "header": 0, "cookie": 0}
+                required = 0
+                for param in operation.parameters:
+                    if param.location in counts:
+                        counts[param.location] += 1
+                    required += bool(param.required)
+                if "security" in operation.definition:
+                    security = sorted({scheme for requirement in operation.security for scheme in requirement})
+                else:
+                    security = default_security
+                response_refs = set()
+                for response in operation.responses:
+                    response_refs.update(response.refs)
+                transitive = transitive_counts.get(operation.refs)
+                if transitive is None:
+                    transitive = transitive_counts[operation.refs] = len(
+                        self._expand_refs({names[ref] for ref in operation.refs})
+                    )
+                yield {
+                    "method": operation.method.upper(),
+                    "path": endpoint,
+                    "operation_id": operation.operation_id,
+                    "tags": list(operation.tags),
+                    "security": security,
+                    "path_params": counts["path"],
+                    "query_params": counts["query"],
+                    "header_params": counts["header"],
+                    "cookie_params": counts["cookie"],
+                    "required_params": required,
+                    "request_body": operation.request_content is not None,
+                    "request_schemas": sorted(names[ref] for ref in operation.request_refs),
+                    "response_statuses": [response.status for response in operation.responses],
+                    "response_schemas": sorted(names[ref] for ref in response_refs),
+                    "transitive_schemas": transitive,
+                }
+    
+    def extract_spec(self, prefixes: Tuple[str, ...] = (), tags: Tuple[str, ...] = (),
+                     operation_ids: Tuple[str, ...] = ()) -> Dict[str, Any]:
+        """
+        Extract a standalone OpenAPI document for some operations.
+        
+        An operation is kept when its path starts with one of the prefixes,
+        it has one of the tags or its operationId matches one of the
+        shell-style patterns. The document keeps only those operations and
+        the components they reach (through the ref closures), the security
+        schemes they require and the tags they use; everything else at the
+        top level (openapi, info, servers, security, ...) is copied.
+        
+        Args:
+            prefixes: Path prefixes, e.g. "/api/v1/offline/"
+            tags: Operation tags, e.g. "gamification"
+            operation_ids: operationId patterns, e.g. "tracking_trips_*"
+            
+        Returns:
+            The extracted OpenAPI document
+        """
+        tag_set = set(tags)
+        id_patterns = [re.compile(fnmatch.translate(pattern)) for pattern in operation_ids]
+        paths: Dict[str, Any] = {}
+        all_paths = self.schema.get("paths", {})
+        for endpoint in all_paths:
+            path_selected = any(endpoint.startswith(prefix) for prefix in prefixes)
+            if not (path_selected or tag_set or id_patterns):
+                # In lazy mode this leaves unselected paths unparsed.
+                continue
+            path_item = all_paths[endpoint]
+            kept = {}
+            for key, value in path_item.items():
+                if key not in HTTP_METHODS:
+                    kept[key] = value
+                elif (path_selected or not tag_set.isdisjoint(value.get("tags", ()))
+                      or any(pattern.match(value.get("operationId", "")) for pattern in id_patterns)):
+                    kept[key] = value
+            if any(key in HTTP_METHODS for key in kept):
+                paths[endpoint] = kept
+        
+        default_security = self.schema.get("security")
+        security_schemes: Set[str] = set()
+        used_tags: Set[str] = set()
+        component_refs: Set[Tuple[str, str]] = set()
+        for path_item in paths.values():
+            component_refs.update(self._component_refs(path_item))
+            for key, operation in path_item.items():
+                if key not in HTTP_METHODS:
+                    continue
+                used_tags.update(operation.get("tags", ()))
+                for requirement in operation.get("security", default_security) or ():
+                    security_schemes.update(requirement)
+        
+        # Components other than schemas (parameters, responses, ...) may
+        # reference further components; schemas only reference schemas, so
+        # their closure comes from the index.
+        components = self.schema.get("components", {})
+        schema_names = set()
+        pending = list(component_refs)
+        seen = set(pending)
+        while pending:
+            section, name = pending.pop()
+            if section == "schemas":
+                schema_names.add(name)
+                continue
+            for ref in self._component_refs(components.get(section, {}).get(name)):
+                if ref not in seen:
+                    seen.add(ref)
+                    pending.append(ref)
+        schema_names = self._expand_refs(schema_names)
+        
+        extracted_components: Dict[str, Any] = {}
+        for section, entries in components.items():
+            if section == "schemas":
+                wanted = schema_names
+            elif section == "securitySchemes":
+                wanted = security_schemes
+            else:
+                wanted = {name for ref_section, name in seen if ref_section == section}
+            kept = {name: entry for name, entry in entries.items() if name in wanted}
+            if kept:
+                extracted_components[section] = kept
+        
+        document: Dict[str, Any] = {}
+        for key, value in self.schema.items():
+            if key == "paths":
+                document["paths"] = paths
+            elif key == "components":
+                if extracted_components:
+                    document["components"] = extracted_components
+            elif key == "tags":
+                tags_kept = [tag for tag in value if tag.get("name") in used_tags]
+                if tags_kept:
+                    document["tags"] = tags_kept
+            else:
+                document[key] = value
+        document.setdefault("paths", paths)
+        return document
+    
+    @staticmethod
+    def _component_refs(obj: Any) -> Set[Tuple[str, str]]:
+        """Collect the (section, name) of every '#/components/...' ref in an object."""
+        refs = set()
+        stack = [obj]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, dict):
+                ref = node.get("$ref")
+                if isinstance(ref, str):
+                    parts = ref.split("/")
+                    if len(parts) == 4 and parts[:2] == ["#", "components"]:
+                        refs.add((parts[2], parts[3]))
+                else:
+                    stack.extend(node.values())
+            elif isinstance(node, list):
+                stack.extend(node)
+        return refs
+    
+    # Keep existing methods for backward compatibility
+    def get_endpoints_by_prefix(self, prefix: str) -> Dict[str, Any]:
+        """Get endpoints by prefix (legacy method)."""
+        return self.get_complete_endpoints_by_prefix(prefix)
+    
+    def get_specific_endpoint(self, endpoint: str) -> Optional[Dict[str, Any]]:
+        """Get specific endpoint (legacy method)."""
+        result = self.get_complete_endpoint(endpoint)
+        return result["definition"] if result else None
+    
+    def get_schema_component(self, component_name: str) -> Optional[Dict[str, Any]]:
+        """Get schema component with dependencies."""
+        return self.get_schema_with_dependencies(component_name)
+    
+    def list_all_endpoints(self, level: int = 1, prefix: str = "") -> List[str]:
+        """List all available endpoints, optionally only those under a prefix."""
+        return [
+            self._format_endpoint_record(record, level)
+            for record in self.iter_endpoint_records(level, prefix)
+        ]
+    
+    def iter_endpoint_records(self, level: int = 1, prefix: str = ""):
+        """
+        Iterate over endpoint listing records, one per path or operation.
+        
+        Args:
+            level: Detail level (1=path, 2=path and methods, 3=per operation)
+            prefix: Only list paths starting with this prefix
+            
+        Yields:
+            Dictionaries describing each endpoint (or operation at level 3)
+        """
+        for endpoint in self.list_endpoints_with_prefix(prefix):
+            if level == 1:
+                yield {"endpoint": endpoint}
+                continue
+            operations = self.model.path(endpoint).operations
+            if level == 2:
+                yield {"endpoint": endpoint, "methods": [op.method.upper() for op in operations]}
+            else:  # level 3
+                for operation in operations:
+                    yield {
+                        "endpoint": endpoint,
+                        "method": operation.method.upper(),
+                        "operation_id": operation.operation_id,
+                        "description": operation.description,
+                    }
+    
+    @staticmethod
+    def _format_endpoint_record(record: Dict[str, Any], level: int) -> str:
+        """Format an endpoint listing record as a text line."""
+        if level == 1:
+            return record["endpoint"]
+        if level == 2:
+            return f"{record['endpoint']} [{', '.join(record['methods'])}]"
+        return (f"{record['endpoint']} {record['method']} - "
+                f"{record['operation_id']}: {record['description']}")
+    
+    def list_schema_components(self, level: int = 1) -> List[str]:
+        """List all schema components."""
+        return [
+            self._format_schema_record(record, level)
+            for record in self.iter_schema_records(level)
+        ]
+    
+    def iter_schema_records(self, level: int = 1):
+        """
+        Iterate over schema listing records, one per component.
+        
+        Args:
+            level: Detail level (1=name, 2=name and type, 3=full definition)
+            
+        Yields:
+            Dictionaries describing each schema component
+        """
+        for name, schema_def in self.schemas.items():
+            if level == 1:
+                yield {"name": name}
+            elif level == 2:
+                schema_type = schema_def.get("type", "")
+                if "enum" in schema_def:
+                    schema_type = "enum"
+                elif "properties" in schema_def:
+                    schema_type = "object"
+                yield {"name": name, "type": schema_type}
+            else:  # level 3
+                yield {"name": name, "definition": schema_def}
+    
+    @staticmethod
+    def _format_schema_record(record: Dict[str, Any], level: int) -> str:
+        """Format a schema listing record as a text line."""
+        if level == 1:
+            return record["name"]
+        if level == 2:
+            return f"{record['name']} ({record['type']})"
+        return f"{record['name']}: {json.dumps(record['definition'], indent=2)}"
+    
+    def _build_search_index(self, reuse: Optional[Dict[str, List[Tuple[str, int, int]]]] = None) -> Dict[str, Any]:
+        """
+        Build the inverted token index used by search().
+        
+        Each operation is a document. Paths, operationIds, descriptions,
+        tags, parameter names and the property names of every schema the
+        operation uses are tokenized into per-field postings. A sorted
+        vocabulary serves prefix terms and a one-deletion map serves fuzzy
+        terms without scanning the vocabulary.
+        
+        Args:
+            reuse: Documents of a previous version of the spec, keyed
+                "METHOD /path", for operations known to be unchanged
+            
+        Returns:
+            Dictionary with postings, document frequencies, the sorted
+            vocabulary and the deletion map
+        """
+        closures = self._get_index("ref_closures")
+        property_tokens: Dict[str, Set[str]] = {}
+        postings: Dict[str, List[Tuple[int, int, int]]] = {}
+        for op_id, (endpoint, method, method_data, path_item) in enumerate(self._iter_operations()):
+            document = reuse.get(f"{method.upper()} {endpoint}") if reuse else None
+            if document is None:
+                document = self._search_document(endpoint, method_data, path_item, closures, property_tokens)
+            for token, field_id, tf in document:
+                postings.setdefault(token, []).append((op_id, field_id, tf))
+        
+        document_frequency = {
+            token: len({op_id for op_id, _, _ in entries})
+            for token, entries in postings.items()
+        }
+        vocabulary = sorted(postings)
+        deletion_map: Dict[str, List[str]] = {}
+        for token in vocabulary:
+            if len(token) >= 4:
+                for variant in _deletes(token):
+                    deletion_map.setdefault(variant, []).append(token)
+        
+        return {
+            "postings": postings,
+            "document_frequency": document_frequency,
+            "vocabulary": vocabulary,
+            "deletions": deletion_map,
+        }
+    
+    def _search_document(self, endpoint: str, method_data: Dict[str, Any], path_item: Dict[str, Any],
+                         closures: Dict[str, frozenset],
+                         property_tokens: Dict[str, Set[str]]) -> List[Tuple[str, int, int]]:
+        """
+        Tokenize one operation for the search index.
+        
+        Args:
+            endpoint: Path template
+            method_data: Operation definition
+            path_item: Path item the operation belongs to
+            closures: Ref closures index
+            property_tokens: Memo of the property name tokens per schema
+            
+        Returns:
+            List of (token, field id, term frequency)
+        """
+        parameters = path_item.get("parameters", []) + method_data.get("parameters", [])
+        refs = set()
+        for name in self._collect_direct_refs(method_data):
+            refs.add(name)
+            refs.update(closures.get(name, ()))
+        properties = set()
+        for name in refs:
+            tokens = property_tokens.get(name)
+            if tokens is None:
+                tokens = property_tokens[name] = set()
+                for prop in (self.schemas.get(name) or {}).get("properties", {}):
+                    tokens.update(_tokenize_identifier(prop))
+            properties.update(tokens)
+        
+        fields = (
+            _tokenize(endpoint),
+            _tokenize_identifier(method_data.get("operationId", "")),
+            [t for tag in method_data.get("tags", []) for t in _tokenize_identifier(tag)],
+            [t for param in parameters for t in _tokenize_identifier(param.get("name", ""))],
+            _tokenize(f"{method_data.get('summary', '')} {method_data.get('description', '')}"),
+            sorted(properties),
+        )
+        document = []
+        for field_id, tokens in enumerate(fields):
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            document.extend((token, field_id, tf) for token, tf in counts.items())
+        return document
+    
+    @staticmethod
+    def _search_documents(index: Dict[str, Any], operations: List[Tuple[str, str, str]],
+                          keys: Set[str]) -> Dict[str, List[Tuple[str, int, int]]]:
+        """
+        Recover per-operation documents from a built search index.
+        
+        Args:
+            index: Search index
+            operations: Operations index the postings refer to
+            keys: Operations to recover, as "METHOD /path"
+            
+        Returns:
+            Mapping of "METHOD /path" to its (token, field id, tf) list
+        """
+        wanted = {
+            op_id: f"{method.upper()} {endpoint}"
+            for op_id, (endpoint, method, _) in enumerate(operations)
+            if f"{method.upper()} {endpoint}" in keys
+        }
+        documents: Dict[str, List[Tuple[str, int, int]]] = {key: [] for key in wanted.values()}
+        for token, entries in index["postings"].items():
+            for op_id, field_id, tf in entries:
+                key = wanted.get(op_id)
+                if key is not None:
+                    documents[key].append((token, field_id, tf))
+        return documents
+    
+    def _expand_search_term(self, term: str, prefix: bool, fuzzy: bool) -> List[Tuple[str, float]]:
+        """
+        Expand a query term to vocabulary tokens with a match-quality factor.
+        
+        Args:
+            term: Lowercased query token
+            prefix: Also match tokens starting with the term
+            fuzzy: Also match tokens within one edit of the term
+            
+        Returns:
+            List of (token, factor) pairs, exact matches scoring 1.0
+        """
+        index = self._get_index("search_index")
+        postings = index["postings"]
+        matches = {term: 1.0} if term in postings else {}
+        
+        if prefix:
+            vocabulary = index["vocabulary"]
+            position = bisect.bisect_left(vocabulary, term)
+            while (position < len(vocabulary) and len(matches) < SEARCH_MAX_EXPANSIONS
+                   and vocabulary[position].startswith(term)):
+                matches.setdefault(vocabulary[position], 0.8)
+                position += 1
+        
+        if fuzzy and len(term) >= 4:
+            deletions = index["deletions"]
+            for variant in _deletes(term):
+                for token in deletions.get(variant, ()):
+                    if len(matches) >= SEARCH_MAX_EXPANSIONS:
+                        break
+                    if token not in matches and _edit_distance(term, token, 1) <= 1:
+                        matches[token] = 0.6
+        
+        return list(matches.items())
+    
+    def search(self, query: str, prefix: bool = False, fuzzy: bool = False,
+               limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Ranked multi-term search over the operations in the spec.
+        
+        Every term must match. A term may be restricted to one field with
+        "field:term" (path, op, tag, param, desc, prop), and switched to
+        prefix or fuzzy matching with a trailing "*" or "~".
+        
+        Args:
+            query: Search query, e.g. "location tag:tracking param:bus_id"
+            prefix: Apply prefix matching to every term
+            fuzzy: Apply fuzzy (one edit) matching to every term
+            limit: Maximum number of results
+            
+        Returns:
+            Matching operations ordered by descending score
+        """
+        index = self._get_index("search_index")
+        postings = index["postings"]
+        document_frequency = index["document_frequency"]
+        operations = self._get_index("operations")
+        total = max(len(operations), 1)
+        
+        scores: Optional[Dict[int, float]] = None
+        matched_fields: Dict[int, Set[str]] = {}
+        for raw_term in query.split():
+            field_id = None
+            field, sep, value = raw_term.partition(":")
+            if sep and field.lower() in SEARCH_FIELD_ALIASES:
+                field_id = SEARCH_FIELDS.index(SEARCH_FIELD_ALIASES[field.lower()])
+                raw_term = value
+            term_prefix = prefix or raw_term.endswith("*")
+            term_fuzzy = fuzzy or raw_term.endswith("~")
+            raw_term = raw_term.rstrip("*~")
+            if not raw_term:
+                continue
+            
+            # Prefer the whole identifier ("bus_id"); otherwise every word
+            # of the term must match.
+            whole = raw_term.lower()
+            if whole in postings:
+                parts = [whole]
+            else:
+                parts = _tokenize(raw_term) or [whole]
+            
+            for part in parts:
+                term_scores: Dict[int, float] = {}
+                for token, factor in self._expand_search_term(part, term_prefix, term_fuzzy):
+                    idf = math.log(1.0 + total / document_frequency[token])
+                    for op_id, token_field, tf in postings[token]:
+                        if field_id is not None and token_field != field_id:
+                            continue
+                        weight = SEARCH_FIELD_WEIGHTS[token_field] * factor * idf * tf / (tf + 1.0)
+                        term_scores[op_id] = term_scores.get(op_id, 0.0) + weight
+                        matched_fields.setdefault(op_id, set()).add(SEARCH_FIELDS[token_field])
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {
+                        op_id: score + term_scores[op_id]
+                        for op_id, score in scores.items()
+                        if op_id in term_scores
+                    }
+                if not scores:
+                    return []
+        
+        if not scores:
+            return []
+        
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        if limit is not None:
+            ranked = ranked[:limit]
+        results = []
+        for op_id, score in ranked:
+            endpoint, method, operation_id = operations[op_id]
+            results.append({
+                "endpoint": endpoint,
+                "method": method.upper(),
+                "operation_id": operation_id,
+                "score": round(score, 4),
+                "matched_fields": sorted(matched_fields[op_id]),
+            })
+        return results
+    
+    def search_endpoints(self, query: str) -> List[str]:
+        """
+        Search for endpoints containing the query string (legacy method).
+        
+        Kept with its original substring semantics: paths containing the
+        query are returned bare, other paths as "path (METHOD)" for the
+        first operation whose description or operationId contains it, in
+        spec order. Use search() for ranked, token-based search.
+        """
+        needle = query.lower()
+        results = []
+        for endpoint, methods in self.schema.get("paths", {}).items():
+            if needle in endpoint.lower():
+                results.append(endpoint)
+                continue
+            for method, details in methods.items():
+                if not isinstance(details, dict):
+                    continue
+                description = str(details.get("description", "")).lower()
+                operation_id = str(details.get("operationId", "")).lower()
+                if needle in description or needle in operation_id:
+                    results.append(f"{endpoint} ({method.upper()})")
+                    break
+        return results
+    
+    def get_endpoint_summary(self, endpoint: str) -> Dict[str, Any]:
+        """Get endpoint summary (enhanced version)."""
+        return self.get_endpoint_analysis(endpoint)
+    
+    def _build_component_hashes(self) -> Dict[str, str]:
+        """Build the content hash of every component's own definition."""
+        return {name: _content_hash(schema_def) for name, schema_def in self.schemas.items()}
+    
+    def _build_merkle_hashes(self, reuse: Optional[Dict[str, Any]] = None,
+                             stale: Set[str] = frozenset()) -> Dict[str, Any]:
+        """
+        Build hashes that fold each node's dependencies into its own hash.
+        
+        A component's deep hash covers its definition and the deep hashes
+        of everything it references, so it changes whenever anything it
+        reaches changes. Components are hashed one SCC at a time in Tarjan
+        order; members of a cycle share a hash over the whole SCC.
+        Operations are keyed "METHOD /path" and hashed together with the
+        path-level fields (shared parameters, servers, ...).
+        
+        Args:
+            reuse: Hashes of a previous version of the spec, with only the
+                operations whose path item is unchanged
+            stale: Components whose deep hash may differ from the one in
+                reuse; the other hashes are kept as they are
+            
+        Returns:
+            Dictionary with the deep hash of every component, and the own
+            hash, deep hash and direct refs of every operation
+        """
+        graph = self._get_index("ref_graph")
+        sccs = self._get_index("ref_sccs")
+        own = self._get_index("component_hashes")
+        component_of = sccs["component_of"]
+        deep: Dict[str, str] = {}
+        
+        old_deep = reuse["components"] if reuse else {}
+        for scc_id, scc in enumerate(sccs["members"]):
+            if all(member in old_deep and member not in stale for member in scc):
+                for member in scc:
+                    deep[member] = old_deep[member]
+                continue
+            external = sorted({
+                deep[dep] for member in scc for dep in graph[member]
+                if dep in deep and component_of[dep] != scc_id
+            })
+            missing = sorted({
+                dep for member in scc for dep in graph[member] if dep not in component_of
+            })
+            scc_hash = _content_hash([[(member, own[member]) for member in scc], external, missing])
+            for member in scc:
+                deep[member] = scc_hash if len(scc) == 1 else _content_hash([member, scc_hash])
+        
+        operations = {}
+        for endpoint, method, method_data, path_item in self._iter_operations():
+            key = f"{method.upper()} {endpoint}"
+            previous = reuse["operations"].get(key) if reuse else None
+            if previous is not None and not stale.intersection(previous[2]):
+                operations[key] = previous
+                continue
+            if previous is not None:
+                own_hash, _, refs = previous
+            else:
+                shared = {name: value for name, value in path_item.items() if name not in HTTP_METHODS}
+                refs = sorted(self._collect_direct_refs([shared, method_data]))
+                own_hash = _content_hash([shared, method_data])
+            deep_hash = _content_hash([own_hash, [(name, deep.get(name)) for name in refs]])
+            operations[key] = (own_hash, deep_hash, refs)
+        
+        return {"components": deep, "operations": operations}
+    
+    def _operation_definition(self, key: str) -> Dict[str, Any]:
+        """Return an operation and its path-level fields, keyed "METHOD /path"."""
+        method, endpoint = key.split(" ", 1)
+        path_item = self.schema.get("paths", {}).get(endpoint, {})
+        shared = {name: value for name, value in path_item.items() if name not in HTTP_METHODS}
+        return {**shared, **path_item.get(method.lower(), {})}
+    
+    def diff_schema(self, new: "APIExplorer", pointers: bool = True) -> Dict[str, Any]:
+        """
+        Compare this (old) spec with a new version of it.
+        
+        Only Merkle hashes are compared: an operation or component is
+        looked at more closely only when its hash differs, and pointer-level
+        changes are found by descending only into subtrees whose hashes
+        differ. Operations and components whose own definition is unchanged
+        but that reach a changed component are reported as affected, with
+        the directly referenced components the change came through.
+        
+        Args:
+            new: Explorer over the new spec
+            pointers: Include the JSON pointers that changed in every
+                modified operation and component
+            
+        Returns:
+            Dictionary with a summary and the added, removed, modified and
+            affected operations and components
+        """
+        old_hashes = self._get_index("merkle_hashes")
+        new_hashes = new._get_index("merkle_hashes")
+        old_own = self._get_index("component_hashes")
+        new_own = new._get_index("component_hashes")
+        old_deep = old_hashes["components"]
+        new_deep = new_hashes["components"]
+        
+        def changed_refs(refs: List[str]) -> List[str]:
+            return [name for name in refs if old_deep.get(name) != new_deep.get(name)]
+        
+        components: Dict[str, Any] = {
+            "added": sorted(name for name in new_deep if name not in old_deep),
+            "removed": sorted(name for name in old_deep if name not in new_deep),
+            "modified": {},
+            "affected": {},
+        }
+        new_graph = new._get_index("ref_graph")
+        for name in sorted(old_deep):
+            if name not in new_deep or old_deep[name] == new_deep[name]:
+                continue
+            if old_own[name] != new_own[name]:
+                components["modified"][name] = (
+                    _diff_pointers(self.schemas[name], new.schemas[name]) if pointers else []
+                )
+            else:
+                components["affected"][name] = changed_refs(new_graph[name])
+        
+        old_ops = old_hashes["operations"]
+        new_ops = new_hashes["operations"]
+        operations: Dict[str, Any] = {
+            "added": [key for key in new_ops if key not in old_ops],
+            "removed": [key for key in old_ops if key not in new_ops],
+            "modified": {},
+            "affected": {},
+        }
+        for key, (own_hash, deep_hash, refs) in new_ops.items():
+            previous = old_ops.get(key)
+            if previous is None or previous[1] == deep_hash:
+                continue
+            if previous[0] != own_hash:
+                operations["modified"][key] = (
+                    _diff_pointers(self._operation_definition(key), new._operation_definition(key))
+                    if pointers else []
+                )
+            else:
+                operations["affected"][key] = changed_refs(refs)
+        
+        summary = {
+            f"{section}_{kind}": len(entries[kind])
+            for section, entries in (("operations", operations), ("components", components))
+            for kind in ("added", "removed", "modified", "affected")
+        }
+        return {
+            "old": str(self.schema_file),
+            "new": str(new.schema_file),
+            "summary": summary,
+            "operations": operations,
+            "components": components,
+        }
+    
+    def reload_if_changed(self) -> Optional[Tuple["APIExplorer", Dict[str, Any]]]:
+        """
+        Load the schema file again if it changed since this explorer read it.
+        
+        The new version gets a new explorer, whose indexes are updated from
+        this one's (see _update_indexes), so only the entries of changed
+        components and paths are recomputed. This explorer is not modified
+        and can keep answering queries meanwhile.
+        
+        Returns:
+            Tuple of (new explorer, change report), or None when the file's
+            size and mtime are unchanged. The report is diff_schema() without
+            pointers, plus the added, removed and modified paths, the
+            rebuilt and reused entries per index, and the reload time.
+            
+        Raises:
+            SchemaLoadError: If the new version cannot be loaded
+        """
+        try:
+            stat = self.schema_file.stat()
+        except OSError:
+            return None
+        key = self._cache_key or {}
+        if (stat.st_size, stat.st_mtime_ns) == (key.get("size"), key.get("mtime_ns")):
+            return None
+        
+        started = time.perf_counter()
+        new = APIExplorer(str(self.schema_file), use_cache=self.use_cache, lazy=self.lazy,
+                          lazy_cache_size=self.lazy_cache_size, profile=self.profile, previous=self)
+        changes = self.diff_schema(new, pointers=False)
+        old_paths = self.schema.get("paths", {})
+        new_paths = new.schema.get("paths", {})
+        added = [endpoint for endpoint in new_paths if endpoint not in old_paths]
+        removed = [endpoint for endpoint in old_paths if endpoint not in new_paths]
+        touched = {
+            key.split(" ", 1)[1]
+            for kind in ("added", "removed", "modified", "affected")
+            for key in changes["operations"][kind]
+        }
+        changes["paths"] = {
+            "added": added,
+            "removed": removed,
+            "modified": sorted(touched.difference(added, removed)),
+        }
+        for kind, endpoints in changes["paths"].items():
+            changes["summary"][f"paths_{kind}"] = len(endpoints)
+        changes["indexes"] = new._index_updates
+        changes["seconds"] = round(time.perf_counter() - started, 3)
+        return new, changes
+    
+    def endpoint_input_hash(self, endpoint: str, options: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Hash everything an endpoint's resolved form depends on.
+        
+        Combines the path item, the hashes of every component it reaches and
+        the export options, so the hash changes exactly when the resolved
+        output can change.
+        
+        Args:
+            endpoint: Endpoint path
+            options: Resolution options included in the hash
+            
+        Returns:
+            Hex SHA-256 digest
+        """
+        component_hashes = self._get_index("component_hashes")
+        refs = self._expand_refs(self._path_direct_refs(endpoint))
+        return _content_hash({
+            "format": EXPORT_FORMAT_VERSION,
+            "options": options or {},
+            "definition": self.schema.get("paths", {}).get(endpoint),
+            "components": {name: component_hashes.get(name) for name in sorted(refs)},
+        })
+    
+    def _warm_resolved_components(self):
+        """Resolve every component once so forked workers inherit the memo."""
+        for name in self.schemas:
+            self._resolve_all_refs({"$ref": f"#/components/schemas/{name}"})
+    
+    def export_all(self, out_dir: str, workers: Optional[int] = None,
+                   shared_defs: bool = False, max_depth: Optional[int] = None,
+                   max_nodes: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Write the resolved definition of every endpoint to its own file.
+        
+        Endpoints whose input hash matches the previous manifest (and whose
+        file is intact) are skipped; the rest are resolved across a process
+        pool that inherits the pre-resolved components. Files are only
+        rewritten when their bytes change, and files of endpoints that no
+        longer exist are removed.
+        
+        Args:
+            out_dir: Output directory (created if missing)
+            workers: Worker processes (default: CPU count)
+            shared_defs: Export the "$defs" form instead of inlined schemas
+            max_depth: Maximum nested $ref expansions
+            max_nodes: Maximum number of objects per expanded definition
+            
+        Returns:
+            Summary with counts of written, unchanged and removed files
+        """
+        options = {"shared_defs": shared_defs, "max_depth": max_depth, "max_nodes": max_nodes}
+        entries: Dict[str, Dict[str, Any]] = {}
+        used_names: Set[str] = set()
+        for endpoint in self.schema.get("paths", {}):
+            file_name = _EXPORT_NAME_RE.sub("_", endpoint.strip("/").replace("/", ".")) or "root"
+            if file_name.lower() in used_names:
+                file_name += "." + hashlib.sha1(endpoint.encode("utf-8")).hexdigest()[:8]
+            used_names.add(file_name.lower())
+            entries[endpoint] = {"file": file_name + ".json",
+                                 "input_hash": self.endpoint_input_hash(endpoint, options)}
+        
+        def write(out_path: Path, stale: List[str]):
+            tasks = [(endpoint, str(out_path / entries[endpoint]["file"]), options) for endpoint in stale]
+            count = workers or os.cpu_count() or 1
+            if count > 1 and len(tasks) > 1:
+                self._warm_resolved_components()
+                chunks = list(_chunked(tasks, max(1, len(tasks) // (count * 4))))
+                with _worker_pool(self, count) as pool:
+                    return [r for chunk in pool.imap(_export_worker, chunks) for r in chunk]
+            return _export_endpoints(self, tasks)
+        
+        summary = _sync_output_dir(out_dir, EXPORT_MANIFEST, "endpoints", entries, write, {
+            "schema_file": str(self.schema_file),
+            "format": EXPORT_FORMAT_VERSION,
+            "options": options,
+        })
+        return {
+            "out_dir": summary["out_dir"],
+            "total_endpoints": summary["total"],
+            "resolved": summary["generated"],
+            "written": summary["written"],
+            "unchanged": summary["unchanged"],
+            "removed": summary["removed"],
+        }
+    
+    def generate_dart_models(self, out_dir: str, components: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Generate Dart model classes for components and their dependencies.
+        
+        Every selected component is expanded with get_schema_with_dependencies
+        so the models it uses are generated too. A manifest in out_dir maps
+        each component to the Merkle hash of its transitive definition;
+        components whose hash is unchanged are not rendered again, and files
+        are only rewritten when their bytes change, so Flutter's
+        incremental build only sees models that really changed. A full run
+        removes the files of models that are no longer generated; a run
+        over selected components keeps the other models already in out_dir
+        and only removes those whose component left the spec.
+        
+        Args:
+            out_dir: Output directory (created if missing)
+            components: Component names to generate (default: all)
+            
+        Returns:
+            Summary with counts of generated, written, unchanged and removed files
+            
+        Raises:
+            ValueError: If a selected component does not exist
+        """
+        selected = sorted(self.schemas) if components is None else list(components)
+        unknown = [name for name in selected if name not in self.schemas]
+        if unknown:
+            raise ValueError(f"Component(s) not found: {', '.join(unknown)}")
+        
+        from api_explorer_dart import DART_GENERATOR_VERSION, DART_MODELS_MANIFEST, DartModelGenerator
+        generator = DartModelGenerator(self.schemas)
+        targets: Set[str] = set()
+        for name in selected:
+            if name not in targets:
+                targets.add(name)
+                targets.update(self.get_schema_with_dependencies(name)["dependencies"])
+        targets = {name for name in targets if generator.kind_of(name) != "alias"}
+        
+        deep_hashes = self._get_index("merkle_hashes")["components"]
+        entries = {
+            name: {"file": generator.file_names[name],
+                   "hash": _content_hash([DART_GENERATOR_VERSION, deep_hashes[name]])}
+            for name in sorted(targets)
+        }
+        
+        def write(out_path: Path, stale: List[str]):
+            for name in stale:
+                yield (name, *_write_if_changed(out_path / entries[name]["file"], generator.render(name)))
+        
+        def keep(name: str, old: Dict[str, Any]) -> bool:
+            # A partial run leaves the models of other components alone.
+            return (components is not None and name in self.schemas
+                    and generator.kind_of(name) != "alias"
+                    and old.get("file") == generator.file_names.get(name))
+        
+        summary = _sync_output_dir(out_dir, DART_MODELS_MANIFEST, "components", entries, write, {
+            "schema_file": str(self.schema_file),
+            "format": DART_GENERATOR_VERSION,
+        }, keep)
+        return {
+            "out_dir": summary["out_dir"],
+            "total_models": summary["total"],
+            "generated": summary["generated"],
+            "written": summary["written"],
+            "unchanged": summary["unchanged"],
+            "removed": summary["removed"],
+        }
+    
+    def audit_operations(self, prefix: str = "") -> List[Dict[str, Any]]:
+        """Statically audit the response payload of every operation (see api_explorer_audit)."""
+        from api_explorer_audit import audit_operations
+        return audit_operations(self, prefix)
+    
+    def operation_validator(self, endpoint: str, method: str):
+        """Return the compiled validator of one operation (see api_explorer_validate)."""
+        from api_explorer_validate import operation_validator
+        return operation_validator(self, endpoint, method)
+    
+    def validate_record(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Check one captured request/response against the spec (see api_explorer_validate)."""
+        from api_explorer_validate import validate_record
+        return validate_record(self, record)
+    
+    # Operations accepted by query(), mapped to the method answering them.
+    QUERY_METHODS = {
+        "prefix": "get_complete_endpoints_by_prefix",
+        "endpoint": "get_complete_endpoint",
+        "analysis": "get_endpoint_analysis",
+        "summary": "get_endpoint_analysis",
+        "resolved": "get_endpoint_with_full_schemas",
+        "schema": "get_schema_with_dependencies",
+        "match": "match_url",
+        "used-by": "get_schema_usage",
+        "search": "search",
+        "list-endpoints": "list_all_endpoints",
+        "list-schemas": "list_schema_components",
+    }
+    
+    def query(self, op: str, arg: Any = None, **options) -> Any:
+        """
+        Answer one named operation, as used by batch mode and the daemon.
+        
+        Args:
+            op: Operation name, one of QUERY_METHODS (e.g. "analysis")
+            arg: The operation's argument (endpoint, schema name, query, ...)
+            **options: Extra keyword arguments for the underlying method,
+                e.g. level, limit, fuzzy, max_depth
+            
+        Returns:
+            The method's result; None or {} when nothing was found
+            
+        Raises:
+            ValueError: If the operation is unknown or arg is not a string
+        """
+        method_name = self.QUERY_METHODS.get(op) if isinstance(op, str) else None
+        if method_name is None:
+            raise ValueError(f"Unknown operation '{op}'")
+        if arg is not None and not isinstance(arg, str):
+            raise ValueError(f"Operation '{op}' needs a string 'arg'")
+        method = getattr(self, method_name)
+        if op.startswith("list-"):
+            return method(**options) if arg is None else method(arg, **options)
+        if arg is None:
+            raise ValueError(f"Operation '{op}' needs an 'arg'")
+        return method(arg, **options)
+    
+    def print_formatted_output(self, data: Any, title: str = "", out=None):
+        """
+        Print formatted JSON output.
+        
+        The JSON is written incrementally as it is encoded, so output starts
+        immediately and no single string of the whole document is built.
+        """
+        out = out if out is not None else sys.stdout
+        with self._phase("output"):
+            if title:
+                out.write(f"\n=== {title} ===\n")
+            buffered = []
+            size = written = 0
+            for chunk in _iter_json(data):
+                buffered.append(chunk)
+                size += len(chunk)
+                if size >= STREAM_CHUNK_SIZE:
+                    out.write("".join(buffered))
+                    buffered.clear()
+                    written += size
+                    size = 0
+            buffered.append("\n")
+            out.write("".join(buffered))
+        if self.profile is not None:
+            self.profile.count("output.chars", written + size + 1)
+    
+    def write_ndjson(self, records, out=None):
+        """Write records as newline-delimited compact JSON, one per line."""
+        out = out if out is not None else sys.stdout
+        encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+        count = 0
+        with self._phase("output"):
+            for record in records:
+                out.write(encode(record) + "\n")
+                count += 1
+        if self.profile is not None:
+            self.profile.count("output.records", count)
+
+
+# Query options handled by run_query(), in the order they are checked.
+QUERY_OPTIONS = (
+    "prefix", "endpoint", "analysis", "resolved", "schema", "match", "used_by",
+    "summary", "list_endpoints", "list_schemas", "search", "extract",
+)
+
+
+def run_query(explorer: APIExplorer, args: argparse.Namespace, out) -> int:
+    """
+    Run the query selected by the parsed CLI arguments.
+    
+    Args:
+        explorer: Loaded API explorer
+        args: Parsed command line arguments
+        out: Text stream the results are written to
+        
+    Returns:
+        Exit status: 1 if nothing was found in --ndjson mode, where the
+        miss is written as an {"error": ...} record, otherwise 0
+    """
+    ndjson = args.ndjson
+    status = 0
+    
+    def emit(result: Any, title: str):
+        if ndjson:
+            explorer.write_ndjson([result], out)
+        else:
+            explorer.print_formatted_output(result, title, out)
+    
+    def say(message: str):
+        nonlocal status
+        if ndjson:
+            explorer.write_ndjson([{"error": message}], out)
+            status = 1
+        else:
+            out.write(message + "\n")
+    
+    # Handle different operations
+    if args.prefix:
+        if ndjson:
+            explorer.write_ndjson(explorer.iter_complete_endpoints_by_prefix(args.prefix), out)
+        else:
+            result = explorer._stream_complete_endpoints_by_prefix(args.prefix)
+            explorer.print_formatted_output(
+                result, f"Complete endpoints starting with '{args.prefix}'", out
+            )
+    
+    elif args.endpoint:
+        result = explorer.get_complete_endpoint(args.endpoint)
+        if result:
+            emit(result, f"Complete endpoint: {args.endpoint}")
+        else:
+            say(f"Endpoint '{args.endpoint}' not found.")
+    
+    elif args.analysis:
+        result = explorer.get_endpoint_analysis(args.analysis)
+        if result:
+            emit(result, f"Endpoint analysis: {args.analysis}")
+        else:
+            say(f"Endpoint '{args.analysis}' not found.")
+    
+    elif args.resolved:
+        result = explorer.get_endpoint_with_full_schemas(
+            args.resolved, max_depth=args.max_depth, max_nodes=args.max_nodes,
+            shared_defs=args.defs,
+        )
+        if result:
+            emit(result, f"Fully resolved endpoint: {args.resolved}")
+        else:
+            say(f"Endpoint '{args.resolved}' not found.")
+    
+    elif args.extract:
+        selectors: Dict[str, List[str]] = {"prefixes": [], "tags": [], "operation_ids": []}
+        for selector in args.extract:
+            if selector.startswith("tag:"):
+                selectors["tags"].append(selector[4:])
+            elif selector.startswith("op:"):
+                selectors["operation_ids"].append(selector[3:])
+            else:
+                selectors["prefixes"].append(selector)
+        result = explorer.extract_spec(**{key: tuple(values) for key, values in selectors.items()})
+        if result["paths"]:
+            # No title: the output is the document itself, ready to redirect.
+            emit(result, "")
+        else:
+            say(f"No operations match {' '.join(args.extract)}.")
+    
+    elif args.schema:
+        result = explorer.get_schema_with_dependencies(args.schema)
+        if result:
+            emit(result, f"Schema with dependencies: {args.schema}")
+        else:
+            say(f"Schema component '{args.schema}' not found.")
+    
+    elif args.match:
+        result = explorer.match_url(args.match)
+        if result:
+            emit(result, f"Template for URL: {args.match}")
+        else:
+            say(f"No endpoint matches URL '{args.match}'.")
+    
+    elif args.used_by:
+        result = explorer.get_schema_usage(args.used_by)
+        if result:
+            emit(result, f"Operations using schema: {args.used_by}")
+        elif args.used_by in explorer.schemas:
+            if ndjson:
+                emit({"schema_name": args.used_by, "request": [], "response": [], "parameter": [],
+                      "operation_count": 0}, "")
+            else:
+                say(f"Schema component '{args.used_by}' is not used by any operation.")
+        else:
+            say(f"Schema component '{args.used_by}' not found.")
+    
+    elif args.summary:
+        result = explorer.get_endpoint_analysis(args.summary)
+        if result:
+            emit(result, f"Endpoint summary: {args.summary}")
+        else:
+            say(f"Endpoint '{args.summary}' not found.")
+    
+    elif args.list_endpoints:
+        records = explorer.iter_endpoint_records(args.level)
+        if ndjson:
+            explorer.write_ndjson(records, out)
+        else:
+            out.write(f"\n=== All Endpoints (Level {args.level}) ===\n")
+            for record in records:
+                out.write(explorer._format_endpoint_record(record, args.level) + "\n")
+    
+    elif args.list_schemas:
+        records = explorer.iter_schema_records(args.level)
+        if ndjson:
+            explorer.write_ndjson(records, out)
+        else:
+            out.write(f"\n=== All Schema Components (Level {args.level}) ===\n")
+            for record in records:
+                out.write(explorer._format_schema_record(record, args.level) + "\n")
+    
+    elif args.search:
+        results = explorer.search(args.search, prefix=args.partial, fuzzy=args.fuzzy,
+                                  limit=args.limit)
+        if ndjson:
+            explorer.write_ndjson(results, out)
+            return status
+        out.write(f"\n=== Search Results for '{args.search}' ===\n")
+        for result in results:
+            line = f"{result['endpoint']} ({result['method']})"
+            if args.level >= 2:
+                line += f" - {result['operation_id']}"
+            if args.level == 3:
+                line += f" [{result['score']}: {', '.join(result['matched_fields'])}]"
+            out.write(line + "\n")
+    
+    return status
+
+
+# Batch lines handed to a worker process at a time.
+BATCH_CHUNK_SIZE = 32
+
+_worker_explorer: Optional[APIExplorer] = None
+
+
+def _answer_batch_lines(explorer: APIExplorer, lines: List[Tuple[int, str]]) -> List[str]:
+    """
+    Answer a chunk of JSONL query records.
+    
+    Args:
+        explorer: Loaded API explorer
+        lines: (line number, raw line) pairs
+        
+    Returns:
+        One compact JSON result line per non-blank input line
+    """
+    encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    answers = []
+    for line_number, line in lines:
+        if not line.strip():
+            continue
+        response: Dict[str, Any] = {"line": line_number}
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("query record must be a JSON object")
+            for key in ("id", "request_id"):
+                if key in record:
+                    response[key] = record[key]
+            response["op"] = record.get("op")
+            response["arg"] = record.get("arg")
+            options = record.get("options", {})
+            if not isinstance(options, dict):
+                raise ValueError("'options' must be a JSON object")
+            response["result"] = explorer.query(record.get("op"), record.get("arg"), **options)
+        except Exception as e:
+            # One bad record gets an error answer; the rest of the batch goes on.
+            response["error"] = str(e) if isinstance(e, (ValueError, TypeError)) else f"{type(e).__name__}: {e}"
+        answers.append(encode(response))
+    return answers
+
+
+def _init_batch_worker(explorer_options: Dict[str, Any]):
+    """Load the explorer in a worker unless it was inherited through fork."""
+    global _worker_explorer
+    if _worker_explorer is None:
+        _worker_explorer = APIExplorer(**explorer_options)
+
+
+def _batch_worker(lines: List[Tuple[int, str]]) -> List[str]:
+    """Answer a chunk of batch lines in a worker process."""
+    return _answer_batch_lines(_worker_explorer, lines)
+
+
+def _export_endpoints(explorer: APIExplorer,
+                      tasks: List[Tuple[str, str, Dict[str, Any]]]) -> List[Tuple[str, bool, str]]:
+    """
+    Resolve endpoints and write each one to its file.
+    
+    Args:
+        explorer: Loaded API explorer
+        tasks: (endpoint, file path, resolution options) triples
+        
+    Returns:
+        (endpoint, whether the file was written, content SHA-256) triples
+    """
+    results = []
+    for endpoint, file_path, options in tasks:
+        resolved = explorer.get_endpoint_with_full_schemas(endpoint, **options)
+        text = json.dumps(resolved, indent=2, ensure_ascii=False) + "\n"
+        changed, digest = _write_if_changed(Path(file_path), text)
+        results.append((endpoint, changed, digest))
+    return results
+
+
+def _export_worker(tasks: List[Tuple[str, str, Dict[str, Any]]]) -> List[Tuple[str, bool, str]]:
+    """Export a chunk of endpoints in a worker process."""
+    return _export_endpoints(_worker_explorer, tasks)
+
+
+def _chunked(iterable, size: int):
+    """Group an iterable into lists of at most size items."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _worker_pool(explorer: APIExplorer, workers: int, initializer=None, initargs=()):
+    """
+    Create a process pool whose workers share the loaded explorer.
+    
+    With the fork start method the workers inherit the parsed schema and
+    indexes; elsewhere they load it again, which the schema cache makes cheap.
+    """
+    import multiprocessing
+    global _worker_explorer
+    _worker_explorer = explorer
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    explorer_options = {
+        "schema_file": str(explorer.schema_file),
+        "use_cache": explorer.use_cache,
+        "lazy": explorer.lazy,
+        "lazy_cache_size": explorer.lazy_cache_size,
+    }
+    if initializer is None:
+        initializer, initargs = _init_batch_worker, (explorer_options,)
+    return context.Pool(workers, initializer=initializer, initargs=initargs)
+
+
+def _bounded_imap(pool, func, tasks, window: int):
+    """
+    Like pool.imap(), but with at most window tasks in flight.
+    
+    Pool.imap() drains its input eagerly, which would read a whole input
+    file into memory; this keeps memory constant on unbounded streams.
+    """
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.apply_async(func, (task,)))
+        if len(pending) >= window:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def run_batch(explorer: APIExplorer, lines, out, workers: int = 1) -> None:
+    """
+    Answer JSONL query records against one loaded explorer.
+    
+    Each input line is a record such as {"op": "analysis", "arg": "/api/..."}
+    with optional "options" and "id"; each output line echoes the op, arg,
+    id and line number with either a "result" or an "error", in input order.
+    
+    Args:
+        explorer: Loaded API explorer
+        lines: Iterable of input lines
+        out: Text stream the JSONL results are written to
+        workers: Number of worker processes (1 answers in-process)
+    """
+    chunks = _chunked(enumerate(lines, 1), BATCH_CHUNK_SIZE)
+    if workers <= 1:
+        for chunk in chunks:
+            for answer in _answer_batch_lines(explorer, chunk):
+                out.write(answer + "\n")
+        return
+    
+    with _worker_pool(explorer, workers) as pool:
+        for answers in _bounded_imap(pool, _batch_worker, chunks, workers * 4):
+            for answer in answers:
+                out.write(answer + "\n")
+
+
+def _format_table(table: List[Tuple[str, ...]], left: Tuple[int, ...] = ()) -> List[str]:
+    """Align rows of cells (the first being the header) into text lines; columns in left are left-aligned."""
+    widths = [max(len(cells[column]) for cells in table) for column in range(len(table[0]))]
+    return [
+        "  ".join(cell.ljust(width) if column in left else cell.rjust(width)
+                  for column, (cell, width) in enumerate(zip(cells, widths))).rstrip()
+        for cells in table
+    ]
+
+
+def _write_csv(rows: List[Dict[str, Any]], out) -> None:
+    """Write flat rows as CSV with a header; lists are joined with ';' and None is empty."""
+    if not rows:
+        return
+    import csv
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(list(rows[0]))
+    for row in rows:
+        writer.writerow([
+            ";".join(map(str, value)) if isinstance(value, list) else "" if value is None else value
+            for value in row.values()
+        ])
+
+
+def run_operation_analysis(explorer: APIExplorer, args: argparse.Namespace, out) -> None:
+    """Run --analyze-all: one JSONL row per operation, or CSV with --csv."""
+    with explorer._phase("analyze_all"):
+        rows = explorer.iter_operation_analysis(args.analyze_all)
+        if args.csv:
+            _write_csv(list(rows), out)
+        else:
+            explorer.write_ndjson(rows, out)
+
+
+class SchemaWatcher:
+    """
+    Follow a schema file and keep an up-to-date explorer for it.
+    
+    Every check() reloads the file if it changed (see
+    APIExplorer.reload_if_changed) and swaps in the new explorer, so
+    readers holding the previous one never see a half-updated state.
+    Subscribers are called with the new explorer and the change report
+    whenever the spec's content changed; a file that was only touched
+    or rewritten with the same content notifies no one.
+    """
+    
+    def __init__(self, explorer: APIExplorer, interval: float = 1.0):
+        self.explorer = explorer
+        self.interval = interval
+        self._subscribers: List[Callable[[APIExplorer, Dict[str, Any]], None]] = []
+        self._failed: Optional[Tuple[int, int]] = None
+        if explorer.lazy:
+            # A file rewritten in place invalidates the memory map, so take
+            # the hashes the next diff compares against while it is intact.
+            explorer._get_index("merkle_hashes")
+    
+    def subscribe(self, callback: Callable[[APIExplorer, Dict[str, Any]], None]):
+        """Call callback(explorer, changes) after every change of the spec."""
+        self._subscribers.append(callback)
+    
+    def unsubscribe(self, callback: Callable[[APIExplorer, Dict[str, Any]], None]):
+        """Stop notifying a subscriber."""
+        self._subscribers.remove(callback)
+    
+    def check(self) -> Optional[Dict[str, Any]]:
+        """
+        Reload the schema if its file changed, and notify the subscribers.
+        
+        A version that fails to load is reported on stderr once, and the
+        previous explorer is kept until the file changes again. Errors
+        raised by a subscriber are reported on stderr as well.
+        
+        Returns:
+            The change report, or None when the spec did not change
+        """
+        try:
+            stat = self.explorer.schema_file.stat()
+        except OSError:
+            return None
+        signature = (stat.st_size, stat.st_mtime_ns)
+        if signature == self._failed:
+            return None
+        current = self.explorer
+        try:
+            reloaded = current.reload_if_changed()
+        except Exception as e:
+            # SchemaLoadError for an invalid file, or a bug in the update.
+            self._failed = signature
+            print(f"Reload of '{current.schema_file}' failed, keeping the previous version: {e}",
+                  file=sys.stderr)
+            return None
+        self._failed = None
+        if reloaded is None:
+            return None
+        self.explorer, changes = reloaded
+        if not any(changes["summary"].values()):
+            return None
+        for callback in list(self._subscribers):
+            try:
+                callback(self.explorer, changes)
+            except Exception as e:
+                # A failing subscriber (e.g. a full disk during an export)
+                # must not stop the others or the watch itself.
+                print(f"Subscriber {getattr(callback, '__name__', callback)} failed: {e}", file=sys.stderr)
+        return changes
+    
+    def run(self, stop: Optional[Callable[[], bool]] = None):
+        """Check every interval seconds until stop() returns True."""
+        while stop is None or not stop():
+            self.check()
+            time.sleep(self.interval)
+
+
+def run_watch(explorer: APIExplorer, args: argparse.Namespace, out) -> None:
+    """
+    Run --watch: print a change report whenever the schema file changes.
+    
+    With --export-all and/or --dart-models the outputs are generated once
+    up front and regenerated after every change; both only rewrite the
+    files whose inputs changed.
+    
+    Args:
+        explorer: Loaded API explorer
+        args: Parsed arguments (reload interval, export and codegen options)
+        out: Text stream the change reports are written to
+    """
+    watcher = SchemaWatcher(explorer, interval=args.reload_interval)
+    
+    def regenerate(current: APIExplorer, changes: Optional[Dict[str, Any]] = None):
+        if args.export_all:
+            summary = current.export_all(
+                args.export_all, workers=args.workers, shared_defs=args.defs,
+                max_depth=args.max_depth, max_nodes=args.max_nodes,
+            )
+            print(f"Exported {summary['total_endpoints']} endpoints to '{summary['out_dir']}': "
+                  f"{summary['written']} written, {summary['unchanged']} unchanged, "
+                  f"{summary['removed']} removed", file=sys.stderr)
+        if args.dart_models:
+            try:
+                summary = current.generate_dart_models(args.dart_models, args.components)
+            except ValueError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                return
+            print(f"Generated {summary['total_models']} Dart models in '{summary['out_dir']}': "
+                  f"{summary['written']} written, {summary['unchanged']} unchanged, "
+                  f"{summary['removed']} removed", file=sys.stderr)
+    
+    def report(current: APIExplorer, changes: Dict[str, Any]):
+        out.write(_encode_compact(changes) + "\n")
+        out.flush()
+    
+    watcher.subscribe(report)
+    if args.export_all or args.dart_models:
+        regenerate(explorer)
+        watcher.subscribe(regenerate)
+    print(f"Watching '{explorer.schema_file}' every {args.reload_interval:g}s", file=sys.stderr)
+    watcher.run()
+
+
+def _encode_compact(data: Any) -> str:
+    """Encode data as compact single-line JSON."""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def build_parser(parser_class=argparse.ArgumentParser) -> argparse.ArgumentParser:
+    """Build the command line parser (also used by the daemon for client requests)."""
+    parser = parser_class(
+        description="Explore API endpoints and schemas from OpenAPI JSON file with complete schema resolution",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Get all client endpoints with complete schemas
+  python3 api_explorer.py --prefix "/api/v1/clients"
+  
+  # Get specific endpoint with all related schemas
+  python3api_explorer.py --endpoint "/api/v1/clients/stats/"
+  
+  # Get complete endpoint analysis
+  python3 api_explorer.py --analysis "/api/v1/invoices/{id}/"
+  
+  # Get schema with all dependencies
+  python3 api_explorer.py --schema "AccessLevelEnum"
+  
+  # Get endpoint with fully resolved schemas (no $ref)
+  python3 api_explorer.py --resolved "/api/v1/clients/"
+  
+  # Same, but emit every component once under "$defs"
+  python3 api_explorer.py --resolved "/api/v1/clients/" --defs
+  
+  # List the operations that use a schema, directly or transitively
+  python3 api_explorer.py --used-by "Bus"
+  
+  # Stream one compact record per endpoint, e.g. into jq
+  python3 api_explorer.py --prefix "/api/v1/" --ndjson | jq .endpoint
+  
+  # Answer many queries against one loaded schema
+  echo '{"op": "analysis", "arg": "/api/v1/buses/buses/"}' | python3 api_explorer.py --batch -
+  
+  # Export every endpoint's resolved definition (incremental on re-runs)
+  python3 api_explorer.py --export-all build/api_endpoints
+  
+  # Regenerate the Dart models for some components (unchanged files are left alone)
+  python3 api_explorer.py --dart-models lib/models/generated --components Bus Trip
+  
+  # Where does a slow query spend its time?
+  python3 api_explorer.py --resolved /api/v1/buses/buses/ --profile > /dev/null
+  python3 api_explorer.py --resolved /api/v1/buses/buses/ --profile-dump resolved.prof
+  
+  # Local mock backend with 20-50 ms latency and 1% server errors
+  python3 api_explorer.py --mock --port 8000 --mock-latency 20 --mock-jitter 30 --mock-error-rate 0.01
+  
+  # Check captured traffic against the spec; only violations are printed
+  python3 api_explorer.py --validate traffic.jsonl --workers 4 > violations.jsonl
+  
+  # Hot operations in a JSONL access log, by total time spent
+  python3 api_explorer.py --analyze-log access.jsonl --rank-by total-time --limit 20
+  
+  # Analyze shards separately, then merge their sketches
+  python3 api_explorer.py --analyze-log shard1.jsonl --save-sketches shard1.json
+  python3 api_explorer.py --merge-sketches shard1.json shard2.json --rank-by p99
+  
+  # Heaviest responses and list endpoints without pagination, as CSV
+  python3 api_explorer.py --audit /api/v1/tracking/ --csv > audit.csv
+  
+  # One row per operation: tags, security, parameters, schemas (fast enough for pre-commit)
+  python3 api_explorer.py --analyze-all --csv > operations.csv
+  
+  # Standalone minimal spec for the offline and gamification screens
+  python3 api_explorer.py --extract /api/v1/offline/ tag:gamification > app_subset.json
+  
+  # Follow schema edits: a JSON change report per edit, exports kept up to date
+  python3 api_explorer.py --watch --export-all build/api_endpoints --dart-models lib/models/generated
+  
+  # What changed between two schema versions
+  python3 api_explorer.py --diff old_api_schema.json api_schema.json
+  
+  # Keep the schema loaded in a daemon and forward queries to it
+  python3 api_explorer.py --serve &
+  python3 api_explorer.py --client --analysis "/api/v1/buses/buses/"
+  
+  # Query a very large spec without loading all of it
+  python3 api_explorer.py --lazy --endpoint "/api/v1/buses/buses/{id}/"
+  
+  # Map a concrete URL to its path template
+  python3 api_explorer.py --match "/api/v1/buses/buses/8f3c2a9e-1b7d-4c6e-9f0a-2d4b6c8e0f1a/"
+  
+  # Ranked search with field filters, prefix ("*") and fuzzy ("~") terms
+  python3 api_explorer.py --search "locat* tag:tracking param:bus_id" --level 2
+        """
+    )
+    
+    parser.add_argument(
+        "--schema-file", 
+        default="api_schema.json",
+        help="Path to the OpenAPI schema JSON file"
+    )
+    
+    parser.add_argument(
+        "--prefix",
+        help="Get all endpoints starting with this prefix with complete schemas"
+    )
+    
+    parser.add_argument(
+        "--endpoint",
+        help="Get specific endpoint with all related schemas"
+    )
+    
+    parser.add_argument(
+        "--analysis",
+        help="Get comprehensive endpoint analysis with all schemas"
+    )
+    
+    parser.add_argument(
+        "--resolved",
+        help="Get endpoint with fully resolved schemas (no $ref)"
+    )
+    
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        help="Maximum nested $ref expansions for --resolved"
+    )
+    
+    parser.add_argument(
+        "--max-nodes",
+        type=int,
+        help="Maximum number of objects in the expanded --resolved output"
+    )
+    
+    parser.add_argument(
+        "--defs",
+        action="store_true",
+        help="With --resolved, emit each component once under '$defs' instead of inlining it"
+    )
+    
+    parser.add_argument(
+        "--schema",
+        help="Get specific schema component with dependencies"
+    )
+    
+    parser.add_argument(
+        "--match",
+        help="Map a concrete request URL to its path template and typed parameters"
+    )
+    
+    parser.add_argument(
+        "--used-by",
+        help="List the operations that use a schema component, directly or transitively"
+    )
+    
+    parser.add_argument(
+        "--list-endpoints",
+        action="store_true",
+        help="List all available endpoints"
+    )
+    
+    parser.add_argument(
+        "--list-schemas",
+        action="store_true",
+        help="List all schema components"
+    )
+    
+    parser.add_argument(
+        "--search",
+        help="Ranked search over operations; supports field filters such as "
+             "'tag:gamification' or 'param:bus_id'"
+    )
+    
+    parser.add_argument(
+        "--partial",
+        action="store_true",
+        help="Let every search term match as a prefix (same as a trailing '*')"
+    )
+    
+    parser.add_argument(
+        "--fuzzy",
+        action="store_true",
+        help="Let every search term match within one typo (same as a trailing '~')"
+    )
+    
+    parser.add_argument(
+        "--limit",
+        type=int,
+        help="Maximum number of search results, or of --analyze-log and --audit rows"
+    )
+    
+    parser.add_argument(
+        "--summary",
+        help="Get a formatted summary of an endpoint (alias for --analysis)"
+    )
+    
+    parser.add_argument(
+        "--level",
+        type=int,
+        choices=[1, 2, 3],
+        default=1,
+        help="Detail level for listings (1=basic, 2=medium, 3=detailed)"
+    )
+    
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="Answer JSONL query records ({\"op\": ..., \"arg\": ...}) from FILE, or '-' for stdin"
+    )
+    
+    parser.add_argument(
+        "--validate",
+        metavar="FILE",
+        help="Validate JSONL traffic records ({\"method\", \"path\", \"query\", \"request\", \"status\", "
+             "\"response\"}) from FILE, or '-' for stdin, against the spec; violations are written as "
+             "JSONL and a summary to stderr, and the exit status is 1 when any record failed"
+    )
+    
+    parser.add_argument(
+        "--analyze-log",
+        nargs="+",
+        metavar="FILE",
+        help="Aggregate JSONL access logs ({\"method\", \"url\", \"status\", \"duration_ms\", \"bytes\"}) "
+             "from FILEs, or '-' for stdin, per operation into a ranked table of counts and "
+             "p50/p95/p99 latency and payload size"
+    )
+    
+    parser.add_argument(
+        "--rank-by",
+        choices=LOG_RANK_KEYS,
+        default="count",
+        help="Ranking of the --analyze-log table (default: count)"
+    )
+    
+    parser.add_argument(
+        "--save-sketches",
+        metavar="FILE",
+        help="With --analyze-log, also save the mergeable per-operation sketches to FILE"
+    )
+    
+    parser.add_argument(
+        "--merge-sketches",
+        nargs="+",
+        metavar="FILE",
+        help="Merge sketches saved with --save-sketches (e.g. one per log shard) into one report"
+    )
+    
+    parser.add_argument(
+        "--audit",
+        nargs="?",
+        const="",
+        metavar="PREFIX",
+        help="Rank operations (optionally under PREFIX) by a static estimate of their response "
+             "size, and flag list responses without pagination parameters"
+    )
+    
+    parser.add_argument(
+        "--analyze-all",
+        nargs="?",
+        const="",
+        metavar="PREFIX",
+        help="Analyze every operation (optionally under PREFIX) in one pass: one JSONL row (or CSV "
+             "row with --csv) with method, path, tags, security, parameter counts, request and "
+             "response schemas and transitive schema count"
+    )
+    
+    parser.add_argument(
+        "--extract",
+        nargs="+",
+        metavar="SELECTOR",
+        help="Print a standalone OpenAPI document with only the selected operations and the "
+             "components, security schemes and tags they use; selectors are path prefixes, "
+             "'tag:NAME' or 'op:PATTERN' (shell-style operationId pattern)"
+    )
+    
+    parser.add_argument(
+        "--csv",
+        action="store_true",
+        help="Write --audit and --analyze-all rows as CSV"
+    )
+    
+    parser.add_argument(
+        "--export-all",
+        metavar="DIR",
+        help="Write every endpoint's resolved definition to DIR, plus a manifest; "
+             "only files whose inputs changed are rewritten"
+    )
+    
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Report per-phase timings, counters and peak memory as JSON on stderr"
+    )
+    
+    parser.add_argument(
+        "--profile-dump",
+        metavar="FILE",
+        help="Run the query under cProfile and save the stats to FILE (view with python3 -m pstats FILE)"
+    )
+    
+    parser.add_argument(
+        "--dart-models",
+        metavar="DIR",
+        help="Generate Dart model classes (fromJson/toJson) into DIR; only models whose "
+             "definition changed since the last run are rewritten"
+    )
+    
+    parser.add_argument(
+        "--components",
+        nargs="+",
+        metavar="NAME",
+        help="With --dart-models, generate only these components and the ones they use"
+    )
+    
+    parser.add_argument(
+        "--diff",
+        nargs=2,
+        metavar=("OLD", "NEW"),
+        help="Report the operations and components that changed between two schema files, "
+             "including those affected through nested components"
+    )
+    
+    parser.add_argument(
+        "--no-pointers",
+        action="store_true",
+        help="With --diff, list changed operations and components without the JSON pointers that changed"
+    )
+    
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Worker processes for --batch, --validate and --analyze-log (default 1) "
+             "and --export-all (default: CPU count)"
+    )
+    
+    parser.add_argument(
+        "--ndjson",
+        action="store_true",
+        help="Write one compact JSON record per line (per endpoint or schema for listings)"
+    )
+    
+    parser.add_argument(
+        "--lazy",
+        action="store_true",
+        help="Memory-map the schema and parse only the paths and components a query needs"
+    )
+    
+    parser.add_argument(
+        "--lazy-cache-size",
+        type=int,
+        default=256,
+        help="Parsed paths/components kept in memory per section in --lazy mode"
+    )
+    
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Parse the schema file directly without reading or writing the cache"
+    )
+    
+    parser.add_argument(
+        "--rebuild-cache",
+        action="store_true",
+        help="Ignore the existing schema cache and write a fresh one"
+    )
+    
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Run a resident query daemon on --socket (default) or --port"
+    )
+    
+    parser.add_argument(
+        "--client",
+        action="store_true",
+        help="Forward this command to a running daemon; run locally if none answers"
+    )
+    
+    parser.add_argument(
+        "--socket",
+        help="Unix domain socket of the daemon (default: derived from the schema path)"
+    )
+    
+    parser.add_argument(
+        "--port",
+        type=int,
+        help="Serve or connect over HTTP on this 127.0.0.1 port instead of a Unix socket "
+             "(--mock: default 8000)"
+    )
+    
+    parser.add_argument(
+        "--mock",
+        action="store_true",
+        help="Serve every path of the schema on 127.0.0.1:--port with generated example responses"
+    )
+    
+    parser.add_argument(
+        "--mock-latency",
+        type=float,
+        default=0.0,
+        metavar="MS",
+        help="With --mock, delay every response by MS milliseconds"
+    )
+    
+    parser.add_argument(
+        "--mock-jitter",
+        type=float,
+        default=0.0,
+        metavar="MS",
+        help="With --mock, add a random delay of up to MS milliseconds"
+    )
+    
+    parser.add_argument(
+        "--mock-error-rate",
+        type=float,
+        default=0.0,
+        metavar="RATE",
+        help="With --mock, answer this share of requests (0-1) with --mock-error-status"
+    )
+    
+    parser.add_argument(
+        "--mock-error-status",
+        type=int,
+        default=500,
+        metavar="CODE",
+        help="HTTP status of injected errors (default 500)"
+    )
+    
+    parser.add_argument(
+        "--mock-seed",
+        type=int,
+        default=0,
+        help="Seed for --mock jitter and error injection"
+    )
+    
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Watch the schema file and print a JSON report of what changed after every edit; "
+             "with --export-all/--dart-models, regenerate the affected files too"
+    )
+    
+    parser.add_argument(
+        "--reload-interval",
+        type=float,
+        default=1.0,
+        help="Seconds between schema file change checks in --serve and --watch mode"
+    )
+    
+    return parser
+
+
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+    
+    profile = ExplorerProfile() if args.profile else None
+    
+    if args.diff:
+        old_file, new_file = args.diff
+        explorers = [
+            APIExplorer(schema_file, use_cache=not args.no_cache, rebuild_cache=args.rebuild_cache,
+                        lazy=args.lazy, lazy_cache_size=args.lazy_cache_size, profile=profile)
+            for schema_file in (old_file, new_file)
+        ]
+        with explorers[1]._phase("query"):
+            result = explorers[0].diff_schema(explorers[1], pointers=not args.no_pointers)
+        explorers[1].print_formatted_output(result, f"Diff: {old_file} -> {new_file}")
+        if profile is not None:
+            print(json.dumps(explorers[1].profile_report()), file=sys.stderr)
+        return
+    
+    # Initialize explorer
+    explorer = APIExplorer(
+        args.schema_file,
+        use_cache=not args.no_cache,
+        rebuild_cache=args.rebuild_cache,
+        lazy=args.lazy,
+        lazy_cache_size=args.lazy_cache_size,
+        profile=profile,
+    )
+    
+    if args.mock:
+        import asyncio
+        from api_explorer_mock import MockServer
+        mock = MockServer(
+            explorer,
+            latency=args.mock_latency / 1000,
+            jitter=args.mock_jitter / 1000,
+            error_rate=args.mock_error_rate,
+            error_status=args.mock_error_status,
+            seed=args.mock_seed,
+        )
+        try:
+            asyncio.run(mock.serve(port=args.port or 8000))
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            pass
+        return
+    
+    if args.serve:
+        import asyncio
+        from api_explorer_daemon import ExplorerServer
+        server = ExplorerServer(explorer, reload_interval=args.reload_interval)
+        try:
+            asyncio.run(server.serve(socket_path=args.socket, port=args.port))
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            pass
+        return
+    
+    try:
+        if args.watch:
+            try:
+                run_watch(explorer, args, sys.stdout)
+            except KeyboardInterrupt:
+                pass
+            return
+        if args.batch:
+            workers = args.workers or 1
+            if args.batch == "-":
+                run_batch(explorer, sys.stdin, sys.stdout, workers)
+            else:
+                with open(args.batch, "r", encoding="utf-8") as f:
+                    run_batch(explorer, f, sys.stdout, workers)
+            return
+        if args.validate:
+            from api_explorer_validate import run_validate
+            workers = args.workers or 1
+            if args.validate == "-":
+                summary = run_validate(explorer, sys.stdin, sys.stdout, workers)
+            else:
+                with open(args.validate, "r", encoding="utf-8") as f:
+                    summary = run_validate(explorer, f, sys.stdout, workers)
+            print(json.dumps(summary), file=sys.stderr)
+            if summary["valid"] < summary["records"]:
+                sys.exit(1)
+            return
+        if args.audit is not None:
+            from api_explorer_audit import run_audit
+            run_audit(explorer, args, sys.stdout)
+            return
+        if args.analyze_all is not None:
+            run_operation_analysis(explorer, args, sys.stdout)
+            return
+        if args.analyze_log or args.merge_sketches:
+            from api_explorer_logs import run_log_analysis
+            try:
+                run_log_analysis(explorer, args, sys.stdout)
+            except ValueError as e:
+                print(f"Error: {e}")
+                sys.exit(1)
+            return
+        if args.dart_models:
+            try:
+                summary = explorer.generate_dart_models(args.dart_models, args.components)
+            except ValueError as e:
+                print(f"Error: {e}")
+                sys.exit(1)
+            print(f"Generated {summary['total_models']} Dart models in '{summary['out_dir']}': "
+                  f"{summary['written']} written, {summary['unchanged']} unchanged, "
+                  f"{summary['removed']} removed")
+            return
+        if args.export_all:
+            summary = explorer.export_all(
+                args.export_all, workers=args.workers, shared_defs=args.defs,
+                max_depth=args.max_depth, max_nodes=args.max_nodes,
+            )
+            print(f"Exported {summary['total_endpoints']} endpoints to '{summary['out_dir']}': "
+                  f"{summary['written']} written, {summary['unchanged']} unchanged, "
+                  f"{summary['removed']} removed")
+            return
+        with explorer._phase("query"):
+            if args.profile_dump:
+                # cProfile is imported here only, as it is rarely needed.
+                import cProfile
+                profiler = cProfile.Profile()
+                try:
+                    status = profiler.runcall(run_query, explorer, args, sys.stdout)
+                finally:
+                    profiler.dump_stats(args.profile_dump)
+            else:
+                status = run_query(explorer, args, sys.stdout)
+        if status:
+            sys.exit(status)
+    except FileNotFoundError as e:
+        print(f"Error: File '{e.filename}' not found.")
+        sys.exit(1)
+    except BrokenPipeError:
+        # The reader (e.g. `head`) went away; stop quietly.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
+    finally:
+        if profile is not None:
+            print(json.dumps(explorer.profile_report()), file=sys.stderr)
+    
+    if not any(getattr(args, option) for option in QUERY_OPTIONS):
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
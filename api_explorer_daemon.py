@@ -0,0 +1,276 @@
+"""
+API Explorer Daemon - Resident query server
+Keeps one APIExplorer loaded and answers queries and forwarded command
+lines over a Unix socket or a loopback HTTP port (--serve).
+"""
+
+import argparse
+import io
+import json
+import os
+import signal
+import sys
+from typing import Dict, Any, Optional, Tuple
+from pathlib import Path
+
+from api_explorer_audit import run_audit
+from api_explorer_client import default_socket_path
+from api_explorer_core import (
+    APIExplorer, QUERY_OPTIONS, SchemaWatcher, _encode_compact, build_parser,
+    run_operation_analysis, run_query,
+)
+
+
+class _HelpRequested(Exception):
+    """Raised instead of printing help, with the text the CLI would print."""
+    
+    def __init__(self, output: str):
+        super().__init__(output)
+        self.output = output
+
+
+class _DaemonArgumentParser(argparse.ArgumentParser):
+    """
+    Argument parser that reports errors and help instead of exiting the daemon.
+    
+    argparse prints help to the daemon's own stdout and then calls exit(),
+    which would raise SystemExit in the thread answering the request.
+    """
+    
+    def error(self, message):
+        raise ValueError(message)
+    
+    def print_help(self, file=None):
+        raise _HelpRequested(self.format_help())
+    
+    def print_usage(self, file=None):
+        raise _HelpRequested(self.format_usage())
+    
+    def exit(self, status=0, message=None):
+        raise ValueError(message.strip() if message else f"arguments exited with status {status}")
+
+
+class ExplorerServer:
+    """
+    Resident query daemon keeping one APIExplorer loaded.
+    
+    Serves newline-delimited JSON over a Unix domain socket, or HTTP on a
+    loopback port. A request is either a batch-style query record
+    ({"op": ..., "arg": ..., "options": ...}) or forwarded CLI arguments
+    ({"argv": [...]}), answered with the same output the CLI would print.
+    Requests run concurrently on asyncio, with the query work itself in a
+    thread pool, and the schema is reloaded when its file changes.
+    """
+    
+    # Host header values accepted on the HTTP port, with or without the
+    # port; anything else may be a browser page reached by DNS rebinding.
+    _LOOPBACK_HOSTS = frozenset(("127.0.0.1", "localhost", "[::1]"))
+    
+    def __init__(self, explorer: APIExplorer, reload_interval: float = 1.0):
+        self.explorer = explorer
+        self.reload_interval = reload_interval
+        self._parser = build_parser(_DaemonArgumentParser)
+        self._port: Optional[int] = None
+        self.watcher = SchemaWatcher(explorer, interval=reload_interval)
+        self.watcher.subscribe(self._log_reload)
+    
+    @staticmethod
+    def _log_reload(explorer: APIExplorer, changes: Dict[str, Any]):
+        """Report a reload and what it changed on stderr."""
+        summary = ", ".join(f"{count} {kind.replace('_', ' ')}"
+                            for kind, count in changes["summary"].items() if count)
+        print(f"Reloaded '{explorer.schema_file}' in {changes['seconds']}s: {summary}", file=sys.stderr)
+    
+    def answer(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Answer one request against the current explorer.
+        
+        Args:
+            request: Query record or {"argv": [...], "schema_file": ...}
+            
+        Returns:
+            {"result": ...} for query records, {"output": ..., "status": ...}
+            for forwarded arguments, or {"error": ...}
+        """
+        explorer = self.explorer
+        try:
+            if "argv" not in request:
+                options = request.get("options", {})
+                return {"result": explorer.query(request.get("op"), request.get("arg"), **options)}
+            
+            schema_file = request.get("schema_file")
+            if schema_file and Path(schema_file).resolve() != explorer.schema_file.resolve():
+                return {"error": f"daemon serves '{explorer.schema_file}', not '{schema_file}'"}
+            args = self._parser.parse_args(request["argv"])
+            if (args.batch or args.validate or args.analyze_log or args.merge_sketches or args.serve
+                    or args.mock or args.export_all or args.dart_models or args.diff or args.watch):
+                return {"error": "--batch, --validate, --analyze-log, --merge-sketches, --export-all, "
+                                 "--dart-models, --diff, --watch, --serve and --mock are not available "
+                                 "through --client"}
+            out = io.StringIO()
+            status = 0
+            if args.audit is not None:
+                run_audit(explorer, args, out)
+            elif args.analyze_all is not None:
+                run_operation_analysis(explorer, args, out)
+            elif not any(getattr(args, option) for option in QUERY_OPTIONS):
+                return {"output": self._parser.format_help(), "status": 0}
+            else:
+                status = run_query(explorer, args, out)
+            return {"output": out.getvalue(), "status": status}
+        except _HelpRequested as e:
+            return {"output": e.output, "status": 0}
+        except Exception as e:
+            # One failing request gets an error answer; the daemon goes on.
+            return {"error": str(e) if isinstance(e, (ValueError, TypeError)) else f"{type(e).__name__}: {e}"}
+    
+    async def _answer_async(self, payload: bytes) -> Dict[str, Any]:
+        """Decode a request and answer it off the event loop."""
+        import asyncio
+        try:
+            request = json.loads(payload)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as e:
+            return {"error": f"invalid request: {e}"}
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.answer, request)
+    
+    async def _handle_socket_client(self, reader: "asyncio.StreamReader",
+                                    writer: "asyncio.StreamWriter"):
+        """Serve newline-delimited JSON requests on one connection."""
+        import asyncio
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                response = await self._answer_async(line)
+                writer.write(_encode_compact(response).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    
+    def _reject_http_request(self, method: str, headers: Dict[str, str]) -> Optional[Tuple[int, str]]:
+        """
+        Refuse HTTP requests that may come from a web page rather than a client.
+        
+        The Host must name the loopback interface (this port, if given),
+        which defeats DNS rebinding, and POST bodies must be declared as
+        application/json, which a cross-origin form or simple fetch cannot
+        do without a CORS preflight the daemon never answers.
+        
+        Args:
+            method: HTTP method
+            headers: Request headers, lowercased names
+            
+        Returns:
+            (status, error message), or None if the request is acceptable
+        """
+        host = headers.get("host", "").lower()
+        name, _, port = host.rpartition(":")
+        if host not in self._LOOPBACK_HOSTS and not (name in self._LOOPBACK_HOSTS and port == str(self._port)):
+            return 403, f"host '{host}' is not allowed"
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        if method == "POST" and content_type != "application/json":
+            return 415, "Content-Type must be application/json"
+        return None
+    
+    async def _handle_http_client(self, reader: "asyncio.StreamReader",
+                                  writer: "asyncio.StreamWriter"):
+        """Serve HTTP/1.1 requests (POST /query, POST /cli, GET /health)."""
+        import asyncio
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, _, rest = request_line.decode("latin-1").partition(" ")
+                target = rest.split(" ", 1)[0]
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0) or 0))
+                
+                status = 200
+                rejected = self._reject_http_request(method, headers)
+                if rejected is not None:
+                    status, message = rejected
+                    response = {"error": message}
+                elif method == "GET" and target == "/health":
+                    response = {"status": "ok", "schema_file": str(self.explorer.schema_file)}
+                elif method == "POST" and target in ("/query", "/cli"):
+                    response = await self._answer_async(body)
+                    if "error" in response:
+                        status = 400
+                else:
+                    status, response = 404, {"error": f"no route for {method} {target}"}
+                
+                payload = _encode_compact(response).encode("utf-8")
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                    .encode("latin-1") + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    
+    async def _watch_schema(self):
+        """Reload the explorer whenever the schema file changes."""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            # Requests already running keep the explorer they started with.
+            await loop.run_in_executor(None, self.watcher.check)
+            self.explorer = self.watcher.explorer
+    
+    async def serve(self, socket_path: Optional[str] = None, port: Optional[int] = None):
+        """
+        Serve until cancelled.
+        
+        Args:
+            socket_path: Unix socket path (default: default_socket_path())
+            port: Serve HTTP on 127.0.0.1:port instead of a Unix socket
+        """
+        import asyncio
+        self._port = port
+        if port is not None:
+            server = await asyncio.start_server(self._handle_http_client, "127.0.0.1", port,
+                                                limit=1 << 24)
+            where = f"http://127.0.0.1:{port}"
+        else:
+            socket_path = socket_path or default_socket_path(str(self.explorer.schema_file))
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            server = await asyncio.start_unix_server(self._handle_socket_client, socket_path,
+                                                     limit=1 << 24)
+            where = socket_path
+        print(f"Serving '{self.explorer.schema_file}' on {where}", file=sys.stderr)
+        
+        # Shut down cleanly (removing the socket) on SIGTERM as well as Ctrl-C.
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        watcher = asyncio.create_task(self._watch_schema())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher.cancel()
+            if port is None and os.path.exists(socket_path):
+                os.unlink(socket_path)
@@ -0,0 +1,371 @@
+"""
+API Explorer Dart - Dart model generation
+Renders components/schemas as Dart model classes with JSON conversion,
+as written by --dart-models.
+"""
+
+import hashlib
+import json
+import re
+from collections.abc import Mapping
+from typing import Dict, Any, List, Set, Tuple
+
+from api_explorer_core import _TOKEN_RE
+
+
+# Bump when the generated Dart changes, so every model is regenerated once.
+DART_GENERATOR_VERSION = 1
+DART_MODELS_MANIFEST = ".models_manifest.json"
+_DART_KEYWORDS = frozenset((
+    "abstract", "as", "assert", "async", "await", "base", "break", "case", "catch", "class",
+    "const", "continue", "covariant", "default", "deferred", "do", "dynamic", "else", "enum",
+    "export", "extends", "extension", "external", "factory", "false", "final", "finally", "for",
+    "get", "hide", "if", "implements", "import", "in", "interface", "is", "late",
+    "library", "mixin", "new", "null", "of", "on", "operator", "part", "required", "rethrow",
+    "return", "sealed", "set", "show", "static", "super", "switch", "sync", "this", "throw",
+    "true", "try", "typedef", "var", "void", "when", "while", "with", "yield",
+))
+# Members every Dart object, enum or generated model already has.
+_DART_RESERVED_MEMBERS = frozenset((
+    "hashCode", "runtimeType", "noSuchMethod", "toString", "toJson", "fromJson",
+    "index", "name", "value", "values", "tryFromValue", "fromValue",
+))
+_DART_CORE_TYPES = frozenset((
+    "BigInt", "DateTime", "Duration", "Enum", "Error", "Exception", "Function", "Future",
+    "Iterable", "List", "Map", "Null", "Object", "Pattern", "Record", "RegExp", "Set",
+    "Stream", "String", "Symbol", "Type", "Uri",
+))
+_DART_CLASS_RE = re.compile(r"[A-Z][A-Za-z0-9]*")
+_DART_WORD_BOUNDARY_RE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])")
+_DART_FILE_RE = re.compile(r"[^A-Za-z0-9]+")
+_DART_SCALARS = {"integer": "int", "number": "double", "boolean": "bool", "string": "String"}
+
+
+def _dart_identifier(name: str, upper: bool = False) -> str:
+    """Turn a JSON name into a camelCase (or PascalCase) Dart identifier."""
+    words = _TOKEN_RE.findall(str(name))
+    if not words:
+        words = ["value"]
+    identifier = words[0].lower() + "".join(word.capitalize() for word in words[1:])
+    if upper:
+        identifier = identifier[0].upper() + identifier[1:]
+    if identifier[0].isdigit():
+        identifier = ("V" if upper else "v") + identifier
+    if identifier in _DART_KEYWORDS:
+        identifier += "Value"
+    return identifier
+
+
+def _dart_string(value: str) -> str:
+    """Quote a string as a single-quoted Dart literal."""
+    escaped = value.replace("\\", "\\\\").replace("'", "\\'").replace("$", "\\$").replace("\n", "\\n")
+    return f"'{escaped}'"
+
+
+def _dart_doc(description: Any, indent: str = "") -> List[str]:
+    """Render a description as /// doc comment lines."""
+    if not isinstance(description, str):
+        return []
+    return [
+        f"{indent}///{' ' + line.rstrip() if line.strip() else ''}"
+        for line in description.strip().splitlines()
+    ]
+
+
+class DartModelGenerator:
+    """
+    Render components/schemas as Dart model classes.
+    
+    Object components become immutable classes with fromJson/toJson,
+    enum components become enhanced enums, and any other component (a
+    bare string, array or map) is inlined where it is used. Output only
+    depends on the schema, so the same input always renders the same bytes.
+    """
+    
+    def __init__(self, schemas: Mapping):
+        self.schemas = schemas
+        self.file_names: Dict[str, str] = {}
+        used: Set[str] = set()
+        for name in sorted(schemas):
+            stem = _DART_FILE_RE.sub("_", _DART_WORD_BOUNDARY_RE.sub("_", name)).strip("_").lower() or "model"
+            if stem in used:
+                stem += "_" + hashlib.sha1(name.encode("utf-8")).hexdigest()[:8]
+            used.add(stem)
+            self.file_names[name] = stem + ".dart"
+    
+    @staticmethod
+    def class_name(name: str) -> str:
+        """Dart class name of a component, keeping valid names unchanged."""
+        if not _DART_CLASS_RE.fullmatch(name):
+            name = _dart_identifier(name, upper=True)
+        return name + "Model" if name in _DART_CORE_TYPES else name
+    
+    def kind_of(self, name: str) -> str:
+        """Return "enum", "model" or "alias" for a component."""
+        schema_def = self.schemas.get(name)
+        if not isinstance(schema_def, dict):
+            return "alias"
+        if isinstance(schema_def.get("enum"), list):
+            return "enum"
+        if isinstance(schema_def.get("properties"), dict) or (
+                schema_def.get("type") == "object" and not schema_def.get("additionalProperties")):
+            return "model"
+        return "alias"
+    
+    def _is_placeholder(self, schema: Any) -> bool:
+        """Whether a oneOf/anyOf choice only allows null or the empty string."""
+        ref = schema.get("$ref") if isinstance(schema, dict) else None
+        if isinstance(ref, str):
+            schema = self.schemas.get(ref.split("/")[-1])
+        values = schema.get("enum") if isinstance(schema, dict) else None
+        return isinstance(values, list) and all(value in (None, "") for value in values)
+    
+    def type_of(self, schema: Any, aliases: frozenset = frozenset()) -> Tuple[tuple, bool]:
+        """
+        Map a JSON schema to a Dart type.
+        
+        Args:
+            schema: Property or item schema
+            aliases: Alias components being inlined (guards against cycles)
+            
+        Returns:
+            (type, nullable) where type is a tuple such as ("int",),
+            ("model", name), ("List", item type, item nullable) or
+            ("Map", value type, value nullable)
+        """
+        if not isinstance(schema, dict):
+            return ("dynamic",), True
+        nullable = bool(schema.get("nullable"))
+        ref = schema.get("$ref")
+        if isinstance(ref, str):
+            name = ref.split("/")[-1]
+            kind = self.kind_of(name)
+            if kind != "alias":
+                return (kind, name), nullable
+            if name in aliases or name not in self.schemas:
+                return ("dynamic",), True
+            inner, inner_nullable = self.type_of(self.schemas[name], aliases | {name})
+            return inner, nullable or inner_nullable
+        for key in ("allOf", "oneOf", "anyOf"):
+            choices = schema.get(key)
+            if isinstance(choices, list):
+                real = [choice for choice in choices if not self._is_placeholder(choice)]
+                if len(real) != 1:
+                    return ("dynamic",), True
+                inner, inner_nullable = self.type_of(real[0], aliases)
+                return inner, nullable or inner_nullable or len(real) < len(choices)
+        schema_type = schema.get("type")
+        if schema_type == "array":
+            item, item_nullable = self.type_of(schema.get("items"), aliases)
+            return ("List", item, item_nullable), nullable
+        if schema_type == "object" or "properties" in schema or "additionalProperties" in schema:
+            value, value_nullable = self.type_of(schema.get("additionalProperties"), aliases)
+            return ("Map", value, value_nullable), nullable
+        if schema_type == "string" and schema.get("format") in ("date-time", "date"):
+            return ("DateTime", schema["format"]), nullable
+        if isinstance(schema_type, str) and schema_type in _DART_SCALARS:
+            return (_DART_SCALARS[schema_type],), nullable
+        return ("dynamic",), True
+    
+    def dart_type(self, dart_type: tuple, nullable: bool = False) -> str:
+        """Spell a type from type_of() in Dart."""
+        kind = dart_type[0]
+        if kind in ("model", "enum"):
+            text = self.class_name(dart_type[1])
+        elif kind == "List":
+            text = f"List<{self.dart_type(dart_type[1], dart_type[2])}>"
+        elif kind == "Map":
+            text = f"Map<String, {self.dart_type(dart_type[1], dart_type[2])}>"
+        else:
+            text = kind
+        return text + "?" if nullable and kind != "dynamic" else text
+    
+    def _from_json(self, dart_type: tuple, nullable: bool, expr: str, depth: int = 0) -> str:
+        """Dart expression converting the decoded JSON value expr."""
+        kind = dart_type[0]
+        opt = "?" if nullable else ""
+        if kind == "dynamic":
+            return expr
+        if kind == "double":
+            return f"({expr} as num{opt}){opt}.toDouble()"
+        if kind in ("int", "bool", "String"):
+            return f"{expr} as {kind}{opt}"
+        if kind == "DateTime":
+            parsed = f"DateTime.parse({expr} as String)"
+            return f"{expr} == null ? null : {parsed}" if nullable else parsed
+        if kind == "enum":
+            class_name = self.class_name(dart_type[1])
+            return f"{class_name}.{'tryFromValue' if nullable else 'fromValue'}({expr})"
+        if kind == "model":
+            parsed = f"{self.class_name(dart_type[1])}.fromJson({expr} as Map<String, dynamic>)"
+            return f"{expr} == null ? null : {parsed}" if nullable else parsed
+        item = f"e{depth or ''}"
+        if kind == "List":
+            if dart_type[1] == ("dynamic",):
+                return f"{expr} as List<dynamic>{opt}"
+            convert = self._from_json(dart_type[1], dart_type[2], item, depth + 1)
+            return f"({expr} as List<dynamic>{opt}){opt}.map(({item}) => {convert}).toList()"
+        if dart_type[1] == ("dynamic",):
+            return f"{expr} as Map<String, dynamic>{opt}"
+        convert = self._from_json(dart_type[1], dart_type[2], item, depth + 1)
+        return f"({expr} as Map<String, dynamic>{opt}){opt}.map((k{depth or ''}, {item}) => MapEntry(k{depth or ''}, {convert}))"
+    
+    def _to_json(self, dart_type: tuple, nullable: bool, expr: str, depth: int = 0) -> str:
+        """Dart expression converting the field expr back to JSON."""
+        kind = dart_type[0]
+        opt = "?" if nullable else ""
+        if kind == "DateTime":
+            text = f"{expr}{opt}.toIso8601String()"
+            return text + ".substring(0, 10)" if dart_type[1] == "date" else text
+        if kind == "enum":
+            return f"{expr}{opt}.value"
+        if kind == "model":
+            return f"{expr}{opt}.toJson()"
+        item = f"e{depth or ''}"
+        if kind == "List":
+            convert = self._to_json(dart_type[1], dart_type[2], item, depth + 1)
+            return expr if convert == item else f"{expr}{opt}.map(({item}) => {convert}).toList()"
+        if kind == "Map":
+            convert = self._to_json(dart_type[1], dart_type[2], item, depth + 1)
+            key = f"k{depth or ''}"
+            return expr if convert == item else f"{expr}{opt}.map(({key}, {item}) => MapEntry({key}, {convert}))"
+        return expr
+    
+    def _referenced(self, dart_type: tuple) -> Set[str]:
+        """Components a type needs imported."""
+        if dart_type[0] in ("model", "enum"):
+            return {dart_type[1]}
+        if dart_type[0] in ("List", "Map"):
+            return self._referenced(dart_type[1])
+        return set()
+    
+    def render(self, name: str) -> str:
+        """
+        Render the Dart source of one component.
+        
+        Args:
+            name: Component name; must be an enum or model component
+            
+        Returns:
+            Contents of the component's .dart file
+        """
+        schema_def = self.schemas[name]
+        class_name = self.class_name(name)
+        lines = [
+            "// GENERATED CODE - DO NOT MODIFY BY HAND.",
+            f"// Generated by api_explorer.py from #/components/schemas/{name}.",
+            "",
+        ]
+        if self.kind_of(name) == "enum":
+            lines += self._render_enum(class_name, schema_def)
+        else:
+            lines += self._render_model(name, class_name, schema_def)
+        return "\n".join(lines) + "\n"
+    
+    def _render_enum(self, class_name: str, schema_def: Dict[str, Any]) -> List[str]:
+        """Render an enum component as an enhanced enum."""
+        values = []
+        for value in schema_def["enum"]:
+            if value is not None and value not in values:
+                values.append(value)
+        if all(isinstance(value, str) for value in values):
+            value_type = "String"
+        elif all(isinstance(value, int) and not isinstance(value, bool) for value in values):
+            value_type = "int"
+        else:
+            value_type = "Object"
+        
+        members = []
+        used: Set[str] = set()
+        for value in values:
+            member = _dart_identifier(value) if value != "" else "empty"
+            if member in _DART_RESERVED_MEMBERS:
+                member += "Value"
+            while member in used:
+                member += "_"
+            used.add(member)
+            literal = _dart_string(value) if isinstance(value, str) else json.dumps(value)
+            members.append(f"  {member}({literal})")
+        
+        lines = _dart_doc(schema_def.get("description"))
+        lines.append(f"enum {class_name} {{")
+        lines.append(",\n".join(members) + ";" if members else "  ;")
+        lines += [
+            "",
+            f"  const {class_name}(this.value);",
+            f"  final {value_type} value;",
+            "",
+            f"  static {class_name}? tryFromValue(Object? value) {{",
+            f"    for (final item in {class_name}.values) {{",
+            "      if (item.value == value) return item;",
+            "    }",
+            "    return null;",
+            "  }",
+            "",
+            f"  static {class_name} fromValue(Object? value) {{",
+            "    final item = tryFromValue(value);",
+            "    if (item == null) {",
+            f"      throw ArgumentError('Invalid {class_name}: $value');",
+            "    }",
+            "    return item;",
+            "  }",
+            "",
+            "  @override",
+            "  String toString() => value.toString();",
+            "}",
+        ]
+        return lines
+    
+    def _render_model(self, name: str, class_name: str, schema_def: Dict[str, Any]) -> List[str]:
+        """Render an object component as a class with fromJson/toJson."""
+        properties = schema_def.get("properties") or {}
+        required = set(schema_def.get("required") or ())
+        fields = []
+        imports: Set[str] = set()
+        used: Set[str] = set()
+        for key, prop in properties.items():
+            field_type, nullable = self.type_of(prop)
+            nullable = nullable or key not in required
+            field = _dart_identifier(key)
+            if field in _DART_RESERVED_MEMBERS:
+                field += "Value"
+            while field in used:
+                field += "_"
+            used.add(field)
+            imports |= self._referenced(field_type)
+            fields.append((key, field, field_type, nullable, prop))
+        imports.discard(name)
+        
+        lines = [f"import '{file_name}';" for file_name in sorted(self.file_names[dep] for dep in imports)]
+        if lines:
+            lines.append("")
+        lines += _dart_doc(schema_def.get("description"))
+        lines.append(f"class {class_name} {{")
+        for key, field, field_type, nullable, prop in fields:
+            lines += _dart_doc(prop.get("description") if isinstance(prop, dict) else None, "  ")
+            lines.append(f"  final {self.dart_type(field_type, nullable)} {field};")
+        if fields:
+            lines.append("")
+            lines.append(f"  const {class_name}({{")
+            for key, field, field_type, nullable, prop in fields:
+                lines.append(f"    {'' if nullable else 'required '}this.{field},")
+            lines.append("  });")
+        else:
+            lines.append(f"  const {class_name}();")
+        
+        lines += ["", f"  factory {class_name}.fromJson(Map<String, dynamic> json) {{"]
+        if fields:
+            lines.append(f"    return {class_name}(")
+            for key, field, field_type, nullable, prop in fields:
+                value = self._from_json(field_type, nullable, f"json[{_dart_string(key)}]")
+                lines.append(f"      {field}: {value},")
+            lines.append("    );")
+        else:
+            lines.append(f"    return const {class_name}();")
+        lines.append("  }")
+        
+        lines += ["", "  Map<String, dynamic> toJson() {", "    return <String, dynamic>{"]
+        for key, field, field_type, nullable, prop in fields:
+            lines.append(f"      {_dart_string(key)}: {self._to_json(field_type, nullable, field)},")
+        lines += ["    };", "  }", "}"]
+        return lines
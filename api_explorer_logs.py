@@ -0,0 +1,417 @@
+"""
+API Explorer Logs - Access log analysis
+Matches access log lines to operations and keeps mergeable quantile
+sketches of their latency and payload size (--analyze-log).
+"""
+
+import argparse
+import json
+import math
+import sys
+from typing import Dict, Any, List, Optional, Tuple
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from api_explorer_core import (
+    APIExplorer, _bounded_imap, _chunked, _format_table, _worker_pool, _write_if_changed,
+)
+
+
+# Relative accuracy of the latency and payload size quantiles.
+LOG_SKETCH_ACCURACY = 0.01
+# Log lines handed to a worker process at a time; each chunk returns a
+# whole partial analysis, so chunks are larger than batch chunks.
+LOG_CHUNK_SIZE = 4096
+LOG_SKETCHES_FORMAT = 1
+_LOG_URL_CACHE_SIZE = 8192
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with relative accuracy (DDSketch-style).
+    
+    Positive values fall into logarithmic buckets (gamma^(k-1), gamma^k],
+    so every quantile is within the accuracy of the true value, memory
+    grows with the log of the value range rather than the value count,
+    and merging two sketches just adds their bucket counts.
+    """
+    
+    __slots__ = ("accuracy", "bins", "zeros", "count", "total", "min", "max", "_gamma", "_inv_log_gamma")
+    
+    def __init__(self, accuracy: float = LOG_SKETCH_ACCURACY):
+        self.accuracy = accuracy
+        self._gamma = (1 + accuracy) / (1 - accuracy)
+        self._inv_log_gamma = 1 / math.log(self._gamma)
+        self.bins: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+    
+    def add(self, value: float) -> None:
+        """Add one value; values <= 0 count as zero."""
+        if value > 0:
+            key = math.ceil(math.log(value) * self._inv_log_gamma)
+            bins = self.bins
+            bins[key] = bins.get(key, 0) + 1
+        else:
+            value = 0.0
+            self.zeros += 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+    
+    def merge(self, other: "QuantileSketch") -> None:
+        """Add another sketch's values into this one."""
+        if other.accuracy != self.accuracy:
+            raise ValueError("cannot merge sketches with different accuracies")
+        bins = self.bins
+        for key, count in other.bins.items():
+            bins[key] = bins.get(key, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+    
+    def quantile(self, q: float) -> Optional[float]:
+        """Return the q-quantile (0 <= q <= 1), or None when the sketch is empty."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                value = 2 * self._gamma ** key / (self._gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize for --save-sketches."""
+        return {
+            "accuracy": self.accuracy,
+            "bins": {str(key): count for key, count in sorted(self.bins.items())},
+            "zeros": self.zeros,
+            "count": self.count,
+            "total": self.total,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QuantileSketch":
+        """Rebuild a sketch saved with to_dict()."""
+        sketch = cls(data["accuracy"])
+        sketch.bins = {int(key): count for key, count in data["bins"].items()}
+        sketch.zeros = data["zeros"]
+        sketch.count = data["count"]
+        sketch.total = data["total"]
+        if sketch.count:
+            sketch.min = data["min"]
+            sketch.max = data["max"]
+        return sketch
+
+
+class LogAnalysis:
+    """
+    Per-operation aggregate of an access log.
+    
+    Each operation ("GET /api/v1/buses/buses/{id}/") keeps a request count,
+    counts per status class and latency and payload size sketches. Analyses
+    of different shards of a log merge into the analysis of the whole log.
+    """
+    
+    __slots__ = ("operations", "unmatched", "unmatched_paths", "malformed")
+    
+    def __init__(self):
+        # operation -> [count, {status class: count}, latency sketch, size sketch]
+        self.operations: Dict[str, list] = {}
+        self.unmatched = 0
+        self.unmatched_paths: Dict[str, int] = {}
+        self.malformed = 0
+    
+    def add(self, operation: str, status: Any, duration: Optional[float], size: Optional[float]) -> None:
+        """Count one request of an operation."""
+        entry = self.operations.get(operation)
+        if entry is None:
+            entry = self.operations[operation] = [0, {}, QuantileSketch(), QuantileSketch()]
+        entry[0] += 1
+        status_class = f"{str(status)[:1]}xx" if status is not None else "unknown"
+        entry[1][status_class] = entry[1].get(status_class, 0) + 1
+        if duration is not None:
+            entry[2].add(duration)
+        if size is not None:
+            entry[3].add(size)
+    
+    def merge(self, other: "LogAnalysis") -> None:
+        """Add another shard's analysis into this one."""
+        for operation, (count, statuses, latency, size) in other.operations.items():
+            entry = self.operations.get(operation)
+            if entry is None:
+                entry = self.operations[operation] = [0, {}, QuantileSketch(latency.accuracy),
+                                                      QuantileSketch(size.accuracy)]
+            entry[0] += count
+            for status_class, status_count in statuses.items():
+                entry[1][status_class] = entry[1].get(status_class, 0) + status_count
+            entry[2].merge(latency)
+            entry[3].merge(size)
+        self.unmatched += other.unmatched
+        for path, count in other.unmatched_paths.items():
+            self.unmatched_paths[path] = self.unmatched_paths.get(path, 0) + count
+        self.malformed += other.malformed
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize for --save-sketches."""
+        return {
+            "format": LOG_SKETCHES_FORMAT,
+            "operations": {
+                operation: {
+                    "count": count,
+                    "statuses": statuses,
+                    "latency_ms": latency.to_dict(),
+                    "bytes": size.to_dict(),
+                }
+                for operation, (count, statuses, latency, size) in sorted(self.operations.items())
+            },
+            "unmatched": self.unmatched,
+            "unmatched_paths": self.unmatched_paths,
+            "malformed": self.malformed,
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LogAnalysis":
+        """Rebuild an analysis saved with to_dict()."""
+        if data.get("format") != LOG_SKETCHES_FORMAT:
+            raise ValueError(f"unsupported sketch format {data.get('format')!r}")
+        analysis = cls()
+        for operation, entry in data["operations"].items():
+            analysis.operations[operation] = [
+                entry["count"], dict(entry["statuses"]),
+                QuantileSketch.from_dict(entry["latency_ms"]), QuantileSketch.from_dict(entry["bytes"]),
+            ]
+        analysis.unmatched = data["unmatched"]
+        analysis.unmatched_paths = dict(data["unmatched_paths"])
+        analysis.malformed = data["malformed"]
+        return analysis
+    
+    def rows(self, rank_by: str = "count") -> List[Dict[str, Any]]:
+        """
+        Return one summary row per operation, ranked.
+        
+        Args:
+            rank_by: One of LOG_RANK_KEYS; "total-time" is count x mean
+                latency, "bytes" the total payload and "errors" the 5xx count
+                
+        Returns:
+            Rows with counts, status classes and p50/p95/p99 latency (ms)
+            and payload size (bytes), highest rank first
+        """
+        rows = []
+        for operation, (count, statuses, latency, size) in self.operations.items():
+            row = {
+                "operation": operation,
+                "count": count,
+                "statuses": dict(sorted(statuses.items())),
+                "errors": statuses.get("5xx", 0),
+                "total_ms": round(latency.total, 3),
+                "total_bytes": int(size.total),
+            }
+            for name, sketch in (("latency_ms", latency), ("bytes", size)):
+                row[name] = {
+                    f"p{round(q * 100)}": None if value is None else round(value, 3)
+                    for q in (0.5, 0.95, 0.99)
+                    for value in (sketch.quantile(q),)
+                }
+                row[name]["max"] = sketch.max if sketch.count else None
+            rows.append(row)
+        
+        if rank_by == "total-time":
+            key = lambda row: row["total_ms"]
+        elif rank_by == "bytes":
+            key = lambda row: row["total_bytes"]
+        elif rank_by in ("p50", "p95", "p99"):
+            key = lambda row: row["latency_ms"][rank_by] or 0
+        else:
+            key = lambda row: row[rank_by]
+        rows.sort(key=lambda row: (-key(row), row["operation"]))
+        return rows
+
+
+def _log_number(record: Dict[str, Any], keys: Tuple[str, ...]) -> Optional[float]:
+    """Return the first numeric field of a log record among keys."""
+    for key in keys:
+        value = record.get(key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return value
+        if isinstance(value, str):
+            try:
+                return float(value)
+            except ValueError:
+                continue
+    return None
+
+
+def _analyze_log_lines(explorer: APIExplorer, lines) -> LogAnalysis:
+    """
+    Aggregate access log lines into a LogAnalysis.
+    
+    Each line is a JSON object with "method" (default GET), "url" or
+    "path", "status", "duration_ms" (or "duration", in milliseconds) and
+    "bytes" (or "bytes_sent", "size"). Concrete URLs are mapped to their
+    path template with match_url(); repeated URLs hit a small cache.
+    """
+    analysis = LogAnalysis()
+    templates: Dict[str, Optional[str]] = {}
+    loads = json.loads
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = loads(line)
+            url = record.get("url", record.get("path"))
+            if not isinstance(url, str):
+                raise ValueError
+        except (ValueError, AttributeError):
+            analysis.malformed += 1
+            continue
+        path = urlsplit(url).path if "://" in url else url.split("?", 1)[0]
+        if path not in templates:
+            if len(templates) >= _LOG_URL_CACHE_SIZE:
+                templates.clear()
+            match = explorer.match_url(path)
+            templates[path] = match["endpoint"] if match is not None else None
+        endpoint = templates[path]
+        if endpoint is None:
+            analysis.unmatched += 1
+            unmatched_paths = analysis.unmatched_paths
+            if path in unmatched_paths or len(unmatched_paths) < _LOG_URL_CACHE_SIZE:
+                unmatched_paths[path] = unmatched_paths.get(path, 0) + 1
+            continue
+        method = record.get("method") or "GET"
+        analysis.add(
+            f"{str(method).upper()} {endpoint}",
+            record.get("status"),
+            _log_number(record, ("duration_ms", "duration")),
+            _log_number(record, ("bytes", "bytes_sent", "size")),
+        )
+    return analysis
+
+
+def _analyze_log_worker(lines: List[str]) -> LogAnalysis:
+    """Aggregate a chunk of log lines in a worker process."""
+    from api_explorer_core import _worker_explorer
+    return _analyze_log_lines(_worker_explorer, lines)
+
+
+def analyze_log(explorer: APIExplorer, lines, workers: int = 1) -> LogAnalysis:
+    """
+    Aggregate an access log per OpenAPI operation.
+    
+    With several workers the log is split into chunks that are aggregated
+    in parallel and merged as they come back, so memory stays bounded by
+    the number of operations, not the size of the log.
+    
+    Args:
+        explorer: Loaded API explorer
+        lines: Iterable of JSONL log lines
+        workers: Number of worker processes (1 aggregates in-process)
+        
+    Returns:
+        The merged analysis
+    """
+    if workers <= 1:
+        analysis = _analyze_log_lines(explorer, lines)
+    else:
+        analysis = LogAnalysis()
+        with _worker_pool(explorer, workers) as pool:
+            for partial in _bounded_imap(pool, _analyze_log_worker, _chunked(lines, LOG_CHUNK_SIZE),
+                                         workers * 2):
+                analysis.merge(partial)
+    # Shards each keep up to the cap of unmatched paths; keep the most frequent.
+    if len(analysis.unmatched_paths) > _LOG_URL_CACHE_SIZE:
+        top = sorted(analysis.unmatched_paths.items(), key=lambda item: -item[1])[:_LOG_URL_CACHE_SIZE]
+        analysis.unmatched_paths = dict(top)
+    return analysis
+
+
+def format_log_table(rows: List[Dict[str, Any]]) -> List[str]:
+    """Render LogAnalysis.rows() as an aligned text table."""
+    def number(value):
+        if value is None:
+            return "-"
+        return f"{value:.1f}" if isinstance(value, float) and value < 100 else f"{value:.0f}"
+    
+    header = ("#", "OPERATION", "COUNT", "4XX", "5XX", "P50 MS", "P95 MS", "P99 MS",
+              "P50 B", "P95 B", "P99 B")
+    table = [header]
+    for rank, row in enumerate(rows, 1):
+        latency, size = row["latency_ms"], row["bytes"]
+        table.append((
+            str(rank), row["operation"], str(row["count"]),
+            str(row["statuses"].get("4xx", 0)), str(row["errors"]),
+            number(latency["p50"]), number(latency["p95"]), number(latency["p99"]),
+            number(size["p50"]), number(size["p95"]), number(size["p99"]),
+        ))
+    return _format_table(table, left=(1,))
+
+
+def run_log_analysis(explorer: APIExplorer, args: argparse.Namespace, out) -> LogAnalysis:
+    """
+    Run --analyze-log / --merge-sketches and print the ranked report.
+    
+    Args:
+        explorer: Loaded API explorer
+        args: Parsed arguments (analyze_log, merge_sketches, save_sketches,
+            rank_by, limit, ndjson, workers)
+        out: Text stream the report is written to
+        
+    Returns:
+        The merged analysis
+        
+    Raises:
+        ValueError: When a sketch file is not valid
+    """
+    analysis = LogAnalysis()
+    workers = args.workers or 1
+    for log_file in args.analyze_log or ():
+        with explorer._phase("analyze_log"):
+            if log_file == "-":
+                analysis.merge(analyze_log(explorer, sys.stdin, workers))
+            else:
+                with open(log_file, "r", encoding="utf-8") as f:
+                    analysis.merge(analyze_log(explorer, f, workers))
+    for sketch_file in args.merge_sketches or ():
+        with open(sketch_file, "r", encoding="utf-8") as f:
+            try:
+                analysis.merge(LogAnalysis.from_dict(json.load(f)))
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"'{sketch_file}' is not a sketch file saved with --save-sketches ({e})")
+    if args.save_sketches:
+        _write_if_changed(Path(args.save_sketches), json.dumps(analysis.to_dict()) + "\n")
+    
+    rows = analysis.rows(args.rank_by)
+    if args.limit:
+        rows = rows[:args.limit]
+    if args.ndjson:
+        explorer.write_ndjson(rows, out)
+        return analysis
+    
+    total = sum(entry[0] for entry in analysis.operations.values())
+    out.write(f"\n=== Traffic by operation (ranked by {args.rank_by}) ===\n")
+    for line in format_log_table(rows):
+        out.write(line + "\n")
+    out.write(f"\n{total} requests to {len(analysis.operations)} operations; "
+              f"{analysis.unmatched} unmatched, {analysis.malformed} malformed lines\n")
+    if analysis.unmatched_paths:
+        out.write("Most frequent unmatched paths:\n")
+        top = sorted(analysis.unmatched_paths.items(), key=lambda item: (-item[1], item[0]))[:5]
+        for path, count in top:
+            out.write(f"  {count:>8}  {path}\n")
+    return analysis
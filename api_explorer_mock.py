@@ -0,0 +1,288 @@
+"""
+API Explorer Mock - Mock HTTP server
+Serves every path of the spec with example responses generated from its
+schemas, with optional latency and error injection (--mock).
+"""
+
+import hashlib
+import signal
+import sys
+from collections.abc import Mapping
+from typing import Dict, Any, Optional, Tuple
+
+from api_explorer_core import APIExplorer, Operation, _encode_compact
+
+
+# Fixed values used for example strings of well-known formats.
+_EXAMPLE_FORMATS = {
+    "date-time": "2024-01-01T12:00:00Z",
+    "date": "2024-01-01",
+    "time": "12:00:00",
+    "email": "user@example.com",
+    "uri": "https://example.com/resource",
+    "url": "https://example.com/resource",
+    "hostname": "example.com",
+    "ipv4": "127.0.0.1",
+    "ipv6": "::1",
+    "decimal": "0.00",
+    "binary": "",
+    "byte": "",
+    "password": "password",
+}
+_HTTP_REASONS = {
+    200: "OK", 201: "Created", 202: "Accepted", 204: "No Content", 400: "Bad Request",
+    401: "Unauthorized", 403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed",
+    411: "Length Required", 429: "Too Many Requests", 500: "Internal Server Error",
+    502: "Bad Gateway", 503: "Service Unavailable", 504: "Gateway Timeout",
+}
+
+
+def _example_value(schemas: Mapping, schema: Any, hint: str = "value", seen: Tuple[str, ...] = ()) -> Any:
+    """
+    Build a deterministic example value that satisfies a schema.
+    
+    Explicit example/default/enum values win; otherwise every property of
+    an object is filled in, arrays get max(1, minItems) items, and strings,
+    numbers and formats get fixed values within their bounds. UUIDs are
+    derived from the hint (the property path), so they are stable across
+    runs but differ between fields. A ref cycle ends in null.
+    
+    Args:
+        schemas: components/schemas
+        schema: Schema to build an example for
+        hint: Dotted property path, used for strings and UUIDs
+        seen: Components being expanded (cycle guard)
+        
+    Returns:
+        Example value
+    """
+    if not isinstance(schema, dict):
+        return None
+    for key in ("example", "default"):
+        if key in schema:
+            return schema[key]
+    ref = schema.get("$ref")
+    if isinstance(ref, str):
+        name = ref.split("/")[-1]
+        if name in seen or name not in schemas:
+            return None
+        return _example_value(schemas, schemas[name], hint, seen + (name,))
+    values = schema.get("enum")
+    if isinstance(values, list):
+        return next((value for value in values if value not in (None, "")), values[0] if values else None)
+    if isinstance(schema.get("allOf"), list):
+        merged: Any = None
+        for part in schema["allOf"]:
+            value = _example_value(schemas, part, hint, seen)
+            if isinstance(value, dict) and isinstance(merged, dict):
+                merged = {**merged, **value}
+            elif merged is None:
+                merged = value
+        return merged
+    for key in ("oneOf", "anyOf"):
+        choices = schema.get(key)
+        if isinstance(choices, list) and choices:
+            for choice in choices:
+                value = _example_value(schemas, choice, hint, seen)
+                if value not in (None, ""):
+                    return value
+            return None
+    
+    schema_type = schema.get("type")
+    if schema_type == "object" or "properties" in schema:
+        return {
+            name: _example_value(schemas, prop, f"{hint}.{name}", seen)
+            for name, prop in (schema.get("properties") or {}).items()
+            if not (isinstance(prop, dict) and prop.get("writeOnly"))
+        }
+    if schema_type == "array":
+        item_hint = f"{hint}[]"
+        return [_example_value(schemas, schema.get("items"), item_hint, seen)
+                for _ in range(max(1, schema.get("minItems", 1)))]
+    if schema_type in ("integer", "number"):
+        minimum = schema.get("minimum")
+        exclusive = schema.get("exclusiveMinimum")
+        if isinstance(exclusive, (int, float)) and not isinstance(exclusive, bool):
+            # OpenAPI 3.1 puts the bound itself in exclusiveMinimum.
+            minimum, exclusive = exclusive, True
+        value = 1 if minimum is None else minimum + (1 if exclusive is True else 0)
+        if "maximum" in schema:
+            value = min(value, schema["maximum"])
+        return int(value) if schema_type == "integer" else float(value)
+    if schema_type == "boolean":
+        return True
+    if schema_type == "string":
+        string_format = schema.get("format")
+        if string_format == "uuid":
+            digest = hashlib.sha1(hint.encode("utf-8")).hexdigest()
+            return f"{digest[:8]}-{digest[8:12]}-4{digest[13:16]}-a{digest[17:20]}-{digest[20:32]}"
+        if string_format in _EXAMPLE_FORMATS:
+            return _EXAMPLE_FORMATS[string_format]
+        text = hint.rsplit(".", 1)[-1].strip("[]") or "string"
+        text = text.ljust(schema.get("minLength", 0), "x")
+        return text[: schema["maxLength"]] if "maxLength" in schema else text
+    return None
+
+
+class MockServer:
+    """
+    Loopback HTTP server answering every operation of the spec with examples.
+    
+    Each operation's success response (its lowest 2xx status) is rendered
+    once, up front, from the response schema with _example_value(), so a
+    request costs a trie lookup and a write. Concrete URLs are mapped to
+    path templates with match_url(), whose typed segments reject values
+    the spec does not allow. Latency and errors can be injected; the error
+    sequence comes from a seeded generator, so runs are repeatable.
+    """
+    
+    def __init__(self, explorer: APIExplorer, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, error_status: int = 500, seed: int = 0):
+        """
+        Pre-render every operation's response.
+        
+        Args:
+            explorer: Loaded API explorer
+            latency: Seconds to wait before every response
+            jitter: Extra random delay of up to this many seconds
+            error_rate: Share of requests answered with error_status instead
+            error_status: HTTP status of injected errors
+            seed: Seed for jitter and error injection
+        """
+        import random
+        self.explorer = explorer
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._responses: Dict[Tuple[str, str], bytes] = {}
+        self._allowed: Dict[str, str] = {}
+        # Raw request targets seen before, mapped to their path template.
+        self._routes: Dict[str, Optional[str]] = {}
+        self.stats = {"requests": 0, "errors_injected": 0, "not_found": 0}
+        
+        for endpoint in explorer.schema.get("paths", {}):
+            path_item = explorer.model.path(endpoint)
+            if path_item is None:
+                continue
+            self._allowed[endpoint] = ", ".join(op.method.upper() for op in path_item.operations)
+            for operation in path_item.operations:
+                status, body = self._example_response(operation)
+                self._responses[(endpoint, operation.method.upper())] = self._render(status, body)
+        self._error = self._render(error_status, {"detail": "Injected error"})
+    
+    def _example_response(self, operation: Operation) -> Tuple[int, Any]:
+        """Pick an operation's success status and build its example body."""
+        statuses = sorted(
+            (response for response in operation.responses if response.status.startswith("2")),
+            key=lambda response: response.status,
+        ) or [response for response in operation.responses if response.status == "default"]
+        if not statuses:
+            return 200, None
+        response = statuses[0]
+        status = int(response.status) if response.status.isdigit() else 200
+        for content_type, schema in response.content:
+            if "json" in content_type:
+                hint = operation.operation_id or f"{operation.method}{operation.path}"
+                return status, _example_value(self.explorer.schemas, schema, hint)
+        return status, None
+    
+    @staticmethod
+    def _render(status: int, body: Any, headers: str = "") -> bytes:
+        """Render a complete keep-alive HTTP response."""
+        payload = b"" if body is None else _encode_compact(body).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {_HTTP_REASONS.get(status, 'Status')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(payload)}\r\n{headers}\r\n")
+        return head.encode("latin-1") + payload
+    
+    def respond(self, method: str, target: str) -> bytes:
+        """
+        Return the rendered response for a request (without latency).
+        
+        Args:
+            method: HTTP method
+            target: Request target, possibly with a query string
+            
+        Returns:
+            Complete HTTP response bytes
+        """
+        self.stats["requests"] += 1
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.stats["errors_injected"] += 1
+            return self._error
+        path = target.split("?", 1)[0]
+        if path in self._routes:
+            endpoint = self._routes[path]
+        else:
+            match = self.explorer.match_url(path)
+            endpoint = match["endpoint"] if match else None
+            if len(self._routes) >= 65536:
+                self._routes.clear()
+            self._routes[path] = endpoint
+        if endpoint is None:
+            self.stats["not_found"] += 1
+            return self._render(404, {"detail": f"No path matches '{path}'"})
+        response = self._responses.get((endpoint, method))
+        if response is None:
+            return self._render(405, {"detail": f"Method '{method}' not allowed"},
+                                f"Allow: {self._allowed.get(endpoint, '')}\r\n")
+        return response
+    
+    async def _handle_client(self, reader: "asyncio.StreamReader", writer: "asyncio.StreamWriter"):
+        """Serve HTTP/1.1 requests on one keep-alive connection."""
+        import asyncio
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, _, rest = request_line.decode("latin-1").partition(" ")
+                target = rest.split(" ", 1)[0]
+                length = 0
+                keep_alive = True
+                chunked = False
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    name = name.strip().lower()
+                    if name == "content-length":
+                        length = int(value.strip() or 0)
+                    elif name == "connection":
+                        keep_alive = value.strip().lower() != "close"
+                    elif name == "transfer-encoding":
+                        chunked = "chunked" in value.lower()
+                if chunked:
+                    writer.write(self._render(411, {"detail": "Send a Content-Length"}))
+                    await writer.drain()
+                    break
+                if length:
+                    await reader.readexactly(length)
+                
+                response = self.respond(method, target)
+                delay = self.latency + (self._random.random() * self.jitter if self.jitter else 0.0)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                writer.write(response)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    
+    async def serve(self, port: int = 8000, host: str = "127.0.0.1"):
+        """Serve until cancelled."""
+        import asyncio
+        server = await asyncio.start_server(self._handle_client, host, port, backlog=1024)
+        print(f"Mocking {len(self._responses)} operations of '{self.explorer.schema_file}' "
+              f"on http://{host}:{port}", file=sys.stderr)
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            print(f"Mock stats: {_encode_compact(self.stats)}", file=sys.stderr)
@@ -0,0 +1,666 @@
+"""
+API Explorer Validation - Checks captured traffic against the spec
+Compiles the spec's schemas into validator closures and validates JSONL
+request/response records (--validate) against the operation each one matches.
+"""
+
+import json
+import re
+from collections.abc import Mapping
+from typing import Callable, Dict, Any, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+from api_explorer_core import (
+    APIExplorer, BATCH_CHUNK_SIZE, _MISSING, _bounded_imap, _chunked, _worker_pool,
+)
+
+
+# Most violations reported per traffic record.
+VALIDATION_MAX_ERRORS = 20
+_FORMAT_RES = {
+    "uuid": re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"),
+    "date": re.compile(r"\d{4}-\d{2}-\d{2}"),
+    "date-time": re.compile(r"\d{4}-\d{2}-\d{2}[Tt ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:[Zz]|[+-]\d{2}:?\d{2})?"),
+    "time": re.compile(r"\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?"),
+    "email": re.compile(r"[^@\s]+@[^@\s]+"),
+    "uri": re.compile(r"[A-Za-z][A-Za-z0-9+.\-]*:\S*"),
+}
+_JSON_TYPES = {
+    "string": frozenset((str,)),
+    "integer": frozenset((int,)),
+    "number": frozenset((int, float)),
+    "boolean": frozenset((bool,)),
+    "array": frozenset((list,)),
+    "object": frozenset((dict,)),
+}
+
+
+def _valid(value: Any) -> None:
+    """Validator accepting every value."""
+    return None
+
+
+def _pointer_part(key: Any) -> str:
+    """Escape a key or index as one JSON pointer segment."""
+    return "/" + str(key).replace("~", "~0").replace("/", "~1")
+
+
+def _coerce_query_value(value: Any, param_type: Optional[str], item_type: Optional[str]) -> Any:
+    """
+    Convert a query string value to its declared type.
+    
+    Values that are already typed (records built from decoded JSON) pass
+    through; arrays accept repeated parameters or one comma-separated value.
+    
+    Raises:
+        ValueError: When a string cannot be converted
+    """
+    if param_type == "array":
+        if isinstance(value, str):
+            value = value.split(",") if value else []
+        if isinstance(value, list):
+            return [_coerce_query_value(item, item_type, None) for item in value]
+        return value
+    if not isinstance(value, str):
+        return value
+    if param_type == "integer":
+        return int(value)
+    if param_type == "number":
+        return float(value)
+    if param_type == "boolean":
+        if value not in ("true", "false"):
+            raise ValueError(value)
+        return value == "true"
+    return value
+
+
+class ValidatorCompiler:
+    """
+    Compile JSON schemas into specialized validator closures.
+    
+    A validator takes a decoded JSON value and returns None when it is
+    valid, or a list of (JSON pointer, message) violations. Each schema
+    becomes a closure that only performs the checks it declares, with the
+    constants (required keys, property validators, enums, bounds,
+    compiled patterns) bound in, and valid values never build a pointer.
+    Components are compiled once and shared by every schema referencing
+    them; ref cycles go through a trampoline that is bound when the
+    component is finished.
+    
+    Request bodies never carry readOnly properties and responses never
+    carry writeOnly ones, so a compiler for one direction does not require
+    them.
+    """
+    
+    def __init__(self, schemas: Mapping, direction: str = "response"):
+        """
+        Args:
+            schemas: components/schemas of the spec
+            direction: "request" or "response"
+        """
+        self.schemas = schemas
+        self._skip_required = "readOnly" if direction == "request" else "writeOnly"
+        self._components: Dict[str, Callable[[Any], Optional[List[Tuple[str, str]]]]] = {}
+    
+    def component(self, name: str) -> Callable[[Any], Optional[List[Tuple[str, str]]]]:
+        """Return the validator of a component, compiling it on first use."""
+        validator = self._components.get(name)
+        if validator is not None:
+            return validator
+        target = self.schemas.get(name)
+        if not isinstance(target, dict):
+            return _valid
+        compiled: List[Callable] = []
+        
+        def trampoline(value):
+            return compiled[0](value)
+        
+        self._components[name] = trampoline
+        compiled.append(self.compile(target))
+        # Later users call the compiled validator directly.
+        self._components[name] = compiled[0]
+        return compiled[0]
+    
+    def compile(self, schema: Any) -> Callable[[Any], Optional[List[Tuple[str, str]]]]:
+        """
+        Compile one schema.
+        
+        Args:
+            schema: JSON schema (OpenAPI 3.0 flavour, refs into components)
+            
+        Returns:
+            Validator closure
+        """
+        if not isinstance(schema, dict) or not schema:
+            return _valid
+        nullable = schema.get("nullable") is True
+        
+        ref = schema.get("$ref")
+        if isinstance(ref, str):
+            return self._allow_null(self.component(ref.split("/")[-1]), nullable)
+        
+        checks: List[Callable] = []
+        schema_type = schema.get("type")
+        if isinstance(schema_type, str) and schema_type in _JSON_TYPES:
+            checks.extend(self._type_checks(schema, schema_type))
+        if isinstance(schema.get("enum"), list):
+            checks.append(self._enum_check(schema["enum"]))
+        if isinstance(schema.get("allOf"), list):
+            checks.extend(self.compile(part) for part in schema["allOf"])
+        for keyword in ("oneOf", "anyOf"):
+            if isinstance(schema.get(keyword), list):
+                checks.append(self._choice_check([self.compile(part) for part in schema[keyword]],
+                                                 keyword == "oneOf"))
+        checks = [check for check in checks if check is not _valid]
+        
+        if not (isinstance(schema_type, str) and schema_type in _JSON_TYPES):
+            if not checks:
+                return _valid
+            if len(checks) == 1:
+                return self._allow_null(checks[0], nullable)
+            return self._allow_null(self._all_of(checks), nullable)
+        
+        # Decoded JSON only holds these exact classes, so one set lookup
+        # checks the type (and keeps booleans out of integer and number).
+        classes = _JSON_TYPES[schema_type]
+        null_errors = None if nullable else [("", "must not be null")]
+        type_errors = [("", f"expected {schema_type}")]
+        if not checks:
+            def validate(value):
+                if value.__class__ in classes:
+                    return None
+                return null_errors if value is None else type_errors
+            return validate
+        
+        check = checks[0] if len(checks) == 1 else self._all_of(checks)
+        
+        def validate(value):
+            if value.__class__ in classes:
+                return check(value)
+            return null_errors if value is None else type_errors
+        return validate
+    
+    @staticmethod
+    def _all_of(checks: List[Callable]) -> Callable:
+        """Run several checks and combine their violations."""
+        def check_all(value):
+            errors = None
+            for check in checks:
+                found = check(value)
+                if found:
+                    if errors is None:
+                        errors = []
+                    errors.extend(found)
+            return errors
+        return check_all
+    
+    @staticmethod
+    def _allow_null(validator: Callable, nullable: bool) -> Callable:
+        """Let None through before a validator when the schema is nullable."""
+        if not nullable or validator is _valid:
+            return validator
+        
+        def validate(value):
+            return None if value is None else validator(value)
+        return validate
+    
+    @staticmethod
+    def _enum_check(values: List[Any]) -> Callable:
+        """Check membership in an enum."""
+        try:
+            allowed = frozenset(values)
+        except TypeError:
+            allowed = None
+        message = f"must be one of {json.dumps(values[:10], ensure_ascii=False)}"
+        if len(values) > 10:
+            message = message[:-1] + ", ...]"
+        
+        def check(value):
+            try:
+                found = value in allowed if allowed is not None else value in values
+            except TypeError:
+                found = value in values
+            return None if found else [("", message)]
+        return check
+    
+    @staticmethod
+    def _choice_check(validators: List[Callable], exactly_one: bool) -> Callable:
+        """Check oneOf (exactly one match) or anyOf (at least one match)."""
+        count = len(validators)
+        
+        def check(value):
+            matched = 0
+            for validator in validators:
+                if not validator(value):
+                    if not exactly_one:
+                        return None
+                    matched += 1
+            if matched == 1:
+                return None
+            if matched > 1:
+                return [("", f"matches {matched} of the oneOf schemas")]
+            return [("", f"matches none of the {count} allowed schemas")]
+        return check
+    
+    def _type_checks(self, schema: Dict[str, Any], schema_type: str) -> List[Callable]:
+        """Checks for the keywords of one type, run after the type matched."""
+        checks: List[Callable] = []
+        if schema_type == "object":
+            checks.append(self._object_check(schema))
+        elif schema_type == "array":
+            item_check = self.compile(schema.get("items"))
+            min_items = schema.get("minItems")
+            max_items = schema.get("maxItems")
+            if item_check is not _valid:
+                def check_items(value):
+                    errors = None
+                    for index, item in enumerate(value):
+                        found = item_check(item)
+                        if found:
+                            if errors is None:
+                                errors = []
+                            prefix = f"/{index}"
+                            errors.extend((prefix + pointer, message) for pointer, message in found)
+                    return errors
+                checks.append(check_items)
+            if min_items is not None or max_items is not None:
+                def check_length(value):
+                    if min_items is not None and len(value) < min_items:
+                        return [("", f"needs at least {min_items} items")]
+                    if max_items is not None and len(value) > max_items:
+                        return [("", f"allows at most {max_items} items")]
+                    return None
+                checks.append(check_length)
+        elif schema_type == "string":
+            min_length = schema.get("minLength")
+            max_length = schema.get("maxLength")
+            if min_length is not None or max_length is not None:
+                def check_length(value):
+                    if min_length is not None and len(value) < min_length:
+                        return [("", f"shorter than {min_length} characters")]
+                    if max_length is not None and len(value) > max_length:
+                        return [("", f"longer than {max_length} characters")]
+                    return None
+                checks.append(check_length)
+            pattern = schema.get("pattern")
+            if isinstance(pattern, str):
+                try:
+                    search = re.compile(pattern).search
+                except re.error:
+                    search = None
+                if search is not None:
+                    def check_pattern(value):
+                        return None if search(value) else [("", f"does not match {pattern}")]
+                    checks.append(check_pattern)
+            format_re = _FORMAT_RES.get(schema.get("format"))
+            if format_re is not None:
+                fullmatch = format_re.fullmatch
+                format_message = f"is not a valid {schema['format']}"
+                
+                def check_format(value):
+                    return None if fullmatch(value) else [("", format_message)]
+                checks.append(check_format)
+        elif schema_type in ("integer", "number"):
+            bounds = []
+            for keyword, exclusive_keyword, below in (("minimum", "exclusiveMinimum", True),
+                                                      ("maximum", "exclusiveMaximum", False)):
+                limit = schema.get(keyword)
+                exclusive = schema.get(exclusive_keyword)
+                if isinstance(exclusive, (int, float)) and not isinstance(exclusive, bool):
+                    limit, exclusive = exclusive, True
+                if isinstance(limit, (int, float)):
+                    bounds.append((limit, exclusive is True, below))
+            if bounds:
+                def check_bounds(value):
+                    for limit, exclusive, below in bounds:
+                        if below and (value < limit or exclusive and value == limit):
+                            return [("", f"below the minimum {limit}")]
+                        if not below and (value > limit or exclusive and value == limit):
+                            return [("", f"above the maximum {limit}")]
+                    return None
+                checks.append(check_bounds)
+        return checks
+    
+    def _object_check(self, schema: Dict[str, Any]) -> Callable:
+        """Check required keys, known properties and additional properties."""
+        properties = schema.get("properties") or {}
+        required = tuple(
+            (key, _pointer_part(key)) for key in schema.get("required", ())
+            if isinstance(key, str) and not (properties.get(key) or {}).get(self._skip_required)
+        )
+        property_checks = []
+        for key, prop in properties.items():
+            check = self.compile(prop)
+            if check is not _valid:
+                property_checks.append((key, _pointer_part(key), check))
+        property_checks = tuple(property_checks)
+        known = frozenset(properties)
+        extra_check = None
+        additional = schema.get("additionalProperties", True)
+        if isinstance(additional, dict):
+            extra_check = self.compile(additional)
+            additional = extra_check is _valid
+        elif additional is not False:
+            additional = True
+        
+        def check(value):
+            errors = None
+            for key, pointer in required:
+                if key not in value:
+                    if errors is None:
+                        errors = []
+                    errors.append((pointer, "is required"))
+            for key, pointer, property_check in property_checks:
+                item = value.get(key, _MISSING)
+                if item is not _MISSING:
+                    found = property_check(item)
+                    if found:
+                        if errors is None:
+                            errors = []
+                        errors.extend((pointer + sub, message) for sub, message in found)
+            if additional is not True:
+                for key, item in value.items():
+                    if key in known:
+                        continue
+                    if extra_check is None:
+                        found = [("", "is not an allowed property")]
+                    else:
+                        found = extra_check(item)
+                    if found:
+                        if errors is None:
+                            errors = []
+                        pointer = _pointer_part(key)
+                        errors.extend((pointer + sub, message) for sub, message in found)
+            return errors
+        return check
+
+
+def _validator_compiler(explorer: APIExplorer, direction: str) -> "ValidatorCompiler":
+    """Return the shared validator compiler of a direction (component validators are reused)."""
+    compiler = explorer._validators.get(direction)
+    if compiler is None:
+        compiler = explorer._validators[direction] = ValidatorCompiler(explorer.schemas, direction)
+    return compiler
+
+def _param_type(explorer: APIExplorer, schema: Any) -> Tuple[Optional[str], Any]:
+    """Return the declared type and items schema of a parameter schema, following one $ref."""
+    if isinstance(schema, dict) and isinstance(schema.get("$ref"), str):
+        schema = explorer.schemas.get(schema["$ref"].split("/")[-1])
+    if not isinstance(schema, dict):
+        return None, None
+    return schema.get("type"), schema.get("items")
+
+def operation_validator(explorer: APIExplorer, endpoint: str, method: str):
+    """
+    Return the compiled validator of one operation.
+    
+    The validator takes a traffic record (see validate_record()) plus the
+    path parameters matched from its URL, and returns None when the record
+    conforms, or a list of (location, JSON pointer, message) violations.
+    Parts the record does not carry (no "query", "request", "status" or
+    "response" key) are not checked.
+    
+    Args:
+        endpoint: Path template, e.g. "/api/v1/buses/buses/{id}/"
+        method: HTTP method, lowercase
+        
+    Returns:
+        Validator, or None when the path has no such operation
+    """
+    key = (endpoint, method)
+    if key in explorer._operation_validators:
+        return explorer._operation_validators[key]
+    path_item = explorer.model.path(endpoint)
+    operation = None
+    if path_item is not None:
+        operation = next((op for op in path_item.operations if op.method == method), None)
+    if operation is None:
+        explorer._operation_validators[key] = None
+        return None
+    
+    request_compiler = _validator_compiler(explorer, "request")
+    response_compiler = _validator_compiler(explorer, "response")
+    
+    def json_validator(content, compiler):
+        for content_type, schema in content or ():
+            if "json" in content_type:
+                return compiler.compile(schema)
+        return None
+    
+    path_checks = []
+    query_checks = []
+    for param in operation.parameters:
+        if param.location not in ("path", "query"):
+            continue
+        param_type, items = _param_type(explorer, param.schema)
+        item_type = _param_type(explorer, items)[0] if param_type == "array" else None
+        entry = (param.name, _pointer_part(param.name), param.required, param_type, item_type,
+                 request_compiler.compile(param.schema))
+        (path_checks if param.location == "path" else query_checks).append(entry)
+    request_check = json_validator(operation.request_content, request_compiler)
+    request_required = operation.request_required
+    responses = {
+        response.status: json_validator(response.content, response_compiler)
+        for response in operation.responses
+    }
+    
+    def validate(record: Dict[str, Any], path_params: Dict[str, Any]):
+        errors = []
+        for name, pointer, _, param_type, _, check in path_checks:
+            if name in path_params:
+                found = check(path_params[name])
+                if found:
+                    errors.extend(("path", pointer + sub, message) for sub, message in found)
+        
+        query = record.get("query")
+        if isinstance(query, dict):
+            for name, pointer, required, param_type, item_type, check in query_checks:
+                value = query.get(name, _MISSING)
+                if value is _MISSING:
+                    if required:
+                        errors.append(("query", pointer, "is required"))
+                    continue
+                try:
+                    value = _coerce_query_value(value, param_type, item_type)
+                except ValueError:
+                    errors.append(("query", pointer, f"expected {param_type}"))
+                    continue
+                found = check(value)
+                if found:
+                    errors.extend(("query", pointer + sub, message) for sub, message in found)
+        
+        if "request" in record:
+            body = record["request"]
+            if body is None:
+                if request_required:
+                    errors.append(("request", "", "request body is required"))
+            elif request_check is not None:
+                found = request_check(body)
+                if found:
+                    errors.extend(("request", sub, message) for sub, message in found)
+        
+        if "status" in record:
+            status = str(record["status"])
+            if status in responses:
+                response_check = responses[status]
+            elif status[:1] + "XX" in responses:
+                response_check = responses[status[:1] + "XX"]
+            elif "default" in responses:
+                response_check = responses["default"]
+            else:
+                errors.append(("status", "", f"status {status} is not documented"))
+                response_check = None
+            body = record.get("response")
+            if response_check is not None and body is not None:
+                found = response_check(body)
+                if found:
+                    errors.extend(("response", sub, message) for sub, message in found)
+        return errors or None
+    
+    explorer._operation_validators[key] = validate
+    return validate
+
+def validate_record(explorer: APIExplorer, record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Check one captured request/response against the spec.
+    
+    A record looks like {"method": "POST", "path": "/api/v1/buses/buses/",
+    "query": {...}, "request": {...}, "status": 201, "response": {...}};
+    "url" may be given instead of "path" (its query string is used when
+    there is no "query"), the method defaults to GET and every other key
+    is optional.
+    
+    Args:
+        record: Traffic record
+        
+    Returns:
+        Dict with the matched "endpoint" (None when no path matches), the
+        "operation" ("POST /api/...", None when the path has no such
+        method) and the "errors" found, as {"in", "pointer", "message"} dicts
+    """
+    url = record.get("path", record.get("url"))
+    if not isinstance(url, str):
+        raise ValueError("record needs a 'path' or 'url' string")
+    method = record.get("method", "GET")
+    if not isinstance(method, str):
+        raise ValueError("'method' must be a string")
+    method = method.lower()
+    match = explorer.match_url(url)
+    if match is None:
+        return {"endpoint": None, "operation": None,
+                "errors": [{"in": "path", "pointer": "", "message": "no matching path"}]}
+    endpoint = match["endpoint"]
+    validator = operation_validator(explorer, endpoint, method)
+    if validator is None:
+        message = f"method {method.upper()} not allowed (allowed: {', '.join(match['methods'])})"
+        return {"endpoint": endpoint, "operation": None,
+                "errors": [{"in": "method", "pointer": "", "message": message}]}
+    if "query" not in record and "?" in url:
+        query: Dict[str, Any] = {}
+        for name, value in parse_qsl(url.split("?", 1)[1].split("#", 1)[0], keep_blank_values=True):
+            if name in query:
+                previous = query[name]
+                query[name] = previous + [value] if isinstance(previous, list) else [previous, value]
+            else:
+                query[name] = value
+        record = dict(record, query=query)
+    errors = validator(record, match["params"]) or []
+    return {
+        "endpoint": endpoint,
+        "operation": f"{method.upper()} {endpoint}",
+        "errors": [{"in": where, "pointer": pointer, "message": message} for where, pointer, message in errors],
+    }
+
+
+def _validate_lines(explorer: APIExplorer,
+                    lines: List[Tuple[int, str]]) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    Validate a chunk of JSONL traffic records.
+    
+    Args:
+        explorer: Loaded API explorer
+        lines: (line number, raw line) pairs
+        
+    Returns:
+        One compact JSON line per record that failed (valid records produce
+        no output) and the chunk's counters, as merged by run_validate()
+    """
+    encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    reports = []
+    stats = {"records": 0, "valid": 0, "invalid": 0, "unmatched": 0, "malformed": 0, "operations": {}}
+    operations = stats["operations"]
+    for line_number, line in lines:
+        if not line.strip():
+            continue
+        stats["records"] += 1
+        report: Dict[str, Any] = {"line": line_number}
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("traffic record must be a JSON object")
+            result = explorer.validate_record(record)
+        except ValueError as e:
+            stats["malformed"] += 1
+            report["error"] = str(e)
+            reports.append(encode(report))
+            continue
+        
+        operation = result["operation"]
+        errors = result["errors"]
+        if operation is None:
+            stats["unmatched"] += 1
+        else:
+            counters = operations.get(operation)
+            if counters is None:
+                counters = operations[operation] = {"records": 0, "invalid": 0}
+            counters["records"] += 1
+            if errors:
+                counters["invalid"] += 1
+                stats["invalid"] += 1
+        if not errors:
+            stats["valid"] += 1
+            continue
+        if "id" in record:
+            report["id"] = record["id"]
+        report["method"] = record.get("method", "GET").upper()
+        report["path"] = record.get("path", record.get("url"))
+        report["endpoint"] = result["endpoint"]
+        if "status" in record:
+            report["status"] = record["status"]
+        report["errors"] = errors[:VALIDATION_MAX_ERRORS]
+        if len(errors) > VALIDATION_MAX_ERRORS:
+            report["more_errors"] = len(errors) - VALIDATION_MAX_ERRORS
+        reports.append(encode(report))
+    return reports, stats
+
+
+def _validate_worker(lines: List[Tuple[int, str]]) -> Tuple[List[str], Dict[str, Any]]:
+    """Validate a chunk of traffic records in a worker process."""
+    from api_explorer_core import _worker_explorer
+    return _validate_lines(_worker_explorer, lines)
+
+
+def run_validate(explorer: APIExplorer, lines, out, workers: int = 1) -> Dict[str, Any]:
+    """
+    Validate JSONL traffic records against the spec.
+    
+    Records that violate the spec, match no path or cannot be parsed are
+    written to out as JSONL in input order; valid records produce no output.
+    
+    Args:
+        explorer: Loaded API explorer
+        lines: Iterable of input lines
+        out: Text stream the violation records are written to
+        workers: Number of worker processes (1 validates in-process)
+        
+    Returns:
+        Counters: records, valid, invalid, unmatched, malformed, and
+        per-operation records and invalid counts
+    """
+    totals = {"records": 0, "valid": 0, "invalid": 0, "unmatched": 0, "malformed": 0, "operations": {}}
+    
+    def merge(stats):
+        for key, value in stats.items():
+            if key != "operations":
+                totals[key] += value
+        for operation, counters in stats["operations"].items():
+            merged = totals["operations"].setdefault(operation, {"records": 0, "invalid": 0})
+            merged["records"] += counters["records"]
+            merged["invalid"] += counters["invalid"]
+    
+    chunks = _chunked(enumerate(lines, 1), BATCH_CHUNK_SIZE)
+    if workers <= 1:
+        for reports, stats in (_validate_lines(explorer, chunk) for chunk in chunks):
+            for report in reports:
+                out.write(report + "\n")
+            merge(stats)
+    else:
+        with _worker_pool(explorer, workers) as pool:
+            for reports, stats in _bounded_imap(pool, _validate_worker, chunks, workers * 4):
+                for report in reports:
+                    out.write(report + "\n")
+                merge(stats)
+    totals["operations"] = dict(sorted(totals["operations"].items()))
+    if explorer.profile is not None:
+        explorer.profile.count("validate.records", totals["records"])
+    return totals
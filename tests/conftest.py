@@ -0,0 +1,152 @@
+"""Shared fixtures for the API Explorer tests."""
+
+import copy
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_explorer_core import APIExplorer
+
+
+# A small spec covering the shapes the explorer special-cases: typed path
+# parameters, a ref cycle (Owner <-> Pet), an enum component, a paginated
+# envelope and an unpaginated list.
+SPEC = {
+    "openapi": "3.0.3",
+    "info": {"title": "Pets", "version": "1.0.0"},
+    "paths": {
+        "/api/v1/pets/": {
+            "get": {
+                "operationId": "pets_list",
+                "tags": ["pets"],
+                "description": "List every pet in the shelter",
+                "parameters": [
+                    {"name": "limit", "in": "query", "schema": {"type": "integer"}},
+                    {"name": "offset", "in": "query", "schema": {"type": "integer"}},
+                ],
+                "responses": {"200": {"description": "", "content": {"application/json": {
+                    "schema": {"$ref": "#/components/schemas/PaginatedPetList"}}}}},
+            },
+            "post": {
+                "operationId": "pets_create",
+                "tags": ["pets"],
+                "requestBody": {"required": True, "content": {"application/json": {
+                    "schema": {"$ref": "#/components/schemas/PetRequest"}}}},
+                "responses": {"201": {"description": "", "content": {"application/json": {
+                    "schema": {"$ref": "#/components/schemas/Pet"}}}}},
+            },
+        },
+        "/api/v1/pets/{id}/": {
+            "get": {
+                "operationId": "pets_retrieve",
+                "tags": ["pets"],
+                "parameters": [{"name": "id", "in": "path", "required": True, "schema": {"type": "integer"}}],
+                "responses": {"200": {"description": "", "content": {"application/json": {
+                    "schema": {"$ref": "#/components/schemas/Pet"}}}}},
+            },
+        },
+        "/api/v1/pets/{id}/vaccinate/": {
+            "post": {
+                "operationId": "pets_vaccinate",
+                "tags": ["pets"],
+                "parameters": [{"name": "id", "in": "path", "required": True, "schema": {"type": "integer"}}],
+                "responses": {"204": {"description": "Vaccinated"}},
+            },
+        },
+        "/api/v1/pets/{slug}/": {
+            "delete": {
+                "operationId": "pets_destroy_by_slug",
+                "tags": ["pets"],
+                "parameters": [{"name": "slug", "in": "path", "required": True, "schema": {"type": "string"}}],
+                "responses": {"204": {"description": ""}},
+            },
+        },
+        "/api/v1/owners/{owner_id}/": {
+            "get": {
+                "operationId": "owners_retrieve",
+                "tags": ["owners"],
+                "parameters": [{"name": "owner_id", "in": "path", "required": True,
+                                "schema": {"type": "string", "format": "uuid"}}],
+                "responses": {"200": {"description": "", "content": {"application/json": {
+                    "schema": {"$ref": "#/components/schemas/Owner"}}}}},
+            },
+        },
+        "/api/v1/owners/": {
+            "get": {
+                "operationId": "owners_list",
+                "tags": ["owners"],
+                "responses": {"200": {"description": "", "content": {"application/json": {
+                    "schema": {"type": "array", "items": {"$ref": "#/components/schemas/Owner"}}}}}},
+            },
+        },
+    },
+    "components": {
+        "schemas": {
+            "Pet": {
+                "type": "object",
+                "required": ["id", "name"],
+                "properties": {
+                    "id": {"type": "integer", "readOnly": True},
+                    "name": {"type": "string", "maxLength": 40},
+                    "species": {"$ref": "#/components/schemas/SpeciesEnum"},
+                    "owner": {"$ref": "#/components/schemas/Owner"},
+                    "nicknames": {"type": "array", "items": {"type": "string"}},
+                },
+            },
+            "PetRequest": {
+                "type": "object",
+                "required": ["name"],
+                "properties": {
+                    "name": {"type": "string", "minLength": 1, "maxLength": 40},
+                    "species": {"$ref": "#/components/schemas/SpeciesEnum"},
+                },
+            },
+            "Owner": {
+                "type": "object",
+                "required": ["id"],
+                "properties": {
+                    "id": {"type": "string", "format": "uuid"},
+                    "full_name": {"type": "string"},
+                    "pets": {"type": "array", "items": {"$ref": "#/components/schemas/Pet"}},
+                },
+            },
+            "SpeciesEnum": {"type": "string", "enum": ["cat", "dog", "parrot"]},
+            "PaginatedPetList": {
+                "type": "object",
+                "properties": {
+                    "count": {"type": "integer"},
+                    "results": {"type": "array", "items": {"$ref": "#/components/schemas/Pet"}},
+                },
+            },
+        },
+    },
+}
+
+
+def write_spec(path, spec) -> str:
+    """Write a spec to path and return the path as a string."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(spec, f, indent=2)
+    return str(path)
+
+
+@pytest.fixture
+def spec():
+    """A private copy of the test spec, free to modify."""
+    return copy.deepcopy(SPEC)
+
+
+@pytest.fixture
+def spec_file(tmp_path, spec):
+    """The test spec written to a temporary file."""
+    return write_spec(tmp_path / "api_schema.json", spec)
+
+
+@pytest.fixture
+def explorer(spec_file):
+    """An explorer over the test spec, with the schema cache enabled."""
+    return APIExplorer(spec_file)
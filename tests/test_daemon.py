@@ -0,0 +1,122 @@
+"""Tests for the resident query daemon (--serve) and its thin client."""
+
+import asyncio
+import io
+import json
+import os
+
+from api_explorer_client import forward_to_daemon
+from api_explorer_core import build_parser, run_query
+from api_explorer_daemon import ExplorerServer
+
+
+def _serve(server, socket_path, talk):
+    """Run the daemon on socket_path while talk(reader, writer) runs, and return its result."""
+    async def run():
+        serving = asyncio.create_task(server.serve(socket_path=socket_path))
+        while not os.path.exists(socket_path):
+            await asyncio.sleep(0.01)
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+        try:
+            return await talk(reader, writer)
+        finally:
+            writer.close()
+            serving.cancel()
+            try:
+                await serving
+            except asyncio.CancelledError:
+                pass
+
+    return asyncio.run(run())
+
+
+def _exchange(server, socket_path, requests):
+    """Send requests one after the other on one connection and return the answers."""
+    async def talk(reader, writer):
+        answers = []
+        for request in requests:
+            writer.write(json.dumps(request).encode("utf-8") + b"\n")
+            await writer.drain()
+            answers.append(json.loads(await reader.readline()))
+        return answers
+
+    return _serve(server, socket_path, talk)
+
+
+def _local_output(explorer, argv):
+    out = io.StringIO()
+    run_query(explorer, build_parser().parse_args(argv), out)
+    return out.getvalue()
+
+
+def test_help_is_answered_and_the_daemon_keeps_serving(explorer, tmp_path):
+    server = ExplorerServer(explorer)
+    help_answer, short_help, usage_error, match = _exchange(server, str(tmp_path / "d.sock"), [
+        {"argv": ["--help"]},
+        {"argv": ["-h"]},
+        {"argv": ["--max-depth", "deep"]},
+        {"argv": ["--match", "/api/v1/pets/7/"]},
+    ])
+    assert help_answer["status"] == 0
+    assert help_answer["output"].startswith("usage:")
+    assert "--schema-file" in help_answer["output"]
+    assert short_help == help_answer
+    assert "invalid int value" in usage_error["error"]
+    assert match == {"output": _local_output(explorer, ["--match", "/api/v1/pets/7/"]), "status": 0}
+
+
+def test_query_records_and_forwarded_arguments(explorer, spec_file, tmp_path):
+    server = ExplorerServer(explorer)
+    record, forwarded, other_schema, unsupported = _exchange(server, str(tmp_path / "d.sock"), [
+        {"op": "match", "arg": "/api/v1/pets/7/"},
+        {"argv": ["--analysis", "/api/v1/pets/"], "schema_file": spec_file},
+        {"argv": ["--analysis", "/api/v1/pets/"], "schema_file": str(tmp_path / "other.json")},
+        {"argv": ["--batch", "-"]},
+    ])
+    assert record["result"]["endpoint"] == "/api/v1/pets/{id}/"
+    assert record["result"]["params"] == {"id": 7}
+    assert forwarded == {"output": _local_output(explorer, ["--analysis", "/api/v1/pets/"]), "status": 0}
+    assert "daemon serves" in other_schema["error"]
+    assert "not available through --client" in unsupported["error"]
+
+
+def test_unexpected_errors_are_answered(explorer, tmp_path, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("index is broken")
+
+    monkeypatch.setattr(explorer, "get_endpoint_analysis", fail)
+    server = ExplorerServer(explorer)
+    failed, forwarded_failure, match = _exchange(server, str(tmp_path / "d.sock"), [
+        {"op": "analysis", "arg": "/api/v1/pets/"},
+        {"argv": ["--analysis", "/api/v1/pets/"]},
+        {"op": "match", "arg": "/api/v1/owners/"},
+    ])
+    assert failed == {"error": "RuntimeError: index is broken"}
+    assert forwarded_failure == {"error": "RuntimeError: index is broken"}
+    assert match["result"]["endpoint"] == "/api/v1/owners/"
+
+
+def test_client_forwards_and_falls_back(explorer, spec_file, tmp_path, capsys):
+    socket_path = str(tmp_path / "d.sock")
+    argv = ["--client", "--schema-file", spec_file, f"--socket={socket_path}", "--analysis", "/api/v1/pets/"]
+
+    async def talk(reader, writer):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, forward_to_daemon, argv)
+
+    status = _serve(ExplorerServer(explorer), socket_path, talk)
+    assert status == 0
+    assert capsys.readouterr().out == _local_output(explorer, ["--analysis", "/api/v1/pets/"])
+    # Nobody listens any more: the caller runs the command locally.
+    assert forward_to_daemon(argv) is None
+
+
+def test_http_requests_from_other_hosts_are_rejected(explorer):
+    server = ExplorerServer(explorer)
+    server._port = 8765
+    json_post = {"content-type": "application/json"}
+    assert server._reject_http_request("POST", {"host": "127.0.0.1:8765", **json_post}) is None
+    assert server._reject_http_request("GET", {"host": "localhost"}) is None
+    assert server._reject_http_request("POST", {"host": "evil.example:8765", **json_post})[0] == 403
+    assert server._reject_http_request("POST", {"host": "127.0.0.1:9999", **json_post})[0] == 403
+    assert server._reject_http_request("POST", {"host": "127.0.0.1:8765", "content-type": "text/plain"})[0] == 415
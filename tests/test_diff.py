@@ -0,0 +1,145 @@
+"""Tests for schema diffs and incremental index updates on reload."""
+
+import os
+
+import pytest
+
+from api_explorer_core import APIExplorer
+from conftest import write_spec
+
+UUID = "3fa85f64-5717-4562-b3fc-2c963f66afa6"
+
+
+def _rewrite(spec_file, spec):
+    """Write spec over spec_file and make sure its mtime moves forward."""
+    before = os.stat(spec_file).st_mtime_ns
+    write_spec(spec_file, spec)
+    os.utime(spec_file, ns=(before + 1_000_000, before + 1_000_000))
+
+
+def _edit_component(spec):
+    spec["components"]["schemas"]["SpeciesEnum"]["enum"].append("hamster")
+
+
+def _edit_leaf_description(spec):
+    spec["components"]["schemas"]["PaginatedPetList"]["description"] = "One page of pets"
+
+
+def _add_path(spec):
+    spec["paths"]["/api/v1/toys/{toy_id}/"] = {"get": {
+        "operationId": "toys_retrieve",
+        "tags": ["toys"],
+        "parameters": [{"name": "toy_id", "in": "path", "required": True, "schema": {"type": "integer"}}],
+        "responses": {"200": {"description": "", "content": {"application/json": {
+            "schema": {"$ref": "#/components/schemas/Pet"}}}}},
+    }}
+
+
+def _remove_path(spec):
+    del spec["paths"]["/api/v1/pets/{slug}/"]
+
+
+def _edit_operation(spec):
+    spec["paths"]["/api/v1/pets/{id}/vaccinate/"]["post"]["summary"] = "Record a rabies shot"
+
+
+def _add_component(spec):
+    schemas = spec["components"]["schemas"]
+    schemas["Collar"] = {"type": "object", "properties": {"owner": {"$ref": "#/components/schemas/Owner"}}}
+    schemas["Pet"]["properties"]["collar"] = {"$ref": "#/components/schemas/Collar"}
+
+
+def _remove_component(spec):
+    del spec["components"]["schemas"]["PetRequest"]["properties"]["species"]
+    spec["components"]["schemas"]["Pet"]["properties"]["species"] = {"type": "string"}
+    del spec["components"]["schemas"]["SpeciesEnum"]
+
+
+def _retype_parameter(spec):
+    parameter = spec["paths"]["/api/v1/pets/{id}/"]["get"]["parameters"][0]
+    parameter["schema"] = {"type": "string", "format": "uuid"}
+
+
+def test_diff_schema_reports_added_removed_and_modified_operations(explorer, spec, tmp_path):
+    _add_path(spec)
+    _remove_path(spec)
+    _edit_operation(spec)
+    _edit_component(spec)
+    new = APIExplorer(write_spec(tmp_path / "new.json", spec), use_cache=False)
+
+    diff = explorer.diff_schema(new)
+    operations = diff["operations"]
+    assert operations["added"] == ["GET /api/v1/toys/{toy_id}/"]
+    assert operations["removed"] == ["DELETE /api/v1/pets/{slug}/"]
+    assert operations["modified"] == {
+        "POST /api/v1/pets/{id}/vaccinate/": [{"pointer": "/summary", "change": "added"}],
+    }
+    # Every operation that reaches SpeciesEnum is affected, through the
+    # component it references directly.
+    assert operations["affected"] == {
+        "GET /api/v1/pets/": ["PaginatedPetList"],
+        "POST /api/v1/pets/": ["Pet", "PetRequest"],
+        "GET /api/v1/pets/{id}/": ["Pet"],
+        "GET /api/v1/owners/{owner_id}/": ["Owner"],
+        "GET /api/v1/owners/": ["Owner"],
+    }
+    assert diff["components"]["modified"] == {"SpeciesEnum": [{"pointer": "/enum/3", "change": "added"}]}
+    assert diff["summary"]["operations_added"] == 1
+    assert diff["summary"]["operations_removed"] == 1
+    assert diff["summary"]["operations_modified"] == 1
+
+
+def test_diff_schema_without_pointers_and_against_itself(explorer, spec, tmp_path):
+    assert not any(explorer.diff_schema(explorer)["summary"].values())
+    _edit_operation(spec)
+    new = APIExplorer(write_spec(tmp_path / "new.json", spec), use_cache=False)
+    assert explorer.diff_schema(new, pointers=False)["operations"]["modified"] == {
+        "POST /api/v1/pets/{id}/vaccinate/": [],
+    }
+
+
+def test_reload_if_changed_is_none_for_an_untouched_file(explorer):
+    assert explorer.reload_if_changed() is None
+
+
+@pytest.mark.parametrize("edit", [
+    _edit_component,
+    _edit_leaf_description,
+    _add_path,
+    _remove_path,
+    _edit_operation,
+    _add_component,
+    _remove_component,
+    _retype_parameter,
+], ids=lambda edit: edit.__name__.lstrip("_"))
+def test_updated_indexes_match_a_fresh_build(explorer, spec, spec_file, edit):
+    explorer._build_indexes()
+    edit(spec)
+    _rewrite(spec_file, spec)
+
+    new, changes = explorer.reload_if_changed()
+    fresh = APIExplorer(spec_file, use_cache=False)
+    for name in APIExplorer._INDEX_BUILDERS:
+        assert new._get_index(name) == fresh._get_index(name), name
+    assert set(changes["indexes"]) == set(APIExplorer._INDEX_BUILDERS)
+    for query in ("pets", "pet*", "vacinate~", "tag:toys", "param:toy_id"):
+        assert new.search(query) == fresh.search(query), query
+    for url in ("/api/v1/pets/7/", f"/api/v1/pets/{UUID}/", "/api/v1/pets/abc/", "/api/v1/toys/3/"):
+        assert new.match_url(url) == fresh.match_url(url), url
+    # The previous explorer keeps answering for the old version.
+    assert explorer.match_url("/api/v1/pets/7/")["params"] == {"id": 7}
+
+
+def test_reload_only_recomputes_what_a_change_reaches(explorer, spec, spec_file):
+    explorer._build_indexes()
+    _edit_leaf_description(spec)
+    _rewrite(spec_file, spec)
+
+    new, changes = explorer.reload_if_changed()
+    assert changes["summary"]["components_modified"] == 1
+    assert changes["operations"]["affected"] == {"GET /api/v1/pets/": ["PaginatedPetList"]}
+    indexes = changes["indexes"]
+    assert indexes["component_hashes"] == {"rebuilt": 1, "reused": 4}
+    assert indexes["ref_closures"] == {"rebuilt": 1, "reused": 4}
+    assert indexes["search_index"] == {"rebuilt": 1, "reused": 6}
+    assert indexes["path_trie"]["rebuilt"] == 0
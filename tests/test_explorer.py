@@ -0,0 +1,118 @@
+"""Tests for search, URL matching, ref resolution and the schema cache."""
+
+import pytest
+
+from api_explorer_core import APIExplorer
+
+
+def _operations(results):
+    return [f"{result['method']} {result['endpoint']}" for result in results]
+
+
+def test_search_ranks_operations_by_where_terms_match(explorer):
+    results = explorer.search("pets")
+    # Path, tag and operation id matches outrank a nested property name.
+    assert all(result["endpoint"].startswith("/api/v1/pets/") for result in results[:5])
+    assert sorted(_operations(results[5:])) == ["GET /api/v1/owners/", "GET /api/v1/owners/{owner_id}/"]
+    assert results[5]["matched_fields"] == ["property"]
+    assert [result["score"] for result in results] == sorted((r["score"] for r in results), reverse=True)
+    assert set(results[0]) == {"endpoint", "method", "operation_id", "score", "matched_fields"}
+
+
+def test_search_prefix(explorer):
+    assert _operations(explorer.search("pet")) == ["GET /api/v1/pets/"]
+    prefixed = explorer.search("pet", prefix=True)
+    assert len(prefixed) == 7
+    # Only the list operation also matches "pet" in its description.
+    assert _operations(prefixed)[0] == "GET /api/v1/pets/"
+    assert prefixed[0]["score"] > prefixed[1]["score"]
+    assert _operations(explorer.search("vacc*")) == ["POST /api/v1/pets/{id}/vaccinate/"]
+
+
+def test_search_fuzzy(explorer):
+    assert explorer.search("vacinate") == []
+    assert _operations(explorer.search("vacinate", fuzzy=True)) == ["POST /api/v1/pets/{id}/vaccinate/"]
+    assert _operations(explorer.search("vacinate~")) == ["POST /api/v1/pets/{id}/vaccinate/"]
+
+
+def test_search_fields_and_terms(explorer):
+    assert sorted(_operations(explorer.search("tag:owners"))) == [
+        "GET /api/v1/owners/",
+        "GET /api/v1/owners/{owner_id}/",
+    ]
+    assert _operations(explorer.search("param:limit")) == ["GET /api/v1/pets/"]
+    assert _operations(explorer.search("list shelter")) == ["GET /api/v1/pets/"]
+    assert len(explorer.search("pets", limit=2)) == 2
+
+
+def test_match_url_converts_typed_parameters(explorer):
+    assert explorer.match_url("/api/v1/pets/7/") == {
+        "endpoint": "/api/v1/pets/{id}/",
+        "params": {"id": 7},
+        "methods": ["GET"],
+    }
+    assert explorer.match_url("/api/v1/pets/-3/")["params"] == {"id": -3}
+
+
+def test_match_url_falls_back_to_untyped_templates(explorer):
+    match = explorer.match_url("/api/v1/pets/abc/")
+    assert match["endpoint"] == "/api/v1/pets/{slug}/"
+    assert match["params"] == {"slug": "abc"}
+    assert match["methods"] == ["DELETE"]
+
+
+def test_match_url_checks_formats_and_strips_host_and_query(explorer):
+    uuid = "3fa85f64-5717-4562-b3fc-2c963f66afa6"
+    match = explorer.match_url(f"https://api.example.com/api/v1/owners/{uuid}/?expand=pets")
+    assert match["endpoint"] == "/api/v1/owners/{owner_id}/"
+    assert match["params"] == {"owner_id": uuid}
+    assert explorer.match_url("/api/v1/owners/not-a-uuid/") is None
+    assert explorer.match_url("/nope/") is None
+
+
+def test_resolve_all_refs_stops_at_cycles(explorer):
+    pet = explorer._resolve_all_refs({"$ref": "#/components/schemas/Pet"})
+    assert pet["properties"]["species"]["enum"] == ["cat", "dog", "parrot"]
+    owner = pet["properties"]["owner"]
+    assert owner["properties"]["id"]["format"] == "uuid"
+    assert owner["properties"]["pets"]["items"] == {
+        "$ref": "#/components/schemas/Pet",
+        "_resolved": "circular_reference",
+    }
+
+
+def test_resolve_all_refs_max_depth(explorer):
+    pet = explorer._resolve_all_refs({"$ref": "#/components/schemas/Pet"}, max_depth=1)
+    assert pet["properties"]["name"] == {"type": "string", "maxLength": 40}
+    for name, component in (("species", "SpeciesEnum"), ("owner", "Owner")):
+        assert pet["properties"][name] == {"$ref": f"#/components/schemas/{component}", "_resolved": "max_depth"}
+
+
+def test_resolve_all_refs_max_nodes(explorer):
+    pet = explorer._resolve_all_refs({"$ref": "#/components/schemas/Pet"}, max_nodes=3)
+    assert pet["properties"]["species"]["_resolved"] == "max_nodes"
+    assert pet["properties"]["owner"]["_resolved"] == "max_nodes"
+
+
+def test_resolve_all_refs_limits_do_not_leak_into_unlimited_calls(explorer):
+    explorer._resolve_all_refs({"$ref": "#/components/schemas/Pet"}, max_depth=1)
+    pet = explorer._resolve_all_refs({"$ref": "#/components/schemas/Pet"})
+    assert "_resolved" not in pet["properties"]["owner"]
+
+
+def test_warm_cache_matches_a_cold_load(explorer, spec_file):
+    explorer._build_indexes()
+    warm = APIExplorer(spec_file)
+    cold = APIExplorer(spec_file, use_cache=False)
+    assert warm._cache_hit and not cold._cache_hit
+    assert warm.schema == cold.schema
+    for name in APIExplorer._INDEX_BUILDERS:
+        assert warm._get_index(name) == cold._get_index(name), name
+    assert warm.search("pet", prefix=True) == cold.search("pet", prefix=True)
+
+
+@pytest.mark.parametrize("url", ["/api/v1/pets/7/", "/api/v1/pets/abc/", "/api/v1/owners/"])
+def test_match_url_is_stable_across_cache_loads(explorer, spec_file, url):
+    expected = explorer.match_url(url)
+    assert APIExplorer(spec_file).match_url(url) == expected
+    assert APIExplorer(spec_file, use_cache=False).match_url(url) == expected
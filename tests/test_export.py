@@ -0,0 +1,103 @@
+"""Tests for --export-all and --generate-dart: idempotent, incremental output."""
+
+import os
+
+import pytest
+
+from api_explorer_core import APIExplorer
+from conftest import write_spec
+
+
+def _snapshot(directory):
+    """Map every file name in directory to its content."""
+    snapshot = {}
+    for name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, name), "rb") as f:
+            snapshot[name] = f.read()
+    return snapshot
+
+
+def _mtimes(directory):
+    return {name: os.stat(os.path.join(directory, name)).st_mtime_ns for name in os.listdir(directory)}
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_export_all_is_idempotent(explorer, tmp_path, workers):
+    out_dir = str(tmp_path / "export")
+    first = explorer.export_all(out_dir, workers=workers)
+    assert first["total_endpoints"] == 6
+    assert (first["written"], first["unchanged"], first["removed"]) == (6, 0, 0)
+    assert "api.v1.pets.{id}.json" in os.listdir(out_dir)
+    files, mtimes = _snapshot(out_dir), _mtimes(out_dir)
+
+    second = explorer.export_all(out_dir, workers=workers)
+    assert (second["written"], second["unchanged"], second["removed"]) == (0, 6, 0)
+    assert _snapshot(out_dir) == files
+    assert _mtimes(out_dir) == mtimes
+
+
+def test_export_all_rewrites_only_changed_endpoints(explorer, spec, tmp_path):
+    out_dir = str(tmp_path / "export")
+    explorer.export_all(out_dir)
+    del spec["paths"]["/api/v1/owners/"]
+    spec["paths"]["/api/v1/pets/{id}/vaccinate/"]["post"]["summary"] = "Record a rabies shot"
+    new = APIExplorer(write_spec(tmp_path / "new.json", spec), use_cache=False)
+
+    summary = new.export_all(out_dir)
+    assert (summary["written"], summary["unchanged"], summary["removed"]) == (1, 4, 1)
+    assert "api.v1.owners.json" not in os.listdir(out_dir)
+    fresh_dir = str(tmp_path / "fresh")
+    new.export_all(fresh_dir)
+    assert _snapshot(out_dir) == _snapshot(fresh_dir)
+
+
+def test_export_all_matches_between_worker_counts(explorer, tmp_path):
+    serial, parallel = str(tmp_path / "serial"), str(tmp_path / "parallel")
+    explorer.export_all(serial)
+    explorer.export_all(parallel, workers=2)
+    assert _snapshot(serial) == _snapshot(parallel)
+
+
+def test_dart_models_are_idempotent(explorer, tmp_path):
+    out_dir = str(tmp_path / "models")
+    first = explorer.generate_dart_models(out_dir)
+    assert first["total_models"] == 5
+    assert (first["written"], first["unchanged"], first["removed"]) == (5, 0, 0)
+    assert "species_enum.dart" in os.listdir(out_dir)
+    files, mtimes = _snapshot(out_dir), _mtimes(out_dir)
+
+    second = explorer.generate_dart_models(out_dir)
+    assert (second["generated"], second["written"], second["unchanged"]) == (0, 0, 5)
+    assert _snapshot(out_dir) == files
+    assert _mtimes(out_dir) == mtimes
+
+
+def test_dart_models_follow_schema_changes(explorer, spec, tmp_path):
+    out_dir = str(tmp_path / "models")
+    explorer.generate_dart_models(out_dir)
+    schemas = spec["components"]["schemas"]
+    schemas["SpeciesEnum"]["enum"].append("hamster")
+    del schemas["PaginatedPetList"]
+    spec["paths"]["/api/v1/pets/"]["get"]["responses"]["200"]["content"]["application/json"]["schema"] = {
+        "type": "array", "items": {"$ref": "#/components/schemas/Pet"}}
+    new = APIExplorer(write_spec(tmp_path / "new.json", spec), use_cache=False)
+
+    summary = new.generate_dart_models(out_dir)
+    assert (summary["written"], summary["removed"]) == (1, 1)
+    assert "paginated_pet_list.dart" not in os.listdir(out_dir)
+    with open(os.path.join(out_dir, "species_enum.dart"), encoding="utf-8") as f:
+        assert "hamster" in f.read()
+    fresh_dir = str(tmp_path / "fresh")
+    new.generate_dart_models(fresh_dir)
+    assert _snapshot(out_dir) == _snapshot(fresh_dir)
+
+
+def test_dart_models_for_some_components_keep_the_others(explorer, tmp_path):
+    out_dir = str(tmp_path / "models")
+    explorer.generate_dart_models(out_dir)
+    files = _snapshot(out_dir)
+    summary = explorer.generate_dart_models(out_dir, components=["Pet"])
+    # Pet pulls in the components it references.
+    assert summary["total_models"] == 3
+    assert summary["removed"] == 0
+    assert _snapshot(out_dir) == files
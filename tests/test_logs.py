@@ -0,0 +1,151 @@
+"""Tests for access log analysis and its quantile sketches."""
+
+import json
+import math
+import random
+
+import pytest
+
+from api_explorer_logs import LogAnalysis, QuantileSketch, _analyze_log_lines, _log_number, analyze_log
+
+QUANTILES = (0.0, 0.1, 0.5, 0.9, 0.95, 0.99, 0.999, 1.0)
+
+
+def _latencies(seed, count):
+    rng = random.Random(seed)
+    return [rng.lognormvariate(3, 1.5) for _ in range(count)]
+
+
+def _sketch(values, accuracy=0.01):
+    sketch = QuantileSketch(accuracy)
+    for value in values:
+        sketch.add(value)
+    return sketch
+
+
+def _true_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[math.floor(q * (len(ordered) - 1))]
+
+
+@pytest.mark.parametrize("accuracy", [0.01, 0.05])
+def test_quantiles_are_within_relative_accuracy(accuracy):
+    values = _latencies(1, 5000)
+    sketch = _sketch(values, accuracy)
+    for q in QUANTILES:
+        expected = _true_quantile(values, q)
+        assert abs(sketch.quantile(q) - expected) <= accuracy * expected * (1 + 1e-9), q
+    assert (sketch.min, sketch.max) == (min(values), max(values))
+
+
+def test_zeros_and_empty_sketches():
+    assert QuantileSketch().quantile(0.5) is None
+    sketch = _sketch([0, -1, 0, 10, 20])
+    assert sketch.zeros == 3
+    assert sketch.quantile(0.5) == 0.0
+    assert sketch.quantile(1.0) == pytest.approx(20, rel=0.01)
+
+
+def test_merged_sketches_equal_one_sketch_of_all_values():
+    first, second = _latencies(2, 3000), _latencies(3, 2000) + [0.0]
+    merged = _sketch(first)
+    merged.merge(_sketch(second))
+    whole = _sketch(first + second)
+    assert merged.bins == whole.bins
+    assert (merged.zeros, merged.count, merged.min, merged.max) == (whole.zeros, whole.count, whole.min, whole.max)
+    assert merged.total == pytest.approx(whole.total)
+    for q in QUANTILES:
+        assert merged.quantile(q) == whole.quantile(q)
+        expected = _true_quantile(first + second, q)
+        assert merged.quantile(q) == pytest.approx(expected, rel=0.01, abs=1e-12)
+
+
+def test_merging_into_an_empty_sketch():
+    values = _latencies(4, 100)
+    merged = QuantileSketch()
+    merged.merge(_sketch(values))
+    assert merged.to_dict() == _sketch(values).to_dict()
+
+
+def test_merge_rejects_a_different_accuracy():
+    with pytest.raises(ValueError):
+        QuantileSketch(0.01).merge(QuantileSketch(0.02))
+
+
+def test_sketch_round_trips_through_json():
+    sketch = _sketch(_latencies(5, 500))
+    restored = QuantileSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+    assert restored.to_dict() == sketch.to_dict()
+    assert [restored.quantile(q) for q in QUANTILES] == [sketch.quantile(q) for q in QUANTILES]
+    empty = QuantileSketch.from_dict(QuantileSketch().to_dict())
+    assert empty.count == 0 and empty.quantile(0.5) is None
+
+
+def test_log_number_takes_the_first_numeric_field():
+    assert _log_number({"duration_ms": 12.5}, ("duration_ms", "duration")) == 12.5
+    assert _log_number({"duration": "7"}, ("duration_ms", "duration")) == 7.0
+    assert _log_number({"duration_ms": "n/a", "duration": 3}, ("duration_ms", "duration")) == 3
+    assert _log_number({"duration_ms": True}, ("duration_ms",)) is None
+    assert _log_number({}, ("duration_ms",)) is None
+
+
+LOG_LINES = [
+    json.dumps({"method": "GET", "url": "/api/v1/pets/7/", "status": 200, "duration_ms": 10, "bytes": 100}),
+    json.dumps({"method": "GET", "url": "https://api.example.com/api/v1/pets/8/?x=1", "status": 200,
+                "duration_ms": 30, "bytes": 300}),
+    json.dumps({"method": "get", "path": "/api/v1/pets/9/", "status": 503, "duration": "50"}),
+    json.dumps({"method": "POST", "url": "/api/v1/pets/", "status": 201, "duration_ms": 200, "size": 80}),
+    json.dumps({"url": "/api/v1/owners/", "status": 200, "duration_ms": 5}),
+    json.dumps({"method": "GET", "url": "/nowhere/", "status": 404}),
+    json.dumps({"method": "GET", "url": "/nowhere/", "status": 404}),
+    "not json",
+    json.dumps({"method": "GET"}),
+    "",
+]
+
+
+def test_log_lines_are_aggregated_per_operation(explorer):
+    analysis = _analyze_log_lines(explorer, LOG_LINES)
+    assert analysis.malformed == 2
+    assert analysis.unmatched == 2
+    assert analysis.unmatched_paths == {"/nowhere/": 2}
+
+    rows = {row["operation"]: row for row in analysis.rows()}
+    retrieve = rows["GET /api/v1/pets/{id}/"]
+    assert retrieve["count"] == 3
+    assert retrieve["statuses"] == {"2xx": 2, "5xx": 1}
+    assert retrieve["errors"] == 1
+    assert retrieve["total_ms"] == 90
+    assert retrieve["total_bytes"] == 400
+    assert retrieve["latency_ms"]["max"] == 50
+    assert retrieve["latency_ms"]["p50"] == pytest.approx(30, rel=0.01)
+    assert rows["POST /api/v1/pets/"]["total_bytes"] == 80
+    assert rows["GET /api/v1/owners/"]["bytes"]["p50"] is None
+
+
+@pytest.mark.parametrize("rank_by, first", [
+    ("count", "GET /api/v1/pets/{id}/"),
+    ("total-time", "POST /api/v1/pets/"),
+    ("p50", "POST /api/v1/pets/"),
+    ("bytes", "GET /api/v1/pets/{id}/"),
+    ("errors", "GET /api/v1/pets/{id}/"),
+])
+def test_rows_are_ranked(explorer, rank_by, first):
+    rows = _analyze_log_lines(explorer, LOG_LINES).rows(rank_by)
+    assert rows[0]["operation"] == first
+    assert len(rows) == 3
+
+
+def test_shard_analyses_merge_into_the_whole(explorer):
+    whole = _analyze_log_lines(explorer, LOG_LINES)
+    merged = LogAnalysis()
+    for shard in (LOG_LINES[:3], LOG_LINES[3:7], LOG_LINES[7:]):
+        merged.merge(_analyze_log_lines(explorer, shard))
+    assert merged.to_dict() == whole.to_dict()
+    restored = LogAnalysis.from_dict(json.loads(json.dumps(whole.to_dict())))
+    assert restored.rows("p95") == whole.rows("p95")
+
+
+def test_parallel_analysis_matches_in_process(explorer):
+    lines = LOG_LINES * 50
+    assert analyze_log(explorer, lines, workers=2).to_dict() == analyze_log(explorer, lines).to_dict()
@@ -0,0 +1,88 @@
+"""Tests for validating recorded traffic against the spec."""
+
+import pytest
+
+UUID = "3fa85f64-5717-4562-b3fc-2c963f66afa6"
+
+
+def _errors(explorer, record):
+    return [(error["in"], error["pointer"], error["message"]) for error in explorer.validate_record(record)["errors"]]
+
+
+@pytest.mark.parametrize("record", [
+    {"method": "POST", "path": "/api/v1/pets/", "request": {"name": "Rex", "species": "dog"},
+     "status": 201, "response": {"id": 1, "name": "Rex", "nicknames": ["R"]}},
+    {"method": "GET", "url": "https://api.example.com/api/v1/pets/?limit=5&offset=10", "status": 200,
+     "response": {"count": 1, "results": [{"id": 1, "name": "Rex", "owner": {"id": UUID, "pets": []}}]}},
+    {"method": "get", "path": "/api/v1/pets/7/", "status": 200, "response": {"id": 7, "name": "Rex"}},
+    {"method": "DELETE", "path": "/api/v1/pets/rex/", "status": 204},
+    {"method": "GET", "path": f"/api/v1/owners/{UUID}/", "status": 200, "response": {"id": UUID}},
+    {"method": "GET", "path": "/api/v1/owners/", "status": 200, "response": []},
+], ids=["create", "list", "retrieve", "delete-by-slug", "owner", "empty-list"])
+def test_valid_records_are_accepted(explorer, record):
+    result = explorer.validate_record(record)
+    assert result["operation"] is not None
+    assert result["errors"] == []
+
+
+def test_record_reports_its_operation(explorer):
+    result = explorer.validate_record({"method": "GET", "path": "/api/v1/pets/7/"})
+    assert result["endpoint"] == "/api/v1/pets/{id}/"
+    assert result["operation"] == "GET /api/v1/pets/{id}/"
+
+
+def test_request_and_response_bodies_are_checked(explorer):
+    record = {"method": "POST", "path": "/api/v1/pets/", "request": {"name": "", "species": "cow"},
+              "status": 201, "response": {"id": "1"}}
+    assert _errors(explorer, record) == [
+        ("request", "/name", "shorter than 1 characters"),
+        ("request", "/species", 'must be one of ["cat", "dog", "parrot"]'),
+        ("response", "/name", "is required"),
+        ("response", "/id", "expected integer"),
+    ]
+
+
+def test_required_request_body(explorer):
+    assert _errors(explorer, {"method": "POST", "path": "/api/v1/pets/", "request": None}) == [
+        ("request", "", "request body is required"),
+    ]
+
+
+def test_max_length(explorer):
+    record = {"method": "POST", "path": "/api/v1/pets/", "request": {"name": "x" * 41}}
+    assert _errors(explorer, record) == [("request", "/name", "longer than 40 characters")]
+
+
+def test_errors_in_nested_and_cyclic_components_have_pointers(explorer):
+    record = {"method": "GET", "url": "/api/v1/pets/?limit=5", "status": 200, "response": {
+        "count": 1, "results": [{"id": 1, "name": "x", "owner": {"id": UUID, "pets": [{"id": 2}]}}]}}
+    assert _errors(explorer, record) == [("response", "/results/0/owner/pets/0/name", "is required")]
+
+
+def test_formats_are_checked(explorer):
+    record = {"method": "GET", "path": f"/api/v1/owners/{UUID}/", "status": 200, "response": {"id": "not-uuid"}}
+    assert _errors(explorer, record) == [("response", "/id", "is not a valid uuid")]
+
+
+def test_query_parameters_are_checked(explorer):
+    assert _errors(explorer, {"method": "GET", "url": "/api/v1/pets/?limit=abc"}) == [
+        ("query", "/limit", "expected integer"),
+    ]
+
+
+def test_undocumented_status(explorer):
+    assert _errors(explorer, {"method": "GET", "path": "/api/v1/pets/7/", "status": 418}) == [
+        ("status", "", "status 418 is not documented"),
+    ]
+
+
+def test_method_not_allowed(explorer):
+    result = explorer.validate_record({"method": "PUT", "path": "/api/v1/pets/7/"})
+    assert result["operation"] is None
+    assert result["errors"] == [{"in": "method", "pointer": "", "message": "method PUT not allowed (allowed: GET)"}]
+
+
+def test_unmatched_path(explorer):
+    result = explorer.validate_record({"path": "/nowhere/"})
+    assert result["endpoint"] is None
+    assert result["errors"] == [{"in": "path", "pointer": "", "message": "no matching path"}]